@@ -3,10 +3,11 @@ from dash_extensions.enrich import (  # type: ignore
     Output,
     Input,
     State,
-    ALL
+    ALL,
+    ctx
 )
-import copy
-from typing import Optional
+from dash import no_update  # type: ignore
+from typing import Any, Optional
 from type_aliases import (
     GraphElements,
     GraphElement,
@@ -17,43 +18,69 @@ from canvas import (
     add_node,
     delete_node,
     delete_edge,
+    delete_selected,
     update_positions,
-    rebind_new_edge
+    transform_selection,
+    rebind_new_edge,
+    TRANSFORMATIONS
 )
 from attribute_editor import (
     confirm_button_click,
     add_button_click,
     remove_button_click,
-    confirm_label_button_click
+    confirm_label_button_click,
+    refresh_attribute_stats,
+    update_attribute_editor_sidebar,
+    ELEMENTS_IDXS,
+    decode_element_idxs
 )
 from sidebar import (
     new_graph,
-    update_output,
-    button_click
+    collect_function_params,
+    graph_orientation_switcher,
+    level_of_detail_switcher
+)
+from generation_jobs import (
+    start_import_job,
+    start_generation_job,
+    poll_generation_job,
+    cancel_generation_job,
+    DONE,
+    FAILED
+)
+from attribute_query import (
+    QueryError,
+    parse_query,
+    parse_assignments,
+    matching_elements,
+    apply_assignments
+)
+from graph_diff import diff_elements
+from undo_redo import (
+    snapshot_positions,
+    create_move_delta,
+    snapshot_data,
+    create_set_data_delta
+)
+from graph_document import (
+    Graph_document,
+    document_store,
+    session_locked,
+    create_elements_output,
+    create_elements_patch
 )
 
 
-CURRENT_ACTION_ID = 0
-UNDO_ACTION_ID = 0
-REDO_ACTION_ID = 1
+def selected_elements_idxs(data: Optional[list]) -> list:
+    if data is None or len(data) == 0:
+        return []
+    return decode_element_idxs(data[ELEMENTS_IDXS])
 
 
-def insert_u_r_action(
-    u_r_actions: U_R_Actions_Init,
-    before_action: GraphElements,
-    current_state: GraphElements
-) -> U_R_Actions_Init:
-    if before_action == current_state:
-        return u_r_actions
-    current_action_id = u_r_actions[CURRENT_ACTION_ID]
-    if current_action_id + 1 != len(u_r_actions):
-        u_r_actions = u_r_actions[:current_action_id + 1]
-    if current_action_id == 0 or u_r_actions[current_action_id] != before_action:
-        u_r_actions.append(before_action)
-        u_r_actions[CURRENT_ACTION_ID] += 1
-    u_r_actions.append(current_state)
-    u_r_actions[CURRENT_ACTION_ID] += 1
-    return u_r_actions
+def save_document_changes(session_id: str, document: Graph_document, delta: list) -> Any:
+    document.history.insert(delta)
+    document_store.save(session_id, document)
+    return create_elements_patch(delta)
 
 
 @app.callback(
@@ -63,18 +90,18 @@ def insert_u_r_action(
     ],
     [
         Input("graph-cytoscape", "dblTapData"),
-        State("graph-cytoscape", "elements"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data")
     ],
 )
+@session_locked
 def action_add_node(
     pos: Optional[dict],
-    elements: GraphElements,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
-    add_node_output = add_node(pos, elements)
-    return add_node_output, insert_u_r_action(u_r_actions, before_action, add_node_output)
+    session_id: str
+) -> tuple[Any, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    delta = add_node(pos, document.elements, document.index, document.id_generator)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return elements_patch, document.history.counts()
 
 
 @app.callback(
@@ -84,18 +111,18 @@ def action_add_node(
     ],
     [
         Input("graph-cytoscape", "dblTapNode"),
-        State("graph-cytoscape", "elements"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data")
     ],
 )
+@session_locked
 def action_delete_node(
     node: Optional[GraphElement],
-    elements: GraphElements,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
-    delete_node_output = delete_node(node, elements)
-    return delete_node_output, insert_u_r_action(u_r_actions, before_action, delete_node_output)
+    session_id: str
+) -> tuple[Any, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    delta = delete_node(node, document.index)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return elements_patch, document.history.counts()
 
 
 @app.callback(
@@ -105,18 +132,44 @@ def action_delete_node(
     ],
     [
         Input("graph-cytoscape", "dblTapEdge"),
-        State("graph-cytoscape", "elements"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data")
     ],
 )
+@session_locked
 def action_delete_edge(
     edge: Optional[GraphElement],
-    elements: GraphElements,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
-    delete_edge_output = delete_edge(edge, elements)
-    return delete_edge_output, insert_u_r_action(u_r_actions, before_action, delete_edge_output)
+    session_id: str
+) -> tuple[Any, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    delta = delete_edge(edge, document.index)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return elements_patch, document.history.counts()
+
+
+@app.callback(
+    [
+        Output("graph-cytoscape", "elements"),
+        Output("undo-redo-actions", "data")
+    ],
+    [
+        Input("delete-selected-button", "n_clicks"),
+        State("graph-cytoscape", "selectedNodeData"),
+        State("graph-cytoscape", "selectedEdgeData"),
+        State("session-id", "data")
+    ],
+    prevent_initial_call=True,
+)
+@session_locked
+def action_delete_selected(
+    n_clicks: Optional[int],
+    selected_node_data: Optional[list],
+    selected_edge_data: Optional[list],
+    session_id: str
+) -> tuple[Any, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    delta = delete_selected(selected_node_data, selected_edge_data, document.index)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return elements_patch, document.history.counts()
 
 
 @app.callback(
@@ -127,28 +180,59 @@ def action_delete_edge(
     [
         Input("graph-cytoscape", "ele_move_pos"),
         State("graph-cytoscape", "ele_move_data"),
-        State("graph-cytoscape", "elements"),
-        State("graph-cytoscape", "selectedNodeData"),
-        State("selected-items", "data"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data"),
+        State("selected-items", "data")
     ],
+    prevent_initial_call=True,
 )
+@session_locked
 def action_update_positions(
-    new_node_position: dict,
-    moved_node_data: dict,
-    elements: GraphElements,
-    selected_node_data: Optional[list],
-    data: list,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
+    new_node_position: Optional[dict],
+    moved_node_data: Optional[dict],
+    session_id: str,
+    data: list
+) -> tuple[Any, U_R_Actions_Init]:
+    if new_node_position is None or moved_node_data is None:
+        return no_update, no_update
+    document = document_store.get(session_id)
+    elements = document.elements
+    moved_node_idx = document.index.node_idx(moved_node_data["id"])
+    before_action = snapshot_positions(elements, selected_elements_idxs(data) + [moved_node_idx])
     positions_output = update_positions(
         new_node_position,
         moved_node_data,
         elements,
-        selected_node_data,
-        data)
-    return positions_output, insert_u_r_action(u_r_actions, before_action, positions_output)
+        data,
+        document.index,
+        document.positions)
+    delta = create_move_delta(positions_output, before_action)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return elements_patch, document.history.counts()
+
+
+@app.callback(
+    [
+        Output("graph-cytoscape", "elements"),
+        Output("undo-redo-actions", "data")
+    ],
+    [Input(button_id, "n_clicks") for button_id in TRANSFORMATIONS] + [
+        State("selected-items", "data"),
+        State("session-id", "data")
+    ],
+    prevent_initial_call=True,
+)
+def action_transform_selection(*args) -> tuple[Any, U_R_Actions_Init]:
+    data, session_id = args[len(TRANSFORMATIONS):]
+    if ctx.triggered_id is None:
+        return no_update, no_update
+    with document_store.lock(session_id):
+        document = document_store.get(session_id)
+        elements = document.elements
+        before_action = snapshot_positions(elements, selected_elements_idxs(data))
+        transform_output = transform_selection(ctx.triggered_id, elements, data, document.positions)
+        delta = create_move_delta(transform_output, before_action)
+        elements_patch = save_document_changes(session_id, document, delta)
+        return elements_patch, document.history.counts()
 
 
 @app.callback(
@@ -159,22 +243,21 @@ def action_update_positions(
     [
         Input("graph-cytoscape", "ehcompleteSource"),
         Input("graph-cytoscape", "ehcompleteTarget"),
-        State("graph-cytoscape", "elements"),
-        State("orientation-graph-switcher", "on"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data"),
+        State("orientation-graph-switcher", "on")
     ],
 )
+@session_locked
 def action_rebind_new_edge(
     source: Optional[GraphElement],
     target: Optional[GraphElement],
-    elements: GraphElements,
-    directed: bool,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
-    rebind_new_edge_output = rebind_new_edge(source, target, elements, directed)
-    return rebind_new_edge_output, insert_u_r_action(u_r_actions, before_action,
-                                                     rebind_new_edge_output)
+    session_id: str,
+    directed: bool
+) -> tuple[Any, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    delta = rebind_new_edge(source, target, document.elements, directed, document.index)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return elements_patch, document.history.counts()
 
 
 @app.callback(
@@ -188,36 +271,40 @@ def action_rebind_new_edge(
     [
         Input({"type": "attr_edit_confirm", "index": ALL}, "n_clicks"),
         State("sidebar_div", "children"),
-        State("graph-cytoscape", "elements"),
+        State("session-id", "data"),
         State({"type": "attr_edit_confirm", "index": ALL}, "id"),
         State({"type": "attr_name_input", "index": ALL}, "value"),
         State("selected-items", "data"),
-        State("previous-attr-elements", "data"),
-        State("undo-redo-actions", "data")
+        State("previous-attr-elements", "data")
     ],
     prevent_initial_call=True,
 )
+@session_locked
 def action_confirm_button_click(
     n_clicks: list,
     sidebar_children: list[InputComponent],
-    elements: GraphElements,
+    session_id: str,
     row_button_ids: list,
     row_names: list,
     data: list,
-    previous_attr_elements: dict,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, Optional[list], list, dict, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
+    previous_attr_elements: dict
+) -> tuple[Any, Optional[list], list, dict, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    elements = document.elements
+    before_action = snapshot_data(elements, selected_elements_idxs(data))
     confirm_button_click_output = confirm_button_click(
         n_clicks,
         sidebar_children,
         elements,
+        document.attributes,
         row_button_ids,
         row_names,
         data,
         previous_attr_elements)
-    return confirm_button_click_output + (insert_u_r_action(u_r_actions, before_action,
-                                                            confirm_button_click_output[0]),)
+    delta = create_set_data_delta(confirm_button_click_output[0], before_action)
+    refresh_attribute_stats(document, delta)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return (elements_patch,) + confirm_button_click_output[1:] + (document.history.counts(),)
 
 
 @app.callback(
@@ -230,37 +317,41 @@ def action_confirm_button_click(
     [
         Input("add-attribute-button", "n_clicks"),
         State("sidebar_div", "children"),
-        State("graph-cytoscape", "elements"),
+        State("session-id", "data"),
         State("add-attribute-name", "value"),
         State("add-attribute-value-container", "children"),
         State("attribute-type-dropdown", "value"),
-        State("selected-items", "data"),
-        State("undo-redo-actions", "data")
+        State("selected-items", "data")
     ],
     prevent_initial_call=True,
 )
+@session_locked
 def action_add_button_click(
     n_clicks: Optional[int],
     sidebar_children: list,
-    elements: GraphElements,
+    session_id: str,
     new_attribute_name: Optional[str],
     attr_val_container_children: Optional[list],
     type_dropdown_value: str,
-    data: list,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, list, list, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
+    data: list
+) -> tuple[Any, list, list, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    elements = document.elements
+    before_action = snapshot_data(elements, selected_elements_idxs(data))
     add_button_click_output = add_button_click(
         n_clicks,
         sidebar_children,
         elements,
+        document.attributes,
         new_attribute_name,
         attr_val_container_children,
         type_dropdown_value,
         data
     )
-    return add_button_click_output + (insert_u_r_action(u_r_actions, before_action,
-                                                        add_button_click_output[0]),)
+    delta = create_set_data_delta(add_button_click_output[0], before_action)
+    refresh_attribute_stats(document, delta)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return (elements_patch,) + add_button_click_output[1:] + (document.history.counts(),)
 
 
 @app.callback(
@@ -274,37 +365,41 @@ def action_add_button_click(
     [
         Input({"type": "attr_delete", "index": ALL}, "n_clicks"),
         State("sidebar_div", "children"),
-        State("graph-cytoscape", "elements"),
+        State("session-id", "data"),
         State({"type": "attr_delete", "index": ALL}, "id"),
         State({"type": "attr_name_text", "index": ALL}, "children"),
         State("selected-items", "data"),
-        State("undo-redo-actions", "data"),
         State("previous-attr-elements", "data")
     ],
     prevent_initial_call=True,
 )
+@session_locked
 def action_remove_button_click(
     n_clicks: list,
     sidebar_children: list,
-    elements: GraphElements,
+    session_id: str,
     row_button_ids: list,
     remove_value: list,
     data: list,
-    u_r_actions: U_R_Actions_Init,
     previous_attr_elements: dict
-) -> tuple[GraphElements, list, list, dict, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
+) -> tuple[Any, list, list, dict, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    elements = document.elements
+    before_action = snapshot_data(elements, selected_elements_idxs(data))
     remove_button_click_output = remove_button_click(
         n_clicks,
         sidebar_children,
         elements,
+        document.attributes,
         row_button_ids,
         remove_value,
         data,
         previous_attr_elements
     )
-    return remove_button_click_output + (insert_u_r_action(u_r_actions, before_action,
-                                                           remove_button_click_output[0]),)
+    delta = create_set_data_delta(remove_button_click_output[0], before_action)
+    refresh_attribute_stats(document, delta)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return (elements_patch,) + remove_button_click_output[1:] + (document.history.counts(),)
 
 
 @app.callback(
@@ -317,24 +412,25 @@ def action_remove_button_click(
     [
         Input("label_edit_confirm", "n_clicks"),
         State("sidebar_div", "children"),
-        State("graph-cytoscape", "elements"),
+        State("session-id", "data"),
         State("selected-items", "data"),
         State("previous-attr-elements", "data"),
-        State("label_edit_value", "value"),
-        State("undo-redo-actions", "data")
+        State("label_edit_value", "value")
     ],
     prevent_initial_call=True,
 )
+@session_locked
 def action_confirm_label_button_click(
     n_clicks: Optional[int],
     sidebar_children: list[InputComponent],
-    elements: GraphElements,
+    session_id: str,
     data: list,
     previous_attr_elements: dict,
-    new_label: str,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, Optional[list], dict, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
+    new_label: str
+) -> tuple[Any, Optional[list], dict, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    elements = document.elements
+    before_action = snapshot_data(elements, selected_elements_idxs(data))
     confirm_button_click_output = confirm_label_button_click(
         n_clicks,
         sidebar_children,
@@ -342,87 +438,194 @@ def action_confirm_label_button_click(
         data,
         previous_attr_elements,
         new_label)
-    return confirm_button_click_output + (insert_u_r_action(u_r_actions, before_action,
-                                                            confirm_button_click_output[0]),)
+    delta = create_set_data_delta(confirm_button_click_output[0], before_action)
+    refresh_attribute_stats(document, delta)
+    elements_patch = save_document_changes(session_id, document, delta)
+    return (elements_patch,) + confirm_button_click_output[1:] + (document.history.counts(),)
+
+
+@app.callback(
+    [
+        Output("graph-cytoscape", "elements"),
+        Output("sidebar_div", "children"),
+        Output("selected-items", "data"),
+        Output("bulk-edit-status", "children"),
+        Output("undo-redo-actions", "data")
+    ],
+    [
+        Input("bulk-edit-button", "n_clicks"),
+        State("bulk-edit-query", "value"),
+        State("bulk-edit-assignment", "value"),
+        State("session-id", "data"),
+        State("selected-items", "data"),
+        State("previous-attr-elements", "data")
+    ],
+    prevent_initial_call=True,
+)
+@session_locked
+def action_bulk_edit(
+    n_clicks: Optional[int],
+    query: Optional[str],
+    assignment: Optional[str],
+    session_id: str,
+    data: Optional[list],
+    previous_attr_elements: dict
+) -> tuple[Any, Any, Any, str, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    try:
+        assignments = parse_assignments(assignment)
+        element_idxs = matching_elements(document.attributes, parse_query(query))
+        before_action = snapshot_data(document.elements, element_idxs)
+        apply_assignments(document.attributes, element_idxs, assignments)
+    except QueryError as error:
+        return no_update, no_update, no_update, str(error), no_update
+    delta = create_set_data_delta(document.elements, before_action)
+    sidebar_output = update_attribute_editor_sidebar(document, delta, data, previous_attr_elements)
+    elements_patch = save_document_changes(session_id, document, delta)
+    status = f"{len(element_idxs)} elements matched"
+    return (elements_patch,) + sidebar_output + (status, document.history.counts())
 
 
 @app.callback(
     [
         Output("graph-cytoscape", "elements"),
+        Output("graph-cytoscape", "stylesheet"),
         Output("undo-redo-actions", "data")
     ],
     [
         Input("new-graph-button", "n_clicks"),
-        State("graph-cytoscape", "elements"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data"),
+        State("orientation-graph-switcher", "on"),
+        State("graph-cytoscape", "stylesheet")
     ],
 )
+@session_locked
 def action_new_graph(
     n: Optional[int],
-    elements: GraphElements,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
+    session_id: str,
+    directed: bool,
+    stylesheet: list[dict]
+) -> tuple[GraphElements, list[dict], U_R_Actions_Init]:
+    document = document_store.get_or_create(session_id)
+    elements = document.elements
+    before_action = list(elements)
     new_graph_output = new_graph(n, elements)
-    return new_graph_output, insert_u_r_action(u_r_actions, before_action, new_graph_output)
+    delta = diff_elements(before_action, new_graph_output)
+    document.set_elements(new_graph_output)
+    document.history.insert(delta)
+    document_store.save(session_id, document)
+    return (
+        create_elements_output(delta, new_graph_output),
+        level_of_detail_switcher(len(new_graph_output), directed, stylesheet),
+        document.history.counts(),
+    )
+
+
+def apply_graph_result(
+    session_id: str, result: tuple[GraphElements, bool], stylesheet: list[dict]
+) -> tuple[Any, bool, str, list[dict], U_R_Actions_Init]:
+    # a whole graph from an upload or a generation replaces the one of the document
+    cytoscape_elements, directed = result
+    label, stylesheet = graph_orientation_switcher(directed, stylesheet)
+    stylesheet = level_of_detail_switcher(len(cytoscape_elements), directed, stylesheet)
+    document = document_store.get_or_create(session_id)
+    delta = diff_elements(document.elements, cytoscape_elements)
+    document.set_elements(cytoscape_elements)
+    document.history.insert(delta)
+    document_store.save(session_id, document)
+    return (
+        create_elements_output(delta, cytoscape_elements),
+        directed,
+        label,
+        stylesheet,
+        document.history.counts(),
+    )
 
 
 @app.callback(
     [
-        Output("graph-cytoscape", "elements"),
-        Output("orientation-graph-switcher", "on"),
-        Output("orientation-graph-switcher", "label"),
-        Output("graph-cytoscape", "stylesheet"),
-        Output("undo-redo-actions", "data")
+        Output("import-job", "data"),
+        Output("import-interval", "disabled"),
+        Output("import-progress", "value"),
+        Output("import-status", "children"),
     ],
     [
         Input("upload-graph", "contents"),
         State("upload-graph", "filename"),
-        State("graph-cytoscape", "elements"),
-        State("orientation-graph-switcher", "on"),
-        State("orientation-graph-switcher", "label"),
-        State("graph-cytoscape", "stylesheet"),
-        State("undo-redo-actions", "data")
+        State("upload-layout-dropdown", "value"),
+        State("import-job", "data"),
     ],
+    prevent_initial_call=True,
 )
 def action_update_output(
     contents: Optional[str],
     filename: Optional[str],
-    elements: GraphElements,
-    directed: bool,
-    label: str,
-    stylesheet: list[dict],
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, bool, str, list[dict], U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
-    uploaded_graph_output = update_output(
-        contents,
-        filename,
-        elements,
-        directed,
-        label,
-        stylesheet
-    )
-    return uploaded_graph_output + (insert_u_r_action(u_r_actions, before_action,
-                                                      uploaded_graph_output[0]),)
+    layout_name: str,
+    running_job_id: Optional[str],
+) -> tuple[Optional[str], bool, int, str]:
+    if contents is None:
+        return no_update, no_update, no_update, no_update
+    # a new upload replaces the one still importing
+    cancel_generation_job(running_job_id)
+    job_id = start_import_job(contents, filename or "", layout_name)
+    return job_id, False, 0, "Importing..."
 
 
 @app.callback(
     [
         Output("graph-cytoscape", "elements"),
-        Output("modal_menu_graph_functions", "is_open"),
         Output("orientation-graph-switcher", "on"),
         Output("orientation-graph-switcher", "label"),
         Output("graph-cytoscape", "stylesheet"),
-        Output("undo-redo-actions", "data")
+        Output("undo-redo-actions", "data"),
+        Output("import-job", "data"),
+        Output("import-interval", "disabled"),
+        Output("import-progress", "value"),
+        Output("import-status", "children"),
+    ],
+    [
+        Input("import-interval", "n_intervals"),
+        State("import-job", "data"),
+        State("graph-cytoscape", "stylesheet"),
+        State("session-id", "data")
+    ],
+    prevent_initial_call=True,
+)
+@session_locked
+def action_poll_import(
+    _: int,
+    job_id: Optional[str],
+    stylesheet: list[dict],
+    session_id: str
+) -> tuple:
+    job = poll_generation_job(job_id)
+    if job is None:
+        return (no_update,) * 5 + (None, True, 0, "")
+    if job.state == FAILED:
+        return (no_update,) * 5 + (None, True, 0, job.error)
+    if job.state != DONE:
+        return (no_update,) * 7 + (int(job.progress * 100), no_update)
+    return apply_graph_result(session_id, job.result, stylesheet) + (  # type: ignore
+        None,
+        True,
+        100,
+        "",
+    )
+
+
+@app.callback(
+    [
+        Output("generation-job", "data"),
+        Output("generation-interval", "disabled"),
+        Output("generation-progress", "value"),
+        Output("generation-status", "children"),
     ],
     [
         Input("graph_generate_button", "n_clicks"),
         State("graph_layout_dropdown", "value"),
         State("input_fields", "children"),
-        State("graph-cytoscape", "stylesheet"),
-        State("graph-cytoscape", "elements"),
-        State("undo-redo-actions", "data")
+        State("generate-layout-dropdown", "value"),
+        State("generation-job", "data"),
     ],
     prevent_initial_call=True,
 )
@@ -430,52 +633,168 @@ def action_button_click(
     n_clicks: int,
     value: str,
     html_input_children: list[InputComponent],
+    layout_name: str,
+    running_job_id: Optional[str],
+) -> tuple[Optional[str], bool, int, str]:
+    if n_clicks is None or value is None or html_input_children is None:
+        return no_update, no_update, no_update, no_update
+    # a new generation replaces the one still running
+    cancel_generation_job(running_job_id)
+    param_dict = collect_function_params(html_input_children)
+    job_id = start_generation_job(value, param_dict, layout_name)
+    return job_id, False, 0, "Generating..."
+
+
+@app.callback(
+    [
+        Output("graph-cytoscape", "elements"),
+        Output("modal_menu_graph_functions", "is_open"),
+        Output("orientation-graph-switcher", "on"),
+        Output("orientation-graph-switcher", "label"),
+        Output("graph-cytoscape", "stylesheet"),
+        Output("undo-redo-actions", "data"),
+        Output("generation-job", "data"),
+        Output("generation-interval", "disabled"),
+        Output("generation-progress", "value"),
+        Output("generation-status", "children"),
+    ],
+    [
+        Input("generation-interval", "n_intervals"),
+        State("generation-job", "data"),
+        State("graph-cytoscape", "stylesheet"),
+        State("session-id", "data")
+    ],
+    prevent_initial_call=True,
+)
+@session_locked
+def action_poll_generation(
+    _: int,
+    job_id: Optional[str],
     stylesheet: list[dict],
-    elements: GraphElements,
-    u_r_actions: U_R_Actions_Init
-) -> tuple[GraphElements, bool, bool, str, list[dict], U_R_Actions_Init]:
-    before_action = copy.deepcopy(elements)
-    created_graph_output = button_click(
-        n_clicks,
-        value,
-        html_input_children,
-        stylesheet
+    session_id: str
+) -> tuple:
+    job = poll_generation_job(job_id)
+    if job is None:
+        return (no_update,) * 6 + (None, True, 0, "")
+    if job.state == FAILED:
+        return (no_update,) * 6 + (None, True, 0, job.error)
+    if job.state != DONE:
+        return (no_update,) * 8 + (int(job.progress * 100), no_update)
+    elements_output, directed, label, stylesheet, counts = apply_graph_result(
+        session_id, job.result, stylesheet  # type: ignore
     )
-    return created_graph_output + (insert_u_r_action(u_r_actions, before_action,
-                                                     created_graph_output[0]),)
+    return (
+        elements_output,
+        False,
+        directed,
+        label,
+        stylesheet,
+        counts,
+        None,
+        True,
+        100,
+        "",
+    )
+
+
+@app.callback(
+    [
+        Output("generation-job", "data"),
+        Output("generation-interval", "disabled"),
+        Output("generation-progress", "value"),
+        Output("generation-status", "children"),
+    ],
+    [
+        Input("generation-cancel-button", "n_clicks"),
+        State("generation-job", "data"),
+    ],
+    prevent_initial_call=True,
+)
+def action_cancel_generation(_: int, job_id: Optional[str]) -> tuple[None, bool, int, str]:
+    cancel_generation_job(job_id)
+    return None, True, 0, "Cancelled" if job_id is not None else ""
+
+
+@app.callback(
+    [
+        Output("document-resync", "data"),
+        Output("undo-redo-actions", "data")
+    ],
+    [
+        Input("document-resync", "data"),
+        State("graph-cytoscape", "elements"),
+        State("session-id", "data")
+    ],
+    prevent_initial_call=True,
+)
+@session_locked
+def action_resync_document(
+    resync: Optional[bool],
+    elements: Optional[GraphElements],
+    session_id: str
+) -> tuple[Optional[bool], U_R_Actions_Init]:
+    if not resync:
+        return no_update, no_update
+    # the history of the expired document is lost, the graph itself is not
+    document = Graph_document()
+    document.set_elements(elements if elements is not None else [])
+    document_store.save(session_id, document)
+    return None, document.history.counts()
 
 
 @app.callback(
     [
         Output("graph-cytoscape", "elements"),
+        Output("sidebar_div", "children"),
+        Output("selected-items", "data"),
         Output("undo-redo-actions", "data")
     ],
     [
         Input("graph-cytoscape", "undoClick"),
-        State("graph-cytoscape", "elements"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data"),
+        State("selected-items", "data"),
+        State("previous-attr-elements", "data")
     ]
 )
-def undo(undo_click, elements, u_r_actions) -> tuple[GraphElements, U_R_Actions_Init]:
-    if u_r_actions[CURRENT_ACTION_ID] <= 1 or undo_click == 0:
-        return elements, u_r_actions
-    u_r_actions[CURRENT_ACTION_ID] -= 1
-    return u_r_actions[u_r_actions[CURRENT_ACTION_ID]], u_r_actions
+@session_locked
+def undo(
+    undo_click, session_id, data, previous_attr_elements
+) -> tuple[Any, Any, Any, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    if undo_click == 0 or not document.history.can_undo():
+        return no_update, no_update, no_update, no_update
+    delta = document.history.undo(document.elements)
+    document.invalidate()
+    sidebar_output = update_attribute_editor_sidebar(document, delta, data, previous_attr_elements)
+    document_store.save(session_id, document)
+    elements_patch = create_elements_patch(delta, inverse=True)
+    return (elements_patch,) + sidebar_output + (document.history.counts(),)
 
 
 @app.callback(
     [
         Output("graph-cytoscape", "elements"),
+        Output("sidebar_div", "children"),
+        Output("selected-items", "data"),
         Output("undo-redo-actions", "data")
     ],
     [
         Input("graph-cytoscape", "redoClick"),
-        State("graph-cytoscape", "elements"),
-        State("undo-redo-actions", "data")
+        State("session-id", "data"),
+        State("selected-items", "data"),
+        State("previous-attr-elements", "data")
     ]
 )
-def redo(redo_click, elements, u_r_actions) -> tuple[GraphElements, U_R_Actions_Init]:
-    if u_r_actions[CURRENT_ACTION_ID] == len(u_r_actions) - 1 or redo_click == 0:
-        return elements, u_r_actions
-    u_r_actions[CURRENT_ACTION_ID] += 1
-    return u_r_actions[u_r_actions[CURRENT_ACTION_ID]], u_r_actions
+@session_locked
+def redo(
+    redo_click, session_id, data, previous_attr_elements
+) -> tuple[Any, Any, Any, U_R_Actions_Init]:
+    document = document_store.get(session_id)
+    if redo_click == 0 or not document.history.can_redo():
+        return no_update, no_update, no_update, no_update
+    delta = document.history.redo(document.elements)
+    document.invalidate()
+    sidebar_output = update_attribute_editor_sidebar(document, delta, data, previous_attr_elements)
+    document_store.save(session_id, document)
+    elements_patch = create_elements_patch(delta)
+    return (elements_patch,) + sidebar_output + (document.history.counts(),)
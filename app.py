@@ -29,7 +29,9 @@ OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
 import dash_bootstrap_components as dbc  # type: ignore
-from html_layout import APP_LAYOUT
+from dash import set_props  # type: ignore
+from html_layout import serve_app_layout
+from graph_document import DocumentNotFoundError
 from dash_extensions.enrich import (  # type: ignore
     DashProxy,
     MultiplexerTransform
@@ -38,14 +40,24 @@ from dash_extensions.enrich import (  # type: ignore
 
 # selected_items = Selected_items()
 
+
+def handle_callback_error(error: Exception) -> None:
+    if not isinstance(error, DocumentNotFoundError):
+        raise error
+    # the document expired, the action is dropped and the browser sends its graph
+    # to rebuild the document, see action_resync_document
+    set_props("document-resync", {"data": True})
+
+
 app = DashProxy(
     __name__,
     external_stylesheets=[dbc.themes.BOOTSTRAP],
     transforms=[MultiplexerTransform()],
     suppress_callback_exceptions=True,
+    on_error=handle_callback_error,
 )
 
-app.layout = APP_LAYOUT
+app.layout = serve_app_layout
 
 
 # TEST CALLBACK FUNCTION
@@ -13,14 +13,20 @@ from type_aliases import (
     InputComponent,
     InputValue,
 )
-from typing import Union, Optional
+from typing import Any, Union, Optional
+from dash import Patch, no_update  # type: ignore
 from graph_utils import ADD_ATTRS, is_node
+from graph_model import Attribute_columns, Attribute_stats, Element_index, element_key
+from graph_document import Graph_document, document_store, session_locked
+from undo_redo import OPERATION, SET_DATA, ITEMS, ITEM_IDX
+from lazy_imports import lazy_import
 import dash_bootstrap_components as dbc  # type: ignore
 import dash_daq as daq  # type: ignore
-import json
 import ast
+import base64
 import copy
-from functools import reduce
+import json
+import zlib
 from css_stylesheets import (
     ATTRIBUTE_SIDEBAR_STYLE,
     BUTTON,
@@ -37,12 +43,13 @@ from css_stylesheets import (
     BUTTONS
 )
 
-# Constants for indexing selected_items data
+np = lazy_import("numpy")
+
+# Constants for indexing selected_items data, the attributes themselves stay on the server
 COMMON_ATTRS = 0
-ELEMENTS = 1
-EDGES = 2
-NODES = 3
-ELEMENTS_IDXS = 4
+ELEMENTS_IDXS = 1
+NODE_COUNT = 2
+EDGE_COUNT = 3
 
 # Constants for general indexing
 LABEL_TEXT_VALUE_IDX = 2
@@ -271,13 +278,28 @@ class IdxError(ValueError):
     pass
 
 
+def encode_element_idxs(element_idxs: list) -> str:
+    """Sorted element indices as zlib compressed differences in base64.
+
+    Box selections are mostly runs of neighbouring indices, their
+    differences are ones which compress to a few bytes.
+    """
+    idxs = np.asarray(element_idxs, dtype=np.int64)
+    deltas = np.diff(idxs, prepend=0).astype("<i4")
+    return base64.b64encode(zlib.compress(deltas.tobytes())).decode("ascii")
+
+
+def decode_element_idxs(encoded: str) -> list:
+    deltas = np.frombuffer(zlib.decompress(base64.b64decode(encoded)), dtype="<i4")
+    return np.cumsum(deltas, dtype=np.int64).tolist()
+
+
 class Selected_items:
     def __init__(self) -> None:
         self._selected_common_attrs: list = []
-        self._selected_elements: GraphElements = []
-        self._selected_edges: GraphElements = []
-        self._selected_nodes: GraphElements = []
         self._selected_elements_idxs: list = []
+        self._node_count = 0
+        self._edge_count = 0
 
     def set_attrs(self, selected_common_attrs: list) -> None:
         self._selected_common_attrs = selected_common_attrs
@@ -285,60 +307,47 @@ class Selected_items:
     def get_attrs(self) -> list:
         return self._selected_common_attrs.copy()
 
-    def set_elements(self, selected_elements: GraphElements) -> None:
-        self._selected_elements = selected_elements
-
-    def get_elements(self) -> GraphElements:
-        return self._selected_elements.copy()
-
-    def set_edges(self, selected_edges: GraphElements) -> None:
-        self._selected_edges = selected_edges
-
-    def get_edges(self) -> GraphElements:
-        return self._selected_edges.copy()
+    def get_node_count(self) -> int:
+        return self._node_count
 
-    def set_nodes(self, selected_nodes: GraphElements) -> None:
-        self._selected_nodes = selected_nodes
+    def get_edge_count(self) -> int:
+        return self._edge_count
 
-    def get_nodes(self) -> GraphElements:
-        return self._selected_nodes.copy()
-
-    def generate_selected_elements_idxs(self, elements: GraphElements) -> None:
-        selected_elements_idxs: list = []
-        for i in range(0, len(elements)):
-            self._append_idx_if_selected_element(elements, i, selected_elements_idxs)
-        self._selected_elements_idxs = selected_elements_idxs
-
-    def _append_idx_if_selected_element(
-        self, elements: GraphElements, element_idx: int, selected_elements_idxs: list
+    def generate_selected_elements_idxs(
+        self,
+        selected_nodes: GraphElements,
+        selected_edges: GraphElements,
+        elements: GraphElements,
+        element_index: Optional[Element_index] = None
     ) -> None:
-        for selected_node in self._selected_nodes:
-            if (
-                is_node(elements[element_idx])
-                and elements[element_idx]["data"]["id"] == selected_node["id"]
-            ):
-                selected_elements_idxs.append(element_idx)
-        for selected_edge in self._selected_edges:
-            if (
-                not is_node(elements[element_idx])
-                and elements[element_idx]["data"]["source"] == selected_edge["source"]
-                and elements[element_idx]["data"]["target"] == selected_edge["target"]
-            ):
-                selected_elements_idxs.append(element_idx)
+        if element_index is None:
+            element_index = Element_index(elements)
+        node_idxs = set()
+        for selected_node in selected_nodes:
+            node_idx = element_index.node_idx(selected_node["id"])
+            if node_idx is not None:
+                node_idxs.add(node_idx)
+        edge_idxs = set()
+        for selected_edge in selected_edges:
+            edge_idx = element_index.edge_idx(selected_edge["source"], selected_edge["target"])
+            if edge_idx is not None:
+                edge_idxs.add(edge_idx)
+        self._node_count = len(node_idxs)
+        self._edge_count = len(edge_idxs)
+        self._selected_elements_idxs = sorted(node_idxs | edge_idxs)
 
     def get_elements_idxs(self) -> list:
         return self._selected_elements_idxs
 
     def get_data(self) -> list:
-        return [self._selected_common_attrs, self._selected_elements, self._selected_edges,
-                self._selected_nodes, self._selected_elements_idxs]
+        return [self._selected_common_attrs, encode_element_idxs(self._selected_elements_idxs),
+                self._node_count, self._edge_count]
 
     def set_data(self, data: list) -> None:
         self._selected_common_attrs = data[COMMON_ATTRS]
-        self._selected_elements = data[ELEMENTS]
-        self._selected_edges = data[EDGES]
-        self._selected_nodes = data[NODES]
-        self._selected_elements_idxs = data[ELEMENTS_IDXS]
+        self._selected_elements_idxs = decode_element_idxs(data[ELEMENTS_IDXS])
+        self._node_count = data[NODE_COUNT]
+        self._edge_count = data[EDGE_COUNT]
 
 
 # Helper functions for attribute editor
@@ -348,20 +357,34 @@ def optional_none_to_empty_list(optional_list: Optional[list]) -> list:
     return optional_list
 
 
-def extract_attribute_names(selected_item: dict) -> set:
-    return set(selected_item.keys())
+def select_attribute_stats(
+    stats: Attribute_stats, elements: GraphElements, element_idxs: list
+) -> None:
+    """Brings the statistics to the new selection, only elements which changed are touched."""
+    selected = {element_key(elements[idx]): idx for idx in element_idxs}
+    for key in stats.keys() - selected.keys():
+        stats.discard(key)
+    for key, idx in selected.items():
+        if key not in stats:
+            stats.add(key, elements[idx][DATA][ADD_ATTRS])
+
+
+def set_data_idxs(delta: list) -> list[int]:
+    return [
+        item[ITEM_IDX]
+        for operation in delta if operation[OPERATION] == SET_DATA
+        for item in operation[ITEMS]
+    ]
 
 
-def count_unique_values(values: list[dict], key: str) -> int:
-    unique_set = set()
-    for value in values:
-        dict_value = value[key]
-        if isinstance(dict_value, dict):
-            dict_value = json.dumps(dict_value, sort_keys=True)
-        if isinstance(dict_value, list) or isinstance(dict_value, set):
-            dict_value = str(dict_value)
-        unique_set.add(dict_value)
-    return len(unique_set)
+def refresh_attribute_stats(document: Graph_document, delta: list) -> set[str]:
+    """Updates the statistics after a change of elements, returns the names of changed attributes."""
+    changed: set[str] = set()
+    stats = document.selection_stats
+    for element_idx in set_data_idxs(delta):
+        element = document.elements[element_idx]
+        changed |= stats.update(element_key(element), element[DATA][ADD_ATTRS])
+    return changed
 
 
 def is_real_click(
@@ -503,25 +526,22 @@ def create_label_row(label: str, row_template: html.Div) -> html.Div:
 
 def update_elements_attributes_name(
     element_idxs: list,
-    elements: GraphElements,
+    attributes: Attribute_columns,
     new_name: str,
     old_name: str,
     common_attrs: list
 ) -> None:
-    for element_idx in element_idxs:
-        elements[element_idx][DATA][ADD_ATTRS][new_name] = \
-            elements[element_idx][DATA][ADD_ATTRS].pop(old_name)
+    attributes.rename(old_name, new_name, element_idxs)
     common_attrs[common_attrs.index(old_name)] = new_name
 
 
 def update_elements_attributes_value(
     element_idxs: list,
-    elements: GraphElements,
+    attributes: Attribute_columns,
     new_value: InputValue,
     name: str
 ) -> None:
-    for element_idx in element_idxs:
-        elements[element_idx][DATA][ADD_ATTRS][name] = new_value
+    attributes.set_value(name, element_idxs, new_value)
 
 
 def update_attribute_rows_indices(
@@ -551,15 +571,6 @@ def update_attribute_row_indices(row_children: list, new_idx: int) -> None:
         row_children[i][PROPS][ID][INDEX] = new_idx
 
 
-def update_attr_row(
-    selected_items: Selected_items,
-    elements: GraphElements,
-    sidebar_child: dict
-) -> None:
-    if sidebar_child[PROPS][CHILDREN][ATTR_NAME_IDX][TYPE] == "Input":
-        return
-
-
 def extract_value_from_children(
     children: Union[list[dict], dict],
     value_input_idx: int = 0,
@@ -609,6 +620,7 @@ def confirm_button_click(
     n_clicks: list,
     sidebar_children: list[InputComponent],
     elements: GraphElements,
+    attributes: Attribute_columns,
     row_button_ids: list,
     row_names: list,
     data: list,
@@ -636,7 +648,7 @@ def confirm_button_click(
     attr_value_props = row_children[ATTR_VALUE_IDX][PROPS]
     new_value = elements[first_element_idx][DATA][ADD_ATTRS][old_name]
     type_symbol = row_children[TYPE_SYMBOL_IDX][PROPS][CHILDREN][PROPS][ALT]
-    update_elements_attributes_name(element_idxs, elements, new_name, old_name, common_attrs)
+    update_elements_attributes_name(element_idxs, attributes, new_name, old_name, common_attrs)
     if attr_value_props[ID][TYPE] == ATTR_VALUE_COUNT_TYPE:
         value_count = int(attr_value_props[CHILDREN][3:])
     else:
@@ -648,7 +660,7 @@ def confirm_button_click(
             new_value = int(attr_value_props[VALUE])
         else:
             new_value = attr_value_props[VALUE]
-        update_elements_attributes_value(element_idxs, elements, new_value, new_name)
+        update_elements_attributes_value(element_idxs, attributes, new_value, new_name)
 
     new_text_row = create_attribute_text_row(new_name, new_value, value_count, row_idx)
     sidebar_children[row_sidebar_idx] = new_text_row
@@ -662,6 +674,7 @@ def add_button_click(
     n_clicks: Optional[int],
     sidebar_children: list,
     elements: GraphElements,
+    attributes: Attribute_columns,
     new_attribute_name: Optional[str],
     attr_val_container_children: Optional[list],
     type_dropdown_value: str,
@@ -687,8 +700,7 @@ def add_button_click(
     common_attrs.append(new_attribute_name)
     selected_items.set_attrs(common_attrs)
     elements_idxs = selected_items.get_elements_idxs()
-    for element_idx in elements_idxs:
-        elements[element_idx][DATA][ADD_ATTRS][new_attribute_name] = new_attribute_value
+    attributes.set_value(new_attribute_name, elements_idxs, new_attribute_value)
 
     insert_idx, new_row_idx = get_insert_row_idx(sidebar_children)
 
@@ -705,6 +717,7 @@ def remove_button_click(
     n_clicks: list,
     sidebar_children: list,
     elements: GraphElements,
+    attributes: Attribute_columns,
     row_button_ids: list,
     row_values: list,
     data: list,
@@ -723,8 +736,7 @@ def remove_button_click(
     if row_list_idx is None:
         raise IdxError()
     remove_value = row_values[row_list_idx]
-    for element_idx in elements_idxs:
-        elements[element_idx]["data"][ADD_ATTRS].pop(remove_value)
+    attributes.delete(remove_value, elements_idxs)
     common_attrs = selected_items.get_attrs()
     common_attrs.remove(remove_value)
     selected_items.set_attrs(common_attrs)
@@ -741,44 +753,63 @@ def remove_button_click(
     [
         Input("graph-cytoscape", "selectedNodeData"),
         Input("graph-cytoscape", "selectedEdgeData"),
-        State("graph-cytoscape", "elements"),
+        State("session-id", "data"),
     ],
 )
+@session_locked
 def create_attribute_editor_sidebar(
     selected_nodes: GraphElements,
     selected_edges: GraphElements,
-    elements: GraphElements,
+    session_id: str,
 ) -> list:
     selected_nodes, selected_edges = optional_none_to_empty_list(
         selected_nodes
     ), optional_none_to_empty_list(selected_edges)
     selected_nodes_edges = selected_nodes + selected_edges
+    document = document_store.get(session_id)
     if len(selected_nodes_edges) == 0:
+        if len(document.selection_stats) > 0:
+            select_attribute_stats(document.selection_stats, document.elements, [])
+            document_store.save_selection(session_id, document)
         return [[], []]
-    sidebar_children = []
-    attributes: list = []
-    additional_attrs = []
-    for selected_item in selected_nodes_edges:
-        additional_attr = selected_item[ADD_ATTRS]
-        attributes.append(extract_attribute_names(additional_attr))
-        additional_attrs.append(additional_attr)
-    common_attr = list(reduce(set.intersection, attributes))  # type: ignore
     selected_items = Selected_items()
-    selected_items.set_attrs(common_attr)
-    selected_items.set_elements(selected_nodes_edges)
-    selected_items.set_nodes(selected_nodes)
-    selected_items.set_edges(selected_edges)
-    selected_items.generate_selected_elements_idxs(elements)
+    selected_items.generate_selected_elements_idxs(
+        selected_nodes, selected_edges, document.elements, document.index
+    )
+    select_attribute_stats(
+        document.selection_stats, document.elements, selected_items.get_elements_idxs()
+    )
+    document_store.save_selection(session_id, document)
+    selected_items.set_attrs(document.selection_stats.common_attrs())
+    label = None
     if len(selected_nodes) == 1 and len(selected_edges) == 0:
-        sidebar_children.append(create_label_row(selected_nodes[0]["label"], LABEL_ROW_TEXT))
+        label = selected_nodes[0]["label"]
+    sidebar = html.Div(
+        id="sidebar_div",
+        children=create_sidebar_children(label, document.selection_stats, selected_items.get_attrs()),
+        style=ATTRIBUTE_SIDEBAR_STYLE,
+    )
+    return [sidebar, selected_items.get_data()]
+
+
+def attribute_rows_offset(has_label_row: bool) -> int:
+    # the label row and the heading precede the attribute rows
+    return 2 if has_label_row else 1
+
+
+def create_sidebar_children(
+    label: Optional[str], stats: Attribute_stats, common_attrs: list
+) -> list:
+    sidebar_children = []
+    if label is not None:
+        sidebar_children.append(create_label_row(label, copy.deepcopy(LABEL_ROW_TEXT)))
     sidebar_children.append(
         html.H5("Attributes", id="elements_prop_fields_heading")
     )
-    index = len(sidebar_children)
-    for attr in common_attr:
-        number_of_values = count_unique_values(additional_attrs, attr)
+    index = attribute_rows_offset(label is not None)
+    for attr in common_attrs:
         sidebar_children.append(create_attribute_text_row(
-            attr, additional_attrs[0][attr], number_of_values, index
+            attr, stats.first_value(attr), stats.value_count(attr), index
         ))
         index += 1
     sidebar_children.append(
@@ -809,12 +840,7 @@ def create_attribute_editor_sidebar(
             color="success",
         )
     )
-    sidebar = html.Div(
-        id="sidebar_div",
-        children=sidebar_children,
-        style=ATTRIBUTE_SIDEBAR_STYLE,
-    )
-    return [sidebar, selected_items.get_data()]
+    return sidebar_children
 
 
 @app.callback(
@@ -827,16 +853,17 @@ def create_attribute_editor_sidebar(
         State("sidebar_div", "children"),
         State("previous-attr-elements", "data"),
         State("selected-items", "data"),
-        State("graph-cytoscape", "elements")
+        State("session-id", "data")
     ],
     prevent_initial_call=True
 )
+@session_locked
 def create_attribute_input_row(
     n_clicks: list,
     sidebar_children: list,
     prev_attr_elements: dict,
     data: list,
-    elements: GraphElements
+    session_id: str
 ) -> tuple[list, dict]:
     triggered = ctx.triggered_id
     triggered_n_clicks = ctx.triggered
@@ -882,6 +909,7 @@ def create_attribute_input_row(
         style=ROW | ATTR_ROW_COLORS[type_symbol] | ROW_ROW
     )
     sidebar_children[row_idx] = attr_input_row
+    elements = document_store.get(session_id).elements
     prev_attr_elements[str(row_idx)] = {NAME_ELEMENT: name_element,
                                         VALUE_ELEMENT: attr_value_text_element,
                                         VALUE: elements[element_idxs[0]][DATA][ADD_ATTRS][name]}
@@ -934,30 +962,51 @@ def cancel_attr_edit(
     return sidebar_children, previous_attr_elements
 
 
-@app.callback(
-    [
-        Output("sidebar_div", "children")
-    ],
-    [
-        Input("graph-cytoscape", "elements"),
-        State("sidebar_div", "children"),
-        State("selected-items", "data")
-    ],
-)
 def update_attribute_editor_sidebar(
-    elements: GraphElements,
-    sidebar_children: list[dict],
-    data: list
-) -> list:
-    if len(sidebar_children) == 0:
-        return []
+    document: Graph_document,
+    delta: list,
+    data: Optional[list],
+    previous_attr_elements: dict
+) -> tuple[Any, Any]:
+    """Sidebar children and selected items after undo or redo changed the elements.
+
+    Only rows of attributes whose values changed are sent as a Patch, rows
+    being edited are left alone. The sidebar is rebuilt only when the set
+    of common attributes changed.
+    """
+    if data is None or len(data) == 0:
+        return no_update, no_update
+    changed = refresh_attribute_stats(document, delta)
     selected_items = Selected_items()
     selected_items.set_data(data)
-    for sidebar_child in sidebar_children:
-        child_id = sidebar_child["props"].get("id")
-        if child_id is not None and "attr_row_index" in child_id:
-            update_attr_row(selected_items, elements, sidebar_child)
-    return sidebar_children
+    stats = document.selection_stats
+    common_attrs = selected_items.get_attrs()
+    label = None
+    node_idx = None
+    if selected_items.get_node_count() == 1 and selected_items.get_edge_count() == 0:
+        node_idx = selected_items.get_elements_idxs()[0]
+        if node_idx < len(document.elements):
+            label = document.elements[node_idx][DATA][LABEL]
+    if set(common_attrs) != set(stats.common_attrs()):
+        common_attrs = [attr for attr in common_attrs if attr in stats.common_attrs()]
+        common_attrs += [attr for attr in stats.common_attrs() if attr not in common_attrs]
+        selected_items.set_attrs(common_attrs)
+        return create_sidebar_children(label, stats, common_attrs), selected_items.get_data()
+    patch = Patch()
+    updated = False
+    label_changed = node_idx in set_data_idxs(delta)
+    if label is not None and label_changed and LABEL not in previous_attr_elements:
+        patch[LABEL_ROW_SIDEBAR_IDX] = create_label_row(label, copy.deepcopy(LABEL_ROW_TEXT))
+        updated = True
+    offset = attribute_rows_offset(label is not None)
+    for row_idx, attr in enumerate(common_attrs, offset):
+        if attr not in changed or str(row_idx) in previous_attr_elements:
+            continue
+        patch[row_idx] = create_attribute_text_row(
+            attr, stats.first_value(attr), stats.value_count(attr), row_idx
+        )
+        updated = True
+    return (patch if updated else no_update), no_update
 
 
 @app.callback(
@@ -1001,63 +1050,77 @@ def set_attribute_value_input_type(
     return input_field, disabled
 
 
-@app.callback(
+def component_json(value: Any) -> Any:
+    if hasattr(value, "to_plotly_json"):
+        value = value.to_plotly_json()
+    if isinstance(value, dict):
+        return {key: component_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [component_json(item) for item in value]
+    return value
+
+
+# showing and hiding the label input only swaps the row, the browser does it
+# with the row templates instead of sending the sidebar to the server
+app.clientside_callback(
+    """
+    function(n_clicks, prev_attr_elements, label) {
+        if (!n_clicks) {
+            return [dash_clientside.no_update, dash_clientside.no_update];
+        }
+        const row = %s;
+        row.props.children[%d].props.value = label;
+        return [
+            new dash_clientside.Patch().assign([%d], row).build(),
+            {...prev_attr_elements, %s: label}
+        ];
+    }
+    """ % (
+        json.dumps(component_json(LABEL_ROW_EDIT)),
+        ATTR_VALUE_IDX,
+        LABEL_ROW_SIDEBAR_IDX,
+        json.dumps(LABEL),
+    ),
     [
         Output("sidebar_div", "children"),
         Output("previous-attr-elements", "data")
     ],
     [
         Input("label_edit_pencil", "n_clicks"),
-        State("sidebar_div", "children"),
         State("previous-attr-elements", "data"),
         State("label_text_value", "children")
     ],
     prevent_initial_call=True
 )
-def create_label_input_row(
-    n_clicks: Optional[int],
-    sidebar_children: list,
-    prev_attr_elements: dict,
-    label: str
-) -> tuple[list, dict]:
-    if n_clicks is None \
-       or n_clicks < 1:
-        return sidebar_children, prev_attr_elements
-
-    label_input_row = copy.deepcopy(LABEL_ROW_EDIT)
-    label_input_row.children[ATTR_VALUE_IDX].value = label  # type: ignore
-    sidebar_children[LABEL_ROW_SIDEBAR_IDX] = label_input_row
-    prev_attr_elements[LABEL] = label
-    return sidebar_children, prev_attr_elements
 
 
-@app.callback(
+app.clientside_callback(
+    """
+    function(n_clicks, prev_attr_elements) {
+        if (!n_clicks) {
+            return [dash_clientside.no_update, dash_clientside.no_update];
+        }
+        const row = %s;
+        const {%s: old_label, ...attr_elements} = prev_attr_elements;
+        row.props.children[%d].props.children = old_label;
+        return [new dash_clientside.Patch().assign([%d], row).build(), attr_elements];
+    }
+    """ % (
+        json.dumps(component_json(LABEL_ROW_TEXT)),
+        json.dumps(LABEL),
+        LABEL_TEXT_VALUE_IDX,
+        LABEL_ROW_SIDEBAR_IDX,
+    ),
     [
         Output("sidebar_div", "children"),
         Output("previous-attr-elements", "data")
     ],
     [
         Input("label_edit_cancel", "n_clicks"),
-        State("sidebar_div", "children"),
         State("previous-attr-elements", "data")
     ],
     prevent_initial_call=True
 )
-def cancel_label_edit(
-    n_clicks: Optional[int],
-    sidebar_children: list,
-    prev_attr_elements: dict
-) -> tuple[list, dict]:
-    if n_clicks is None \
-       or n_clicks < 1:
-        return sidebar_children, prev_attr_elements
-    old_label = prev_attr_elements[LABEL]
-
-    label_text_row = create_label_row(old_label, LABEL_ROW_TEXT)
-
-    sidebar_children[LABEL_ROW_SIDEBAR_IDX] = label_text_row
-    del prev_attr_elements[LABEL]
-    return sidebar_children, prev_attr_elements
 
 
 def confirm_label_button_click(
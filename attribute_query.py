@@ -0,0 +1,286 @@
+import ast
+import operator
+from functools import reduce
+from typing import Any, Callable, Optional
+from graph_model import Attribute_columns, NUMBER_COLUMN, BOOL_COLUMN, TEXT_COLUMN
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+COMPARISONS: dict[type, Callable] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+ARITHMETIC: dict[type, Callable] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+}
+
+
+class QueryError(ValueError):
+    """Raised when a bulk edit query or assignment can not be parsed or evaluated."""
+
+    pass
+
+
+class Operand:
+    """Values of an expression for the evaluated rows.
+
+    ``present`` is False where an attribute is missing, ``integer`` marks
+    numbers which are integers, so results read back as int.
+    """
+
+    def __init__(self, values: Any, present: Any = True, integer: Any = False) -> None:
+        self.values = values
+        self.present = present
+        self.integer = integer
+
+    def is_numeric(self) -> bool:
+        if isinstance(self.values, np.ndarray):
+            return self.values.dtype.kind in "biuf"
+        return isinstance(self.values, (bool, int, float))
+
+    def truth(self) -> "np.ndarray":
+        values = self.values
+        if isinstance(values, np.ndarray):
+            if values.dtype.kind == "b":
+                truth = values
+            elif values.dtype.kind in "iuf":
+                truth = values != 0
+            elif values.dtype.kind == "U":
+                truth = np.char.str_len(values) > 0
+            else:
+                truth = np.array([bool(value) for value in values], dtype=bool)
+        else:
+            truth = bool(values)
+        return np.logical_and(truth, self.present)
+
+
+def parse(text: str, mode: str) -> ast.AST:
+    try:
+        return ast.parse(text.strip(), mode=mode)
+    except SyntaxError as error:
+        raise QueryError(f"Invalid syntax: {error.msg}")
+    except (MemoryError, RecursionError):
+        raise QueryError("The text is nested too deeply")
+
+
+def parse_query(text: Optional[str]) -> Optional[ast.expr]:
+    """Parses the condition of a bulk edit, an empty one matches all elements."""
+    if text is None or text.strip() == "":
+        return None
+    return parse(text, "eval").body  # type: ignore
+
+
+def parse_assignments(text: Optional[str]) -> list[tuple[str, ast.expr]]:
+    """Parses ``name = expression`` statements separated by semicolons or new lines."""
+    if text is None or text.strip() == "":
+        raise QueryError("Nothing to set, write e.g. blindness = 0.1")
+    assignments = []
+    for statement in parse(text, "exec").body:  # type: ignore
+        if (
+            not isinstance(statement, ast.Assign)
+            or len(statement.targets) != 1
+            or not isinstance(statement.targets[0], ast.Name)
+        ):
+            raise QueryError("Assignments must look like name = expression")
+        assignments.append((statement.targets[0].id, statement.value))
+    return assignments
+
+
+def read_column(attributes: Attribute_columns, name: str, rows: "np.ndarray") -> Operand:
+    column = attributes.column(name)
+    if column is None:
+        return Operand(np.zeros(len(rows), dtype=bool), np.zeros(len(rows), dtype=bool))
+    present = column.present[rows]
+    if column.kind == NUMBER_COLUMN:
+        return Operand(column.values[rows], present, column.integer[rows])
+    if column.kind == BOOL_COLUMN:
+        return Operand(column.values[rows], present, True)
+    if column.kind == TEXT_COLUMN:
+        categories = np.array(column.categories if len(column.categories) > 0 else [""])
+        return Operand(categories[column.values[rows]], present)
+    return Operand(column.values[rows], present)
+
+
+def elementwise(function: Callable, left: Any, right: Any, size: int) -> "np.ndarray":
+    # mixed object values, rows whose values can not be compared do not match
+    left_values = left if isinstance(left, np.ndarray) else [left] * size
+    right_values = right if isinstance(right, np.ndarray) else [right] * size
+    result = np.zeros(size, dtype=bool)
+    for i, (left_value, right_value) in enumerate(zip(left_values, right_values)):
+        try:
+            result[i] = bool(function(left_value, right_value))
+        except TypeError:
+            pass
+    return result
+
+
+def compare(function: Callable, left: Operand, right: Operand, size: int) -> "np.ndarray":
+    try:
+        result = function(left.values, right.values)
+        if not isinstance(result, np.ndarray) or result.dtype != bool:
+            result = np.broadcast_to(np.asarray(result, dtype=bool), (size,))
+    except TypeError:
+        result = elementwise(function, left.values, right.values, size)
+    return result & np.broadcast_to(np.logical_and(left.present, right.present), (size,))
+
+
+def constant_list(node: ast.expr) -> list:
+    if not isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        raise QueryError("in needs a list of values, e.g. kind in ['a', 'b']")
+    values = []
+    for item in node.elts:
+        if not isinstance(item, ast.Constant):
+            raise QueryError("in needs a list of values, e.g. kind in ['a', 'b']")
+        values.append(item.value)
+    return values
+
+
+def contains(operand: Operand, values: list, size: int) -> "np.ndarray":
+    array = operand.values
+    if isinstance(array, np.ndarray):
+        # np.isin would cast mixed lists, e.g. the number 1 would match the text "1"
+        if array.dtype.kind == "U" and all(isinstance(value, str) for value in values):
+            return np.isin(array, values)
+        if array.dtype.kind in "iuf" and all(
+            isinstance(value, (int, float)) and not isinstance(value, bool) for value in values
+        ):
+            return np.isin(array, values)
+    return elementwise(lambda value, _: value in values, array, None, size)
+
+
+def evaluate(node: ast.expr, attributes: Attribute_columns, rows: "np.ndarray") -> Operand:
+    """Evaluates the expression for the given element rows with NumPy operations."""
+    size = len(rows)
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (bool, int, float, str)):
+            raise QueryError(f"Unsupported value {node.value!r}")
+        return Operand(node.value, True, isinstance(node.value, int))
+    if isinstance(node, ast.Name):
+        return read_column(attributes, node.id, rows)
+    if isinstance(node, ast.BoolOp):
+        truths = [evaluate(value, attributes, rows).truth() for value in node.values]
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        return Operand(np.broadcast_to(reduce(combine, truths), (size,)))
+    if isinstance(node, ast.UnaryOp):
+        operand = evaluate(node.operand, attributes, rows)
+        if isinstance(node.op, ast.Not):
+            return Operand(np.broadcast_to(np.logical_not(operand.truth()), (size,)))
+        if not operand.is_numeric():
+            raise QueryError("Signs can be used with numbers only")
+        if isinstance(node.op, ast.USub):
+            values = -np.asarray(operand.values, dtype=np.float64)
+            return Operand(values, operand.present, operand.integer)
+        return operand
+    if isinstance(node, ast.Compare):
+        left = evaluate(node.left, attributes, rows)
+        result = np.ones(size, dtype=bool)
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                matches = contains(left, constant_list(comparator), size)
+                if isinstance(op, ast.NotIn):
+                    matches = ~matches
+                result &= matches & np.broadcast_to(left.present, (size,))
+                continue
+            function = COMPARISONS.get(type(op))
+            if function is None:
+                raise QueryError(f"Unsupported comparison {type(op).__name__}")
+            right = evaluate(comparator, attributes, rows)
+            result &= compare(function, left, right, size)
+            left = right
+        return Operand(result)
+    if isinstance(node, ast.BinOp):
+        function = ARITHMETIC.get(type(node.op))
+        if function is None:
+            raise QueryError(f"Unsupported operator {type(node.op).__name__}")
+        left = evaluate(node.left, attributes, rows)
+        right = evaluate(node.right, attributes, rows)
+        if not left.is_numeric() or not right.is_numeric():
+            raise QueryError("Arithmetic can be done with numbers only")
+        with np.errstate(all="ignore"):
+            values = function(
+                np.asarray(left.values, dtype=np.float64), np.asarray(right.values, dtype=np.float64)
+            )
+        integer = (
+            False if isinstance(node.op, ast.Div) else np.logical_and(left.integer, right.integer)
+        )
+        return Operand(values, np.logical_and(left.present, right.present), integer)
+    raise QueryError(f"Unsupported expression {type(node).__name__}")
+
+
+def matching_elements(attributes: Attribute_columns, query: Optional[ast.expr]) -> list[int]:
+    rows = np.arange(len(attributes))
+    if query is None:
+        return rows.tolist()
+    truth = np.broadcast_to(evaluate(query, attributes, rows).truth(), (len(rows),))
+    return np.flatnonzero(truth).tolist()
+
+
+def is_not_finite(operand: Operand, present: "np.ndarray") -> bool:
+    values = np.asarray(operand.values)
+    if values.dtype.kind != "f":
+        return False
+    # NaN and infinity can not be saved in JSON, e.g. the results of a / 0 or a % 0
+    return bool(np.any(~np.isfinite(np.broadcast_to(values, present.shape))[present]))
+
+
+def to_python_values(operand: Operand, size: int) -> list:
+    values = np.broadcast_to(np.asarray(operand.values), (size,))
+    if values.dtype.kind == "f":
+        integer = np.broadcast_to(operand.integer, (size,)) & np.isfinite(values)
+        return [
+            int(value) if is_integer else value
+            for value, is_integer in zip(values.tolist(), integer.tolist())
+        ]
+    return values.tolist()
+
+
+def apply_assignments(
+    attributes: Attribute_columns, element_idxs: list[int], assignments: list[tuple[str, ast.expr]]
+) -> None:
+    """Sets the attributes of the elements, all values are evaluated before anything changes."""
+    rows = np.asarray(element_idxs, dtype=np.int64)
+    updates = []
+    for name, expression in assignments:
+        try:
+            # literals may be dicts and lists as in the attribute editor
+            constant = ast.literal_eval(expression)
+        except (ValueError, TypeError, SyntaxError):
+            pass
+        except (MemoryError, RecursionError):
+            raise QueryError(f"The value of {name} is too large")
+        else:
+            if isinstance(constant, float) and not np.isfinite(constant):
+                raise QueryError(f"The value of {name} is not a finite number")
+            updates.append((name, element_idxs, None, constant))
+            continue
+        try:
+            operand = evaluate(expression, attributes, rows)
+        except (MemoryError, RecursionError):
+            raise QueryError(f"The expression of {name} is too large")
+        present = np.broadcast_to(operand.present, (len(rows),))
+        if is_not_finite(operand, present):
+            raise QueryError(
+                f"The expression of {name} gives no finite number, e.g. divides by zero"
+            )
+        values = to_python_values(operand, len(rows))
+        updates.append((
+            name,
+            rows[present].tolist(),
+            [value for value, is_present in zip(values, present.tolist()) if is_present],
+            None,
+        ))
+    for name, idxs, values, constant in updates:
+        if values is None:
+            attributes.set_value(name, idxs, constant)
+        else:
+            attributes.set_values(name, idxs, values)
@@ -0,0 +1,76 @@
+import base64
+import io
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import networkx as nx  # type: ignore  # noqa: E402
+from graph_binary import export_binary, import_binary_elements  # noqa: E402
+from graph_import import import_json_elements  # noqa: E402
+from graph_utils import convert_networkx_to_cytoscape, write_json  # noqa: E402
+
+GRID_SIDE = 150
+REPEATS = 3
+SEED = 13
+
+
+def grid_elements() -> list:
+    # 150x150 grid, 67,200 elements, 5 attributes per node and 2 per edge
+    random.seed(SEED)
+    graph = nx.grid_2d_graph(GRID_SIDE, GRID_SIDE)
+    for node in graph.nodes:
+        graph.nodes[node].update({
+            "blindness": random.random(),
+            "weight": random.randint(1, 10),
+            "target": random.random() < 0.1,
+            "kind": random.choice(["road", "field", "forest"]),
+            "value": random.random() * 100,
+        })
+    for edge in graph.edges:
+        graph.edges[edge].update({"length": random.random() * 10, "cost": random.randint(1, 5)})
+    graph = nx.convert_node_labels_to_integers(graph)
+    elements, _ = convert_networkx_to_cytoscape(graph, "grid")
+    return elements
+
+
+def save_json(elements: list) -> bytes:
+    file = io.StringIO()
+    write_json(file, elements, False)
+    return file.getvalue().encode()
+
+
+def save_binary(elements: list) -> bytes:
+    return export_binary(elements, False)
+
+
+def timed(function: Callable, argument: Any) -> tuple[float, Any]:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = function(argument)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main() -> None:
+    elements = grid_elements()
+    print(f"{len(elements)} elements, median of {REPEATS} runs, loading includes base64")
+    print(f"{'format':>10} {'MB':>7} {'save s':>7} {'load s':>7}")
+    for name, save, load in [
+        ("graph.json", save_json, import_json_elements),
+        ("graph.npz", save_binary, import_binary_elements),
+    ]:
+        save_time, data = timed(save, elements)
+        content_string = base64.b64encode(data).decode()
+        load_time, (loaded, _) = timed(lambda text: load(text, "grid"), content_string)
+        assert len(loaded) == len(elements)
+        print(f"{name:>10} {len(data) / 2 ** 20:>7.2f} {save_time:>7.2f} {load_time:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wsgi  # noqa: E402,F401
+from app import app  # noqa: E402
+from attribute_editor import LABEL_ROW_EDIT, component_json  # noqa: E402
+from graph_document import document_store  # noqa: E402
+from graph_utils import create_cytoscape_node  # noqa: E402
+
+ATTRIBUTES = 10
+
+# an editing session which opens the generator dialog, toggles the orientation
+# twice and edits the label twice, cancelling once
+SESSION = [
+    ("open", "n_clicks"),
+    ("orientation-graph-switcher", "on"),
+    ("orientation-graph-switcher", "on"),
+    ("label_edit_pencil", "n_clicks"),
+    ("label_edit_cancel", "n_clicks"),
+    ("label_edit_pencil", "n_clicks"),
+    ("label_edit_confirm", "n_clicks"),
+]
+
+
+def callbacks_of(dependencies: list, trigger: tuple[str, str]) -> list:
+    return [
+        dependency for dependency in dependencies
+        if any(
+            (dependency_input["id"], dependency_input["property"]) == trigger
+            for dependency_input in dependency["inputs"]
+        )
+    ]
+
+
+def output_list(output: str) -> list[dict]:
+    # "..a.b...c.d.." of callbacks with several outputs
+    return [
+        dict(zip(("id", "property"), item.rsplit(".", 1)))
+        for item in output.strip(".").split("...")
+    ]
+
+
+def sidebar_size(client: object, dependencies: list) -> int:
+    # the sidebar the label buttons sent to the server and back before
+    attributes = {f"attribute_{i}": i * 0.5 for i in range(ATTRIBUTES)}
+    node = create_cytoscape_node(0, attributes, {0: (0.0, 0.0)})
+    session_id = document_store.create()
+    document = document_store.get(session_id)
+    document.set_elements([node])
+    document_store.save(session_id, document)
+    dependency = callbacks_of(dependencies, ("graph-cytoscape", "selectedNodeData"))[0]
+    body = {
+        "output": dependency["output"],
+        "outputs": output_list(dependency["output"]),
+        "inputs": [
+            {"id": "graph-cytoscape", "property": "selectedNodeData", "value": [node["data"]]},
+            {"id": "graph-cytoscape", "property": "selectedEdgeData", "value": []},
+        ],
+        "state": [{"id": "session-id", "property": "data", "value": session_id}],
+        "changedPropIds": ["graph-cytoscape.selectedNodeData"],
+    }
+    response = client.post("/_dash-update-component", json=body).json  # type: ignore
+    sidebar = response["response"]["sidebar_container"]["children"]
+    return len(json.dumps(sidebar["props"]["children"]))
+
+
+def main() -> None:
+    client = app.server.test_client()
+    dependencies = client.get("/_dash-dependencies").json
+    print(f"{'interaction':<38} {'server':>6} {'browser':>7}")
+    total = 0
+    for trigger in SESSION:
+        callbacks = callbacks_of(dependencies, trigger)
+        server = sum(1 for callback in callbacks if callback.get("clientside_function") is None)
+        total += server
+        print(f"{'.'.join(trigger):<38} {server:>6} {len(callbacks) - server:>7}")
+    print(f"server requests of the session: {total}")
+    print(f"sidebar with {ATTRIBUTES} attributes: {sidebar_size(client, dependencies)} B, "
+          f"row patched in the browser: {len(json.dumps(component_json(LABEL_ROW_EDIT)))} B")
+
+
+if __name__ == "__main__":
+    main()
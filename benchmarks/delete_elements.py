@@ -0,0 +1,59 @@
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from graph_model import Element_index  # noqa: E402
+from graph_utils import create_cytoscape_node, create_cytoscape_edge  # noqa: E402
+
+SIZES = [10000, 50000, 100000, 200000]
+DELETED_FRACTION = 0.1
+REPEATS = 7
+SEED = 13
+
+
+def ring_elements(n_elements: int) -> list:
+    # half nodes and half edges, each node has two incident edges
+    n_nodes = n_elements // 2
+    elements = [
+        create_cytoscape_node(i, {}, {i: (float(i), 0.0)}) for i in range(n_nodes)
+    ]
+    elements += [
+        create_cytoscape_edge(i, (i + 1) % n_nodes, {}) for i in range(n_nodes)
+    ]
+    return elements
+
+
+def measure(n_elements: int) -> list[float]:
+    elements = ring_elements(n_elements)
+    node_ids = [str(i) for i in range(n_elements // 2)]
+    random.seed(SEED)
+    deleted = set(random.sample(node_ids, int(len(node_ids) * DELETED_FRACTION)))
+    times = []
+    for _ in range(REPEATS):
+        copy = list(elements)
+        element_index = Element_index(copy)
+        start = time.perf_counter()
+        element_index.remove_elements(deleted, set())
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> None:
+    print("Deleting 10% of the nodes of a ring graph in one call, median of "
+          f"{REPEATS} runs")
+    print(f"{'elements':>9} {'median ms':>10} {'min ms':>8} {'ns/element':>11}")
+    for n_elements in SIZES:
+        times = measure(n_elements)
+        median = statistics.median(times)
+        print(
+            f"{n_elements:>9} {median * 1000:>10.1f} {min(times) * 1000:>8.1f}"
+            f" {median * 1e9 / n_elements:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
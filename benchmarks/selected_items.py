@@ -0,0 +1,72 @@
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from attribute_editor import (  # noqa: E402
+    Selected_items,
+    encode_element_idxs,
+    decode_element_idxs
+)
+from graph_model import Element_index  # noqa: E402
+from graph_utils import create_cytoscape_node, create_cytoscape_edge  # noqa: E402
+
+NODES = 100000
+SELECTION_SIZES = [1, 10, 100, 1000, 10000, 100000]
+REPEATS = 5
+SEED = 13
+
+
+def path_elements() -> list:
+    elements = [create_cytoscape_node(i, {}, {i: (float(i), 0.0)}) for i in range(NODES)]
+    elements += [create_cytoscape_edge(i, i + 1, {}) for i in range(NODES - 1)]
+    return elements
+
+
+def selection_data(elements: list, idxs: list) -> tuple[list, list]:
+    # the selectedNodeData and selectedEdgeData of Cytoscape
+    selected = [elements[idx]["data"] for idx in idxs]
+    nodes = [data for data in selected if "source" not in data]
+    edges = [data for data in selected if "source" in data]
+    return nodes, edges
+
+
+def median_ms(function: Callable) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main() -> None:
+    elements = path_elements()
+    element_index = Element_index(elements)
+    random.seed(SEED)
+    print(f"{NODES} nodes and {NODES - 1} edges, the first k nodes (box) or k random "
+          f"elements (scattered), median of {REPEATS} runs")
+    print(f"{'k':>7} {'resolve ms':>11} {'enc+dec ms':>11} {'JSON list B':>12} "
+          f"{'box B':>7} {'scattered B':>12}")
+    for k in SELECTION_SIZES:
+        box = list(range(k))
+        scattered = sorted(random.sample(range(len(elements)), k))
+        nodes, edges = selection_data(elements, scattered)
+        selected_items = Selected_items()
+        resolve = median_ms(lambda: selected_items.generate_selected_elements_idxs(
+            nodes, edges, elements, element_index
+        ))
+        round_trip = median_ms(lambda: decode_element_idxs(encode_element_idxs(scattered)))
+        print(
+            f"{k:>7} {resolve:>11.2f} {round_trip:>11.2f} {len(json.dumps(scattered)):>12}"
+            f" {len(encode_element_idxs(box)):>7} {len(encode_element_idxs(scattered)):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
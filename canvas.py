@@ -3,38 +3,29 @@ from type_aliases import (
     GraphElements,
     GraphElement,
 )
-from graph_utils import is_node, ADD_ATTRS, id_generator, is_removable_edge
+from graph_utils import ADD_ATTRS
+from graph_model import Element_index, EdgeKey, Id_generator, Node_positions
 from attribute_editor import Selected_items
+from undo_redo import create_add_delta, create_remove_delta
+
+# Transformations of the selected nodes, values are ids of their buttons
+ALIGN_HORIZONTALLY = "align-horizontally-button"
+ALIGN_VERTICALLY = "align-vertically-button"
+ROTATE = "rotate-selection-button"
+SCALE_UP = "scale-up-selection-button"
+SCALE_DOWN = "scale-down-selection-button"
+TRANSFORMATIONS = [ALIGN_HORIZONTALLY, ALIGN_VERTICALLY, ROTATE, SCALE_UP, SCALE_DOWN]
+ROTATION_STEP = 15.0
+SCALING_STEP = 1.25
 
 
 def can_add_new_edge(
     source: GraphElement,
     target: GraphElement,
-    elements: GraphElements,
+    element_index: Element_index,
     directed: bool,
 ) -> bool:
-    target_id = target["id"]
-    source_id = source["id"]
-    for element in elements:
-        if is_node(element):
-            continue
-        element_source_id = element["data"]["source"]
-        element_target_id = element["data"]["target"]
-        same_edge = (
-            element_source_id == source_id and element_target_id == target_id
-        )
-        if (
-            directed
-            and same_edge
-            or not directed
-            and (
-                same_edge
-                or element_source_id == target_id
-                and element_target_id == source_id
-            )
-        ):
-            return False
-    return True
+    return not element_index.has_edge(source["id"], target["id"], directed)
 
 
 def rebind_new_edge(
@@ -42,13 +33,14 @@ def rebind_new_edge(
     target: Optional[GraphElement],
     elements: GraphElements,
     directed: bool,
-) -> GraphElements:
+    element_index: Element_index,
+) -> list:
     if (
         source is None
         or target is None
-        or not can_add_new_edge(source, target, elements, directed)
+        or not can_add_new_edge(source, target, element_index, directed)
     ):
-        return elements
+        return []
     new_edge = {
         "data": {
             "source": source["id"],
@@ -56,100 +48,112 @@ def rebind_new_edge(
             ADD_ATTRS: dict(),
         }
     }
-    elements.append(new_edge)
-    return elements
+    element_index.append(new_edge)
+    return create_add_delta([[len(elements) - 1, new_edge]])
 
 
 def update_positions(
-    new_node_position: dict,
-    moved_node_data: dict,
+    new_node_position: Optional[dict],
+    moved_node_data: Optional[dict],
     elements: GraphElements,
-    selected_node_data: Optional[list],
     data: list,
+    element_index: Element_index,
+    positions: Node_positions,
 ) -> GraphElements:
+    if new_node_position is None or moved_node_data is None:
+        return elements
     selected_items = Selected_items()
     if data is not None and len(data) != 0:
         selected_items.set_data(data)
-    element_edited = False
-    x_diff, y_diff = 0, 0
-    for element in elements:
-        if is_node(element) and element["data"]["id"] == moved_node_data["id"]:
-            x_diff = new_node_position["x"] - element["position"]["x"]
-            y_diff = new_node_position["y"] - element["position"]["y"]
-            element["position"] = new_node_position
-            element_edited = True
-            break
-    if (
-        selected_node_data is None
-        or len(selected_node_data) == 0
-        or not element_edited
-        or not is_moved_node_selected(moved_node_data, selected_node_data)
-    ):
+    moved_node_idx = element_index.node_idx(moved_node_data["id"])
+    if moved_node_idx is None:
+        return elements
+    element = elements[moved_node_idx]
+    x_diff = new_node_position["x"] - element["position"]["x"]
+    y_diff = new_node_position["y"] - element["position"]["y"]
+    positions.set_position(moved_node_idx, new_node_position)
+    selected_idxs = selected_items.get_elements_idxs()
+    if moved_node_idx not in set(selected_idxs):
         return elements
-    for idx in selected_items.get_elements_idxs():
-        if (
-            is_node(elements[idx])
-            and elements[idx]["data"]["id"] == moved_node_data["id"]
-        ):
-            continue
-        if is_node(elements[idx]):
-            elements[idx]["position"]["x"] += x_diff
-            elements[idx]["position"]["y"] += y_diff
+    other_idxs = [idx for idx in selected_idxs if idx != moved_node_idx]
+    positions.translate(other_idxs, x_diff, y_diff)
     return elements
 
 
-def is_moved_node_selected(
-    moved_node_data: dict, selected_node_data: list
-) -> bool:
-    moved_node_id = moved_node_data["id"]
-    for selected_node in selected_node_data:
-        if selected_node["id"] == moved_node_id:
-            return True
-    return False
+def transform_selection(
+    transformation: str,
+    elements: GraphElements,
+    data: Optional[list],
+    positions: Node_positions,
+) -> GraphElements:
+    if data is None or len(data) == 0:
+        return elements
+    selected_items = Selected_items()
+    selected_items.set_data(data)
+    element_idxs = selected_items.get_elements_idxs()
+    if transformation == ALIGN_HORIZONTALLY:
+        positions.align(element_idxs, 0)
+    elif transformation == ALIGN_VERTICALLY:
+        positions.align(element_idxs, 1)
+    elif transformation == ROTATE:
+        positions.rotate(element_idxs, ROTATION_STEP)
+    elif transformation == SCALE_UP:
+        positions.scale(element_idxs, SCALING_STEP)
+    elif transformation == SCALE_DOWN:
+        positions.scale(element_idxs, 1 / SCALING_STEP)
+    return elements
 
 
-def add_node(pos: Optional[dict], elements: GraphElements) -> GraphElements:
+def add_node(
+    pos: Optional[dict],
+    elements: GraphElements,
+    element_index: Element_index,
+    id_generator: Id_generator,
+) -> list:
     if pos is None:
-        return elements
+        return []
     node_id = id_generator.generate_id()
     new_node = {
         "data": {"id": node_id, "label": node_id, ADD_ATTRS: dict()},
         "position": {"x": pos["x"], "y": pos["y"]},
     }
-    elements.append(new_node)
-    return elements
+    element_index.append(new_node)
+    return create_add_delta([[len(elements) - 1, new_node]])
+
+
+def delete_elements(
+    node_ids: set[str],
+    edge_keys: set[EdgeKey],
+    element_index: Element_index,
+) -> list:
+    return create_remove_delta(element_index.remove_elements(node_ids, edge_keys))
 
 
 def delete_node(
-    node: Optional[GraphElement], elements: GraphElements
-) -> GraphElements:
+    node: Optional[GraphElement],
+    element_index: Element_index,
+) -> list:
     if node is None:
-        return elements
-    node_id = node["data"]["id"]
-    edges = node["edgesData"]
-    for element in elements:
-        if (
-            is_node(element)
-            and element["data"]["id"] == node_id
-            or not is_node(element)
-            and is_removable_edge(element, edges)
-        ):
-            elements.remove(element)
-    return elements
+        return []
+    return delete_elements({node["data"]["id"]}, set(), element_index)
 
 
 def delete_edge(
-    edge: Optional[GraphElement], elements: GraphElements
-) -> GraphElements:
+    edge: Optional[GraphElement],
+    element_index: Element_index,
+) -> list:
     if edge is None:
-        return elements
+        return []
     source_id = edge["sourceData"]["id"]
     target_id = edge["targetData"]["id"]
-    for element in elements:
-        if (
-            not is_node(element)
-            and element["data"]["source"] == source_id
-            and element["data"]["target"] == target_id
-        ):
-            elements.remove(element)
-    return elements
+    return delete_elements(set(), {(source_id, target_id)}, element_index)
+
+
+def delete_selected(
+    selected_node_data: Optional[list],
+    selected_edge_data: Optional[list],
+    element_index: Element_index,
+) -> list:
+    node_ids = {node["id"] for node in selected_node_data or []}
+    edge_keys = {(edge["source"], edge["target"]) for edge in selected_edge_data or []}
+    return delete_elements(node_ids, edge_keys, element_index)
@@ -0,0 +1,365 @@
+import json
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Optional
+from type_aliases import GraphElements
+from graph_functions import FUNCTION_DICT, call_graph_function_with_params
+from graph_utils import convert_networkx_to_cytoscape
+from graph_binary import import_uploaded_elements
+from template_cache import find_template_elements, load_entry, template_cache
+
+# jobs running at the same time, each in a process of its own
+GENERATION_WORKERS = 2
+POLL_INTERVAL_MS = 500
+# how often the owner of running jobs looks for cancel requests of other processes
+CANCEL_CHECK_SECONDS = 0.5
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+# fractions reported by the worker between the stages of a generation
+STARTED_PROGRESS = 0.05
+GENERATED_PROGRESS = 0.6
+CONVERTED_PROGRESS = 0.9
+
+# imports report their progress in steps of at least this much
+IMPORT_PROGRESS_STEP = 0.01
+
+# kinds of the messages a job process sends through its pipe
+PROGRESS_MESSAGE = "progress"
+RESULT_MESSAGE = "result"
+ERROR_MESSAGE = "error"
+
+
+class JobCancelledError(Exception):
+    """Raised by the progress callback of an import which was cancelled."""
+
+    pass
+
+
+class Generation_job:
+    def __init__(self, cache_key: Optional[str]) -> None:
+        self.state = QUEUED
+        self.progress = 0.0
+        self.cache_key = cache_key
+        # process running the job, None while queued
+        self.process: Any = None
+        self.result: Optional[tuple[GraphElements, bool]] = None
+        self.error: Optional[str] = None
+
+
+_jobs: dict[str, Generation_job] = {}
+_jobs_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(GENERATION_WORKERS)
+# spawn, forking a threaded web server is not safe
+_context = multiprocessing.get_context("spawn")
+_cancel_watcher: Optional[threading.Thread] = None
+# with several server processes, the state of the jobs is published in this directory
+_job_dir: Optional[str] = None
+
+
+def set_job_dir(job_dir: Optional[str]) -> None:
+    global _job_dir
+    if job_dir is not None:
+        os.makedirs(job_dir, exist_ok=True)
+    _job_dir = job_dir
+
+
+def run_generation(
+    connection: Any, name: str, param_dict: dict[str, Any], layout_name: str
+) -> None:
+    """Runs in a process of its own, which is simply killed when the job is cancelled.
+
+    The pipe belongs to this job only, so killing the process in the middle
+    of a message breaks nothing but this job.
+    """
+    try:
+        connection.send((PROGRESS_MESSAGE, STARTED_PROGRESS))
+        graph = call_graph_function_with_params(FUNCTION_DICT[name], param_dict)
+        connection.send((PROGRESS_MESSAGE, GENERATED_PROGRESS))
+        elements, directed = convert_networkx_to_cytoscape(graph, layout_name)
+        connection.send((PROGRESS_MESSAGE, CONVERTED_PROGRESS))
+        entry = pickle.dumps((elements, directed), protocol=pickle.HIGHEST_PROTOCOL)
+        connection.send((RESULT_MESSAGE, entry))
+    except Exception as error:
+        connection.send((ERROR_MESSAGE, f"{type(error).__name__}: {error}"))
+    finally:
+        connection.close()
+
+
+def _job_path(job_id: str, extension: str) -> str:
+    # job ids come from the browser, never trust them as paths
+    return os.path.join(_job_dir, uuid.UUID(job_id).hex + extension)  # type: ignore
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=_job_dir)
+    with os.fdopen(file_descriptor, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _publish(job_id: str, job: Generation_job, entry: Optional[bytes] = None) -> None:
+    if _job_dir is None:
+        return
+    if job.state == DONE:
+        if entry is None:
+            entry = pickle.dumps(job.result, protocol=pickle.HIGHEST_PROTOCOL)
+        _write_atomic(_job_path(job_id, ".pickle"), entry)
+    state = {"state": job.state, "progress": job.progress, "error": job.error}
+    _write_atomic(_job_path(job_id, ".json"), json.dumps(state).encode())
+
+
+def _read_published(job_id: str) -> Optional[Generation_job]:
+    try:
+        with open(_job_path(job_id, ".json"), "rb") as file:
+            state = json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+    job = Generation_job(None)
+    job.state = state["state"]
+    job.progress = state["progress"]
+    job.error = state["error"]
+    if job.state in (QUEUED, RUNNING):
+        return job
+    if job.state == DONE:
+        with open(_job_path(job_id, ".pickle"), "rb") as file:
+            job.result = load_entry(file.read())
+    for extension in (".pickle", ".json", ".cancel"):
+        _remove(_job_path(job_id, extension))
+    return job
+
+
+def _cancel_locally(job_id: str, job: Generation_job) -> None:
+    job.state = CANCELLED
+    if _job_dir is not None:
+        _remove(_job_path(job_id, ".json"))
+    if job.process is not None:
+        # the process belongs to this job, it can not be running another one by now
+        job.process.kill()
+    # a queued job is dropped as soon as it gets a slot, a running one when its process
+    # ended, an import when it next reports progress
+
+
+def _watch_cancel_requests() -> None:
+    while True:
+        time.sleep(CANCEL_CHECK_SECONDS)
+        with _jobs_lock:
+            for job_id, job in list(_jobs.items()):
+                if job.state == CANCELLED:
+                    continue
+                cancel_path = _job_path(job_id, ".cancel")
+                if os.path.exists(cancel_path):
+                    _remove(cancel_path)
+                    _cancel_locally(job_id, job)
+
+
+def _start_process(job_id: str, job: Generation_job, args: tuple) -> Optional[Any]:
+    with _jobs_lock:
+        if job.state == CANCELLED:
+            return None
+        receiver, sender = _context.Pipe(duplex=False)
+        process = _context.Process(target=run_generation, args=(sender,) + args, daemon=True)
+        try:
+            process.start()
+        except Exception:
+            receiver.close()
+            sender.close()
+            raise
+        job.process = process
+    # only the job process writes, its end of the pipe is closed here so that
+    # reading fails with EOFError once the process is gone
+    sender.close()
+    return receiver
+
+
+def _run_job(job_id: str, job: Generation_job, args: tuple) -> None:
+    with _slots:
+        try:
+            receiver = _start_process(job_id, job, args)
+        except Exception as error:
+            _fail(job_id, job, f"{type(error).__name__}: {error}")
+            return
+        if receiver is None:
+            with _jobs_lock:
+                _jobs.pop(job_id, None)
+            return
+        try:
+            while True:
+                kind, value = receiver.recv()
+                if kind == PROGRESS_MESSAGE:
+                    _report(job_id, job, value)
+                elif kind == RESULT_MESSAGE:
+                    _store_result(job_id, job, value)
+                    break
+                else:
+                    _fail(job_id, job, value)
+                    break
+        except EOFError:
+            # killed by a cancel, or crashed
+            _fail(job_id, job, "The generating process exited unexpectedly")
+        finally:
+            receiver.close()
+            job.process.join()
+            with _jobs_lock:
+                if job.state == CANCELLED:
+                    _jobs.pop(job_id, None)
+
+
+def _report(job_id: str, job: Generation_job, progress: float) -> None:
+    with _jobs_lock:
+        if job.state == CANCELLED:
+            return
+        job.state = RUNNING
+        job.progress = max(job.progress, progress)
+        _publish(job_id, job)
+
+
+def _set_done(
+    job_id: str, job: Generation_job, result: tuple[GraphElements, bool], entry: Optional[bytes]
+) -> None:
+    # the caller holds _jobs_lock
+    job.result = result
+    job.state = DONE
+    job.progress = 1.0
+    _publish(job_id, job, entry)
+    if _job_dir is not None:
+        # the result may be picked up by any process now
+        _jobs.pop(job_id, None)
+
+
+def _store_result(job_id: str, job: Generation_job, entry: bytes) -> None:
+    # the result is handed out as a copy of its own, the cache keeps the pickled
+    # entry, so a session changing its elements never changes the cached ones
+    result = load_entry(entry)
+    with _jobs_lock:
+        if job.state == CANCELLED:
+            return
+        _set_done(job_id, job, result, entry)
+    if job.cache_key is not None:
+        template_cache.set_entry(job.cache_key, entry)
+
+
+def _fail(job_id: str, job: Generation_job, error: str) -> None:
+    with _jobs_lock:
+        if job.state == CANCELLED:
+            return
+        job.error = error
+        job.state = FAILED
+        _publish(job_id, job)
+        if _job_dir is not None:
+            _jobs.pop(job_id, None)
+
+
+def _ensure_cancel_watcher() -> None:
+    global _cancel_watcher
+    if _job_dir is not None and _cancel_watcher is None:
+        _cancel_watcher = threading.Thread(target=_watch_cancel_requests, daemon=True)
+        _cancel_watcher.start()
+
+
+def run_import(
+    job_id: str, job: Generation_job, contents: str, filename: str, layout_name: str
+) -> None:
+    # the upload is already in this process, the import runs in a thread and is
+    # cancelled through its progress callback
+    reported = STARTED_PROGRESS
+
+    def progress(fraction: float) -> None:
+        nonlocal reported
+        if job.state == CANCELLED:
+            raise JobCancelledError()
+        value = STARTED_PROGRESS + fraction * (CONVERTED_PROGRESS - STARTED_PROGRESS)
+        if value - reported >= IMPORT_PROGRESS_STEP:
+            reported = value
+            _report(job_id, job, value)
+
+    _report(job_id, job, STARTED_PROGRESS)
+    try:
+        result = import_uploaded_elements(contents, filename, layout_name, progress)
+    except JobCancelledError:
+        result = None
+    except Exception as error:
+        _fail(job_id, job, f"{type(error).__name__}: {error}")
+        return
+    with _jobs_lock:
+        if job.state == CANCELLED:
+            _jobs.pop(job_id, None)
+            return
+        _set_done(job_id, job, result, None)  # type: ignore
+
+
+def start_import_job(contents: str, filename: str, layout_name: str) -> str:
+    job_id = uuid.uuid4().hex
+    job = Generation_job(None)
+    with _jobs_lock:
+        _jobs[job_id] = job
+        _publish(job_id, job)
+    _ensure_cancel_watcher()
+    threading.Thread(
+        target=run_import, args=(job_id, job, contents, filename, layout_name), daemon=True
+    ).start()
+    return job_id
+
+
+def start_generation_job(name: str, param_dict: dict[str, Any], layout_name: str) -> str:
+    job_id = uuid.uuid4().hex
+    cache_key, cached = find_template_elements(name, FUNCTION_DICT[name], param_dict, layout_name)
+    job = Generation_job(cache_key)
+    with _jobs_lock:
+        _jobs[job_id] = job
+        if cached is not None:
+            # cache hits are fresh copies already
+            _set_done(job_id, job, cached, None)
+            return job_id
+        _publish(job_id, job)
+    _ensure_cancel_watcher()
+    threading.Thread(
+        target=_run_job, args=(job_id, job, (name, param_dict, layout_name)), daemon=True
+    ).start()
+    return job_id
+
+
+def poll_generation_job(job_id: Optional[str]) -> Optional[Generation_job]:
+    """Returns the job with its current state, finished jobs are handed out only once."""
+    if job_id is None:
+        return None
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None and job.state in (DONE, FAILED):
+            del _jobs[job_id]
+    if job is None and _job_dir is not None:
+        # the job was started by another server process or has already finished
+        job = _read_published(job_id)
+    if job is None or job.state == CANCELLED:
+        return None
+    return job
+
+
+def cancel_generation_job(job_id: Optional[str]) -> None:
+    if job_id is None:
+        return
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            if job.state in (QUEUED, RUNNING):
+                _cancel_locally(job_id, job)
+            return
+    if _job_dir is not None and os.path.exists(_job_path(job_id, ".json")):
+        # the owner of the job kills it on its next check
+        _write_atomic(_job_path(job_id, ".cancel"), b"")
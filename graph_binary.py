@@ -0,0 +1,174 @@
+import base64
+import io
+import json
+from typing import Any
+from type_aliases import GraphElements
+from graph_utils import convert_cytoscape_to_json
+from graph_import import (
+    Graph_builder,
+    create_elements,
+    import_json_elements,
+    GraphFileError,
+    Progress
+)
+from graph_layouts import AUTO_LAYOUT
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+# Columnar map format stored as a NumPy .npz archive (zip of arrays):
+#   manifest          JSON with the format version and the attribute columns
+#   node_ids          string table of node ids
+#   node_positions    (n, 2) float64 array
+#   edge_nodes        (m, 2) int32 array of rows into node_ids
+#   <kind>_column_<i> one array per attribute shared by every node/edge
+#   <kind>_extra      JSON of the remaining (text, dict, sparse) attributes
+#   <kind>_key_orders row into the manifest's key orders, keeps the attribute order
+BINARY_EXTENSION = ".npz"
+BINARY_FORMAT_VERSION = 1
+COMPRESS_BINARY = True
+NODE = "node"
+EDGE = "edge"
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+JSON_FORMAT = "json"
+BINARY_FORMAT = "binary"
+
+EXPORT_FORMAT_OPTIONS = [
+    {"label": "graph.json", "value": JSON_FORMAT},
+    {"label": "graph.npz (compact)", "value": BINARY_FORMAT},
+]
+
+
+def is_binary_file(filename: str) -> bool:
+    return filename is not None and filename.lower().endswith(BINARY_EXTENSION)
+
+
+def column_dtype(values: list) -> Any:
+    if all(type(value) is bool for value in values):
+        return np.bool_
+    if all(type(value) is int and INT64_MIN <= value <= INT64_MAX for value in values):
+        return np.int64
+    if all(type(value) is float for value in values):
+        return np.float64
+    return None
+
+
+def split_columns(kind: str, attributes: list[dict], arrays: dict) -> tuple[list, list]:
+    """Moves attributes shared by all items with numeric/bool values into typed arrays.
+
+    Returns the column descriptions and the distinct key orders of the items,
+    the moved keys are popped from ``attributes``.
+    """
+    columns: list[list] = []
+    key_orders: dict[tuple, int] = {}
+    arrays[f"{kind}_key_orders"] = np.array(
+        [key_orders.setdefault(tuple(item), len(key_orders)) for item in attributes],
+        dtype=np.int32,
+    )
+    shared = set(attributes[0]).intersection(*attributes[1:]) if len(attributes) != 0 else set()
+    for name in sorted(shared):
+        values = [item[name] for item in attributes]
+        dtype = column_dtype(values)
+        if dtype is None:
+            continue
+        arrays[f"{kind}_column_{len(columns)}"] = np.array(values, dtype=dtype)
+        columns.append([name, np.dtype(dtype).name])
+        for item in attributes:
+            del item[name]
+    arrays[f"{kind}_extra"] = np.array(json.dumps(attributes))
+    return columns, [list(key_order) for key_order in key_orders]
+
+
+def write_binary(elements: GraphElements, directed: bool, file: Any) -> None:
+    graph = convert_cytoscape_to_json(elements, directed)["graph"]
+    node_ids = [node[0] for node in graph["nodes"]]
+    node_attributes = [node[1] for node in graph["nodes"]]
+    positions = [node_attrs.pop("position") for node_attrs in node_attributes]
+    node_rows = {node_id: row for row, node_id in enumerate(node_ids)}
+    edge_attributes = [edge[1] for edge in graph["edges"]]
+
+    arrays: dict[str, np.ndarray] = {
+        "node_ids": np.array(node_ids, dtype=np.str_),
+        "node_positions": np.array(
+            [(position["x"], position["y"]) for position in positions], dtype=np.float64
+        ).reshape(-1, 2),
+        "edge_nodes": np.array(
+            [(node_rows[edge[0][0]], node_rows[edge[0][1]]) for edge in graph["edges"]],
+            dtype=np.int32,
+        ).reshape(-1, 2),
+    }
+    node_columns, node_key_orders = split_columns(NODE, node_attributes, arrays)
+    edge_columns, edge_key_orders = split_columns(EDGE, edge_attributes, arrays)
+    manifest = {
+        "version": BINARY_FORMAT_VERSION,
+        "directed": directed,
+        NODE: node_columns,
+        EDGE: edge_columns,
+        "key_orders": {NODE: node_key_orders, EDGE: edge_key_orders},
+    }
+    arrays["manifest"] = np.array(json.dumps(manifest))
+    if COMPRESS_BINARY:
+        np.savez_compressed(file, **arrays)
+    else:
+        np.savez(file, **arrays)
+
+
+def read_attributes(kind: str, manifest: dict, archive: Any) -> list[dict]:
+    attributes = json.loads(str(archive[f"{kind}_extra"]))
+    for i, (name, _) in enumerate(manifest[kind]):
+        for item, value in zip(attributes, archive[f"{kind}_column_{i}"].tolist()):
+            item[name] = value
+    key_orders = manifest["key_orders"][kind]
+    return [
+        {key: item[key] for key in key_orders[key_order]}
+        for item, key_order in zip(attributes, archive[f"{kind}_key_orders"].tolist())
+    ]
+
+
+def read_binary(file: Any) -> Graph_builder:
+    try:
+        archive = np.load(file, allow_pickle=False)
+        manifest = json.loads(str(archive["manifest"]))
+    except (ValueError, KeyError, OSError) as error:
+        raise GraphFileError(f"Not a binary graph file: {error}")
+    if manifest["version"] != BINARY_FORMAT_VERSION:
+        raise GraphFileError(f"Unsupported binary graph version {manifest['version']}")
+    node_ids = archive["node_ids"].tolist()
+    node_attributes = read_attributes(NODE, manifest, archive)
+    edge_attributes = read_attributes(EDGE, manifest, archive)
+
+    builder = Graph_builder()
+    positions = archive["node_positions"].tolist()
+    for node_id, node_attrs, (x, y) in zip(node_ids, node_attributes, positions):
+        node_attrs["position"] = {"x": x, "y": y}
+        builder.add_node(node_id, node_attrs)
+    for (source_row, target_row), edge_attrs in zip(
+        archive["edge_nodes"].tolist(), edge_attributes
+    ):
+        builder.add_edge(node_ids[source_row], node_ids[target_row], edge_attrs)
+    return builder
+
+
+def import_binary_elements(
+    content_string: str, layout_name: str = AUTO_LAYOUT
+) -> tuple[GraphElements, bool]:
+    builder = read_binary(io.BytesIO(base64.b64decode(content_string)))
+    # loaded the same way as graph.json, which is undirected as well
+    return create_elements(builder, layout_name)
+
+
+def import_uploaded_elements(
+    contents: str, filename: str, layout_name: str = AUTO_LAYOUT, progress: Progress = None
+) -> tuple[GraphElements, bool]:
+    # contents of dcc.Upload are a data URL, "data:<type>;base64,<data>"
+    _, content_string = contents.split(",")
+    if is_binary_file(filename):
+        return import_binary_elements(content_string, layout_name)
+    return import_json_elements(content_string, layout_name, progress)
+
+
+def export_binary(elements: GraphElements, directed: bool) -> bytes:
+    file = io.BytesIO()
+    write_binary(elements, directed, file)
+    return file.getvalue()
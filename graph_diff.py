@@ -0,0 +1,57 @@
+from type_aliases import GraphElements
+from graph_model import element_key
+from undo_redo import OPERATION, ADD, REMOVE, MOVE, SET_DATA, ITEMS
+
+
+def replace_all_delta(before: GraphElements, after: GraphElements) -> list:
+    delta = []
+    if len(before) != 0:
+        delta.append({OPERATION: REMOVE, ITEMS: [list(item) for item in enumerate(before)]})
+    if len(after) != 0:
+        delta.append({OPERATION: ADD, ITEMS: [list(item) for item in enumerate(after)]})
+    return delta
+
+
+def diff_elements(before: GraphElements, after: GraphElements) -> list:
+    """Delta in the undo-redo format which turns the before list into the after list.
+
+    Used when a whole graph replaces the elements, actions which add or
+    remove known elements build their deltas directly. Elements are
+    matched by node id and edge endpoints with one pass over each list.
+    Matched elements which are the very same object are taken as
+    unchanged, changes made in place are recorded by snapshots.
+    """
+    before_idxs = {element_key(element): idx for idx, element in enumerate(before)}
+    matched: set[int] = set()
+    added = []
+    moved = []
+    changed = []
+    last_before_idx = -1
+    for idx, element in enumerate(after):
+        before_idx = before_idxs.get(element_key(element))
+        if before_idx is None or before_idx in matched:
+            added.append([idx, element])
+            continue
+        if before_idx < last_before_idx:
+            # removals and insertions can not express a new order of the kept elements
+            return replace_all_delta(before, after)
+        last_before_idx = before_idx
+        matched.add(before_idx)
+        old_element = before[before_idx]
+        if old_element is element:
+            continue
+        old_position = old_element.get("position")
+        new_position = element.get("position")
+        if old_position is not None and new_position is not None and old_position != new_position:
+            moved.append([idx, dict(old_position), dict(new_position)])
+        if old_element["data"] != element["data"]:
+            changed.append([idx, old_element["data"], element["data"]])
+    delta = []
+    if len(matched) != len(before):
+        removed = [[idx, element] for idx, element in enumerate(before) if idx not in matched]
+        delta.append({OPERATION: REMOVE, ITEMS: removed})
+    for operation, items in ((ADD, added), (MOVE, moved), (SET_DATA, changed)):
+        if len(items) != 0:
+            delta.append({OPERATION: operation, ITEMS: items})
+    return delta
+
@@ -0,0 +1,321 @@
+import inspect
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional
+from dash import Patch, no_update  # type: ignore
+from type_aliases import GraphElements
+from graph_model import (
+    Attribute_columns,
+    Attribute_stats,
+    Element_index,
+    Id_generator,
+    Node_positions
+)
+from undo_redo import (
+    OPERATION,
+    ADD,
+    REMOVE,
+    MOVE,
+    SET_DATA,
+    ITEMS,
+    ITEM_IDX,
+    ITEM_OLD,
+    ITEM_NEW,
+    Undo_redo_history,
+    delta_items
+)
+
+try:
+    import fcntl
+except ImportError:
+    # no file locks on Windows, where the documents can be kept in memory only
+    fcntl = None  # type: ignore
+
+# documents of sessions which did nothing for this long are dropped
+DOCUMENT_IDLE_SECONDS = 6 * 60 * 60
+# how often a server process looks for expired document files
+CLEANUP_INTERVAL_SECONDS = 10 * 60
+
+
+class DocumentNotFoundError(ValueError):
+    """Raised when the document of a session has expired or was never created."""
+
+    pass
+
+
+class Graph_document:
+    """Server-side state of a graph edited in one browser session."""
+
+    def __init__(self) -> None:
+        # the history outlives set_elements, replacing the graph can be undone too
+        self.history = Undo_redo_history()
+        self.set_elements([])
+
+    def set_elements(self, elements: GraphElements) -> None:
+        self.elements = elements
+        self.index = Element_index(elements)
+        self.positions = Node_positions(elements, self.index)
+        self.attributes = Attribute_columns(elements, self.index)
+        self.id_generator = Id_generator(self.index)
+        # attributes of the elements selected in the browser, kept up to date by the sidebar
+        self.selection_stats = Attribute_stats()
+
+    def invalidate(self) -> None:
+        self.index.invalidate()
+
+    def __getstate__(self) -> dict:
+        # the selection statistics change with every selection, backends save them apart
+        state = self.__dict__.copy()
+        del state["selection_stats"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.selection_stats = Attribute_stats()
+
+
+class Session_locks:
+    """A lock per session, kept only while it is held or waited for."""
+
+    def __init__(self) -> None:
+        self._locks: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+
+class Memory_backend:
+    def __init__(self, idle_seconds: float = DOCUMENT_IDLE_SECONDS) -> None:
+        # least recently used first, with the time of the last use
+        self._documents: OrderedDict[str, tuple[Graph_document, float]] = OrderedDict()
+        self._idle_seconds = idle_seconds
+        # requests of a threaded server share the backend
+        self._lock = threading.Lock()
+        self._session_locks = Session_locks()
+
+    def lock(self, key: str) -> Any:
+        return self._session_locks.hold(key)
+
+    def _evict_idle(self, now: float) -> None:
+        while len(self._documents) > 0:
+            key, (_, used) = next(iter(self._documents.items()))
+            if now - used < self._idle_seconds:
+                break
+            del self._documents[key]
+
+    def get(self, key: str) -> Optional[Graph_document]:
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._documents.get(key)
+            if entry is None:
+                return None
+            self._documents[key] = (entry[0], now)
+            self._documents.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, document: Graph_document) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._documents[key] = (document, now)
+            self._documents.move_to_end(key)
+            self._evict_idle(now)
+
+    def set_selection(self, key: str, document: Graph_document) -> None:
+        # the document itself is kept, its selection is saved with it
+        self.set(key, document)
+
+
+class File_system_backend:
+    def __init__(
+        self, cache_dir: str = "graph_documents", idle_seconds: float = DOCUMENT_IDLE_SECONDS
+    ) -> None:
+        self._cache_dir = cache_dir
+        self._idle_seconds = idle_seconds
+        self._session_locks = Session_locks()
+        self._last_cleanup = 0.0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str, extension: str = ".pickle") -> str:
+        # session ids are generated by the server, still never trust them as paths
+        return os.path.join(self._cache_dir, uuid.UUID(key).hex + extension)
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        # threads of this process wait on the thread lock, other processes on the file lock
+        lock_path = self._path(key, ".lock")
+        with self._session_locks.hold(key), open(lock_path, "ab") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # keeps the lock file of a used session from the cleanup
+            os.utime(lock_path)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, key: str) -> Optional[Graph_document]:
+        path = self._path(key)
+        selection_path = self._path(key, ".selection")
+        try:
+            with open(path, "rb") as file:
+                document = pickle.load(file)
+            with open(selection_path, "rb") as file:
+                document.selection_stats = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        # the modification time tells the cleanup when the session was used last
+        os.utime(path)
+        os.utime(selection_path)
+        return document
+
+    def _write(self, path: str, value: Any) -> None:
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=self._cache_dir)
+        with os.fdopen(file_descriptor, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def set(self, key: str, document: Graph_document) -> None:
+        # the selection first, a document is only found together with its selection
+        self._write(self._path(key, ".selection"), document.selection_stats)
+        self._write(self._path(key), document)
+        self.remove_idle()
+
+    def set_selection(self, key: str, document: Graph_document) -> None:
+        """Saves only the selection statistics, not the elements and the history."""
+        self._write(self._path(key, ".selection"), document.selection_stats)
+
+    def remove_idle(self) -> None:
+        """Removes documents, lock files and leftover temporary files of idle sessions."""
+        now = time.time()
+        if now - self._last_cleanup < CLEANUP_INTERVAL_SECONDS:
+            return
+        self._last_cleanup = now
+        with os.scandir(self._cache_dir) as entries:
+            for entry in entries:
+                try:
+                    if now - entry.stat().st_mtime > self._idle_seconds:
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+class Document_store:
+    def __init__(self, backend: Any = None) -> None:
+        self._backend = Memory_backend() if backend is None else backend
+
+    def set_backend(self, backend: Any) -> None:
+        self._backend = backend
+
+    def lock(self, session_id: Optional[str]) -> Any:
+        if session_id is None:
+            return nullcontext()
+        return self._backend.lock(session_id)
+
+    def create(self) -> str:
+        """Starts a new session with an empty document and returns the session id."""
+        session_id = str(uuid.uuid4())
+        self._backend.set(session_id, Graph_document())
+        return session_id
+
+    def get(self, session_id: Optional[str]) -> Graph_document:
+        document = None
+        if session_id is not None:
+            document = self._backend.get(session_id)
+        if document is None:
+            # a new empty document would not match the graph shown in the browser
+            raise DocumentNotFoundError(f"No document for session {session_id}")
+        return document
+
+    def get_or_create(self, session_id: Optional[str]) -> Graph_document:
+        """For actions which replace the whole graph and so do not depend on the old one."""
+        try:
+            return self.get(session_id)
+        except DocumentNotFoundError:
+            if session_id is None:
+                raise
+            return Graph_document()
+
+    def save(self, session_id: Optional[str], document: Graph_document) -> None:
+        if session_id is None:
+            return
+        self._backend.set(session_id, document)
+
+    def save_selection(self, session_id: Optional[str], document: Graph_document) -> None:
+        """For callbacks which changed only the selection statistics of the document."""
+        if session_id is None:
+            return
+        self._backend.set_selection(session_id, document)
+
+
+document_store = Document_store()
+
+
+def session_locked(callback: Callable) -> Callable:
+    """Holds the lock of the session_id argument during the callback.
+
+    The document is loaded, changed and saved as a whole, so two callbacks
+    of one session running at the same time would lose the changes of one
+    of them.
+    """
+    position = list(inspect.signature(callback).parameters).index("session_id")
+
+    @wraps(callback)
+    def locked(*args: Any) -> Any:
+        with document_store.lock(args[position]):
+            return callback(*args)
+
+    return locked
+
+
+def create_elements_output(delta: list, elements: GraphElements) -> Any:
+    """A Patch for a small change, the whole list when most of the elements changed."""
+    if delta_items(delta) * 2 > len(elements):
+        return elements
+    return create_elements_patch(delta)
+
+
+def create_elements_patch(delta: list, inverse: bool = False) -> Any:
+    """Translates an undo-redo delta into a Dash Patch of the Cytoscape elements."""
+    if len(delta) == 0:
+        return no_update
+    patch = Patch()
+    operations = reversed(delta) if inverse else delta
+    for operation in operations:
+        op = operation[OPERATION]
+        items = operation[ITEMS]
+        if op == ADD and not inverse or op == REMOVE and inverse:
+            for item in items:
+                patch.insert(item[ITEM_IDX], item[ITEM_OLD])
+        elif op == REMOVE or op == ADD:
+            for item in reversed(items):
+                del patch[item[ITEM_IDX]]
+        elif op == MOVE:
+            position = ITEM_OLD if inverse else ITEM_NEW
+            for item in items:
+                patch[item[ITEM_IDX]]["position"] = item[position]
+        elif op == SET_DATA:
+            data = ITEM_OLD if inverse else ITEM_NEW
+            for item in items:
+                patch[item[ITEM_IDX]]["data"] = item[data]
+    return patch
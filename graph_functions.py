@@ -7,7 +7,8 @@ import ast
 import dash_bootstrap_components as dbc  # type: ignore
 import dash_daq as daq  # type: ignore
 from dash_extensions.enrich import html  # type: ignore
-from typing import Any, Optional, Type
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional, Type
 from type_aliases import (
     Graph,
     GraphFunction,
@@ -29,23 +30,93 @@ FOLDER_NAME = "graph_templates"
 # join the current directory with the folder name
 DIRECTORY = os.path.join(CURRENT_DIR, FOLDER_NAME)
 sys.path.append(DIRECTORY)
-FUNCTION_DICT = {}
 
-for filename in os.listdir(DIRECTORY):
-    if os.path.isfile(os.path.join(DIRECTORY, filename)) and filename.endswith(".py"):
-        module_name = filename[:-3]  # remove the .py extension
-        module = importlib.import_module(module_name)
-        function = getattr(module, module_name)
-        FUNCTION_DICT[module_name] = function
 
-
-def dropdown_functions(function_dict: dict[str, GraphFunction]) -> list[dict[str, str]]:
+class Template_info:
+    """Metadata of a graph template read from its source without importing it."""
+
+    def __init__(self, doc: Optional[str], typed: bool) -> None:
+        self.doc = doc
+        self.typed = typed
+
+
+def read_template_info(path: str, module_name: str) -> Optional[Template_info]:
+    with open(path, "rb") as file:
+        tree = ast.parse(file.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == module_name:
+            args = node.args
+            arguments = args.posonlyargs + args.args + args.kwonlyargs
+            arguments += [arg for arg in (args.vararg, args.kwarg) if arg is not None]
+            typed = node.returns is not None and all(
+                arg.annotation is not None for arg in arguments
+            )
+            return Template_info(ast.get_docstring(node), typed)
+    return None
+
+
+class Lazy_function_dict(Mapping):
+    """Template functions by module name, a module is imported on first access.
+
+    The names come from the file names in the directory and the dropdown
+    metadata from the AST of the sources, both are re-read only when the
+    modification times change.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self._directory = directory
+        self._directory_mtime = -1
+        self._paths: dict[str, str] = {}
+        self._infos: dict[str, tuple[int, Optional[Template_info]]] = {}
+        self._functions: dict[str, GraphFunction] = {}
+
+    def _scan(self) -> dict[str, str]:
+        mtime = os.stat(self._directory).st_mtime_ns
+        if mtime != self._directory_mtime:
+            self._paths = {}
+            for filename in sorted(os.listdir(self._directory)):
+                path = os.path.join(self._directory, filename)
+                if os.path.isfile(path) and filename.endswith(".py"):
+                    self._paths[filename[:-3]] = path  # remove the .py extension
+            self._directory_mtime = mtime
+        return self._paths
+
+    def __getitem__(self, module_name: str) -> GraphFunction:
+        function = self._functions.get(module_name)
+        if function is None:
+            if module_name not in self._scan():
+                raise KeyError(module_name)
+            module = importlib.import_module(module_name)
+            function = getattr(module, module_name)
+            self._functions[module_name] = function
+        return function
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._scan())
+
+    def __len__(self) -> int:
+        return len(self._scan())
+
+    def info(self, module_name: str) -> Optional[Template_info]:
+        path = self._scan()[module_name]
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._infos.get(module_name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, read_template_info(path, module_name))
+            self._infos[module_name] = cached
+        return cached[1]
+
+
+FUNCTION_DICT = Lazy_function_dict(DIRECTORY)
+
+
+def dropdown_functions(function_dict: Lazy_function_dict) -> list[dict[str, str]]:
     dropdown_options = []
-    for key, item in function_dict.items():
-        doc = inspect.getdoc(item)
-        if doc is None or not is_function_typed(item):
+    for key in function_dict:
+        info = function_dict.info(key)
+        if info is None or info.doc is None or not info.typed:
             continue
-        match = re.search(r"(.+?)\n", doc)
+        match = re.search(r"(.+?)\n", info.doc)
         if not match:
             raise DocError(f"Invalid name of function {key} for UI")
         name = match.group(1)
@@ -83,6 +154,13 @@ def handle_yaml_graph(networkx_data: dict) -> GraphOrNone:
 def call_graph_function_with_params(
     func_reference: GraphFunction, param_dict: dict[str, Any]
 ) -> Graph:
+    kwargs = create_function_kwargs(func_reference, param_dict)
+    return func_reference(**kwargs)  # call the function with the extracted arguments
+
+
+def create_function_kwargs(
+    func_reference: GraphFunction, param_dict: dict[str, Any]
+) -> dict[str, Any]:
     params = inspect.signature(func_reference).parameters  # get function parameters
     kwargs = {}
     for name, param in params.items():
@@ -95,7 +173,7 @@ def call_graph_function_with_params(
         else:
             # parameter is required but not present in dictionary
             raise ValueError(f"Missing required parameter '{name}'")
-    return func_reference(**kwargs)  # call the function with the extracted arguments
+    return kwargs
 
 
 def handle_input_dict(input_dict: dict) -> tuple[str, InputValue]:
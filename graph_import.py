@@ -0,0 +1,202 @@
+import base64
+import codecs
+import json
+import re
+from typing import Any, Callable, Iterator, Optional
+from type_aliases import GraphElements
+from graph_utils import (
+    create_cytoscape_node,
+    create_cytoscape_edge
+)
+from graph_layouts import compute_layout, AUTO_LAYOUT
+from lazy_imports import lazy_import
+
+nx = lazy_import("networkx")
+
+# 4 * 2 ** 16 base64 characters decode into 192 KiB of the file
+BASE64_CHUNK_SIZE = 4 * 2 ** 16
+COMPACT_THRESHOLD = 2 ** 20
+GRAPH_KEY = "graph"
+NODES_KEY = "nodes"
+EDGES_KEY = "edges"
+WHITESPACE = re.compile(r"\s*")
+
+Progress = Optional[Callable[[float], None]]
+
+
+class GraphFileError(ValueError):
+    """Raised when the uploaded file does not have the expected structure."""
+
+    pass
+
+
+def iter_base64_text(content_string: str, progress: Progress = None) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    total = max(len(content_string), 1)
+    for start in range(0, len(content_string), BASE64_CHUNK_SIZE):
+        text = decoder.decode(base64.b64decode(content_string[start:start + BASE64_CHUNK_SIZE]))
+        # reported before the chunk is parsed, the reader may not ask for more after the last one
+        if progress is not None:
+            progress(min(start + BASE64_CHUNK_SIZE, total) / total)
+        yield text
+    yield decoder.decode(b"", final=True)
+
+
+class Json_reader:
+    """Pull reader which decodes one JSON value at a time from a stream of text chunks."""
+
+    def __init__(self, chunks: Iterator[str]) -> None:
+        self._chunks = chunks
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+
+    def _refill(self) -> bool:
+        if self._exhausted:
+            return False
+        if self._pos > COMPACT_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()  # type: ignore
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._refill():
+                raise GraphFileError("Unexpected end of the file")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise GraphFileError(f"Expected '{char}' at position {self._pos}")
+        self._pos += 1
+
+    def consume_if(self, char: str) -> bool:
+        if self.peek() == char:
+            self._pos += 1
+            return True
+        return False
+
+    def read_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._refill():
+                    continue
+                raise
+            # a number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._refill():
+                continue
+            self._pos = end
+            return value
+
+    def iter_array(self) -> Iterator[Any]:
+        self.expect("[")
+        if self.consume_if("]"):
+            return
+        while True:
+            yield self.read_value()
+            if self.consume_if("]"):
+                return
+            self.expect(",")
+
+
+class Graph_builder:
+    """Collects nodes and edges the same way networkx.Graph does (order and merging)."""
+
+    def __init__(self) -> None:
+        self.nodes: dict[Any, dict] = {}
+        self.adjacency: dict[Any, dict[Any, dict]] = {}
+
+    def add_node(self, node: Any, attributes: dict) -> None:
+        if node not in self.nodes:
+            self.nodes[node] = {}
+            self.adjacency[node] = {}
+        self.nodes[node].update(attributes)
+
+    def add_edge(self, source: Any, target: Any, attributes: dict) -> None:
+        self.add_node(source, {})
+        self.add_node(target, {})
+        edge_attributes = self.adjacency[source].get(target)
+        if edge_attributes is None:
+            edge_attributes = {}
+            self.adjacency[source][target] = edge_attributes
+            self.adjacency[target][source] = edge_attributes
+        edge_attributes.update(attributes)
+
+    def iter_edges(self) -> Iterator[tuple[Any, Any, dict]]:
+        seen = set()
+        for node, neighbours in self.adjacency.items():
+            for neighbour, attributes in neighbours.items():
+                if neighbour not in seen:
+                    yield node, neighbour, attributes
+            seen.add(node)
+
+
+def read_graph_object(reader: Json_reader, builder: Graph_builder) -> None:
+    reader.expect("{")
+    if reader.consume_if("}"):
+        return
+    while True:
+        key = reader.read_value()
+        reader.expect(":")
+        if key == GRAPH_KEY:
+            read_graph_object(reader, builder)
+        elif key == NODES_KEY:
+            for node in reader.iter_array():
+                builder.add_node(node[0], node[1])
+        elif key == EDGES_KEY:
+            for edge in reader.iter_array():
+                builder.add_edge(edge[0][0], edge[0][1], edge[1])
+        else:
+            reader.read_value()
+        if reader.consume_if("}"):
+            return
+        reader.expect(",")
+
+
+def read_graph(reader: Json_reader) -> Graph_builder:
+    builder = Graph_builder()
+    # files are either the graph object itself or a list with it as the first item
+    reader.consume_if("[")
+    read_graph_object(reader, builder)
+    return builder
+
+
+def layout_missing_positions(builder: Graph_builder, layout_name: str) -> dict:
+    if all("position" in attributes for attributes in builder.nodes.values()):
+        return {}
+    graph = nx.Graph()
+    graph.add_nodes_from(builder.nodes)
+    graph.add_edges_from((source, target) for source, target, _ in builder.iter_edges())
+    return compute_layout(graph, layout_name)
+
+
+def import_json_elements(
+    content_string: str,
+    layout_name: str = AUTO_LAYOUT,
+    progress: Progress = None,
+) -> tuple[GraphElements, bool]:
+    reader = Json_reader(iter_base64_text(content_string, progress))
+    return create_elements(read_graph(reader), layout_name)
+
+
+def create_elements(builder: Graph_builder, layout_name: str) -> tuple[GraphElements, bool]:
+    positions = layout_missing_positions(builder, layout_name)
+    elements = []
+    for node, attributes in builder.nodes.items():
+        elements.append(create_cytoscape_node(node, attributes, positions))
+    for source, target, attributes in builder.iter_edges():
+        elements.append(create_cytoscape_edge(source, target, attributes))
+    # uploaded graphs are undirected, as they were with networkx
+    return elements, False
+
@@ -0,0 +1,142 @@
+import hashlib
+import importlib.util
+import logging
+import math
+from collections import OrderedDict, deque
+from typing import Any, Callable
+from type_aliases import Graph
+from lazy_imports import lazy_import
+
+nx = lazy_import("networkx")
+
+Positions = dict[Any, tuple[float, float]]
+
+AUTO_LAYOUT = "auto"
+SCALING_FACTOR = 500
+GRID_SPACING = 100
+LAYER_SPACING = 150
+LAYOUT_SEED = 13
+# above this number of nodes the force-directed layout is cut short
+LARGE_GRAPH_NODES = 1000
+LARGE_GRAPH_ITERATIONS = 15
+# above this number of nodes the automatic layout falls back to the grid, the
+# force-directed one takes about 9 s for 3000 nodes
+HUGE_GRAPH_NODES = 2000
+LAYOUT_CACHE_SIZE = 32
+# edge attribute used by the force-directed layout
+LAYOUT_WEIGHT = "weight"
+# networkx needs scipy for graphs of SPARSE_SOLVER_NODES nodes and more
+SPARSE_SOLVER_NODES = 500
+SPARSE_SOLVER_AVAILABLE = importlib.util.find_spec("scipy") is not None
+
+logger = logging.getLogger(__name__)
+_layout_cache: OrderedDict[tuple[str, str], Positions] = OrderedDict()
+
+
+def grid_layout(graph: Graph) -> Positions:
+    columns = max(1, math.ceil(math.sqrt(graph.number_of_nodes())))
+    return {
+        node: (float(i % columns * GRID_SPACING), float(i // columns * GRID_SPACING))
+        for i, node in enumerate(graph.nodes())
+    }
+
+
+def circular_layout(graph: Graph) -> Positions:
+    positions = nx.circular_layout(graph, scale=SCALING_FACTOR)
+    return {node: (float(x), float(y)) for node, (x, y) in positions.items()}
+
+
+def hierarchical_layout(graph: Graph) -> Positions:
+    # BFS layers from the best connected node of every component, suits tree-like
+    # maps such as airports (center - halls - gates) or office buildings
+    undirected = graph.to_undirected(as_view=True)
+    positions: Positions = {}
+    x_offset = 0.0
+    for component in nx.connected_components(undirected):
+        root = max(component, key=undirected.degree)
+        layers: list[list] = []
+        visited = {root}
+        queue = deque([(root, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if depth == len(layers):
+                layers.append([])
+            layers[depth].append(node)
+            for neighbour in undirected.neighbors(node):
+                if neighbour not in visited:
+                    visited.add(neighbour)
+                    queue.append((neighbour, depth + 1))
+        width = max(len(layer) for layer in layers)
+        for depth, layer in enumerate(layers):
+            shift = (width - len(layer)) * GRID_SPACING / 2
+            for i, node in enumerate(layer):
+                positions[node] = (x_offset + shift + i * GRID_SPACING, float(depth * LAYER_SPACING))
+        x_offset += (width + 1) * GRID_SPACING
+    return positions
+
+
+def force_layout(graph: Graph) -> Positions:
+    # networkx switches to the sparse Fruchterman-Reingold solver for bigger graphs,
+    # large ones get fewer iterations on top of that
+    if graph.number_of_nodes() >= SPARSE_SOLVER_NODES and not SPARSE_SOLVER_AVAILABLE:
+        logger.warning("scipy is not installed, using grid layout instead of force-directed one")
+        return grid_layout(graph)
+    iterations = 50 if graph.number_of_nodes() <= LARGE_GRAPH_NODES else LARGE_GRAPH_ITERATIONS
+    positions = nx.spring_layout(
+        graph, iterations=iterations, seed=LAYOUT_SEED, scale=SCALING_FACTOR, weight=LAYOUT_WEIGHT
+    )
+    return {node: (float(x), float(y)) for node, (x, y) in positions.items()}
+
+
+def auto_layout(graph: Graph) -> Positions:
+    if graph.number_of_nodes() > 0 and nx.is_forest(graph.to_undirected(as_view=True)):
+        return hierarchical_layout(graph)
+    if graph.number_of_nodes() > HUGE_GRAPH_NODES:
+        return grid_layout(graph)
+    return force_layout(graph)
+
+
+LAYOUT_DICT: dict[str, Callable[[Graph], Positions]] = {
+    AUTO_LAYOUT: auto_layout,
+    "force": force_layout,
+    "hierarchical": hierarchical_layout,
+    "circular": circular_layout,
+    "grid": grid_layout,
+}
+
+LAYOUT_OPTIONS = [
+    {"label": "Automatic layout", "value": AUTO_LAYOUT},
+    {"label": "Force-directed layout", "value": "force"},
+    {"label": "Hierarchical layout", "value": "hierarchical"},
+    {"label": "Circular layout", "value": "circular"},
+    {"label": "Grid layout", "value": "grid"},
+]
+
+
+def graph_hash(graph: Graph) -> str:
+    digest = hashlib.sha1()
+    digest.update(repr(graph.is_directed()).encode())
+    digest.update(repr(list(graph.nodes())).encode())
+    # spring_layout pulls nodes of heavier edges closer together
+    digest.update(repr(list(graph.edges(data=LAYOUT_WEIGHT))).encode())
+    return digest.hexdigest()
+
+
+def has_positions(graph: Graph) -> bool:
+    return all("position" in attrs for _, attrs in graph.nodes(data=True))
+
+
+def compute_layout(graph: Graph, layout_name: str = AUTO_LAYOUT) -> Positions:
+    if has_positions(graph):
+        return {}
+    key = (graph_hash(graph), layout_name)
+    positions = _layout_cache.get(key)
+    if positions is not None:
+        _layout_cache.move_to_end(key)
+        return positions
+    layout_function = LAYOUT_DICT.get(layout_name, auto_layout)
+    positions = layout_function(graph)
+    _layout_cache[key] = positions
+    if len(_layout_cache) > LAYOUT_CACHE_SIZE:
+        _layout_cache.popitem(last=False)
+    return positions
@@ -0,0 +1,548 @@
+import json
+import math
+from collections import Counter, defaultdict
+from typing import Any, Iterator, Optional
+from type_aliases import (
+    GraphElements,
+    GraphElement
+)
+from graph_utils import ADD_ATTRS, is_node
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+EdgeKey = tuple[str, str]
+
+
+def edge_key(element: GraphElement) -> EdgeKey:
+    return element["data"]["source"], element["data"]["target"]
+
+
+class Element_index:
+    """Hash indexes over a list of Cytoscape elements.
+
+    The list itself stays the single source of truth and keeps its order, the
+    indexes are updated on appends and rebuilt lazily after anything else
+    (removals, undo/redo replays) touched the list.
+    """
+
+    def __init__(self, elements: GraphElements) -> None:
+        self._elements = elements
+        self._node_idxs: dict[str, int] = {}
+        self._edge_idxs: dict[EdgeKey, int] = {}
+        self._incident_edges: defaultdict[str, set[EdgeKey]] = defaultdict(set)
+        self._dirty = True
+        # bumped on every change of the list which the indexes did not see coming
+        self.version = 0
+
+    def invalidate(self) -> None:
+        self._dirty = True
+        self.version += 1
+
+    def _ensure(self) -> None:
+        if not self._dirty:
+            return
+        self._node_idxs = {}
+        self._edge_idxs = {}
+        self._incident_edges = defaultdict(set)
+        self._dirty = False
+        for idx, element in enumerate(self._elements):
+            self._index_element(element, idx)
+
+    def _index_element(self, element: GraphElement, idx: int) -> None:
+        if is_node(element):
+            self._node_idxs[element["data"]["id"]] = idx
+            return
+        key = edge_key(element)
+        self._edge_idxs[key] = idx
+        self._incident_edges[key[0]].add(key)
+        self._incident_edges[key[1]].add(key)
+
+    def node_ids(self) -> Iterator[str]:
+        self._ensure()
+        return iter(self._node_idxs)
+
+    def node_idx(self, node_id: str) -> Optional[int]:
+        self._ensure()
+        return self._node_idxs.get(node_id)
+
+    def edge_idx(self, source_id: str, target_id: str) -> Optional[int]:
+        self._ensure()
+        return self._edge_idxs.get((source_id, target_id))
+
+    def has_edge(self, source_id: str, target_id: str, directed: bool) -> bool:
+        self._ensure()
+        if (source_id, target_id) in self._edge_idxs:
+            return True
+        return not directed and (target_id, source_id) in self._edge_idxs
+
+    def incident_edge_idxs(self, node_id: str) -> list[int]:
+        self._ensure()
+        return [self._edge_idxs[key] for key in self._incident_edges.get(node_id, ())]
+
+    def append(self, element: GraphElement) -> None:
+        self._elements.append(element)
+        self.version += 1
+        if not self._dirty:
+            self._index_element(element, len(self._elements) - 1)
+
+    def remove_elements(self, node_ids: set[str], edge_keys: set[EdgeKey]) -> list[list]:
+        """Removes the given nodes with all their incident edges and the given edges.
+
+        Returns the removed elements as [former index, element] items.
+        """
+        if len(node_ids) == 0 and len(edge_keys) == 0:
+            return []
+        remaining = []
+        removed = []
+        for idx, element in enumerate(self._elements):
+            data = element["data"]
+            if is_node(element):
+                if data["id"] in node_ids:
+                    removed.append([idx, element])
+                    continue
+            elif (
+                data["source"] in node_ids
+                or data["target"] in node_ids
+                or (data["source"], data["target"]) in edge_keys
+            ):
+                removed.append([idx, element])
+                continue
+            remaining.append(element)
+        if len(removed) == 0:
+            return removed
+        self._elements[:] = remaining
+        self.invalidate()
+        return removed
+
+
+def element_key(element: GraphElement) -> Any:
+    """Node id or edge key, stable while other elements are added or removed."""
+    if is_node(element):
+        return element["data"]["id"]
+    return edge_key(element)
+
+
+def attribute_value_key(value: Any) -> Any:
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    if isinstance(value, (list, set)):
+        return str(value)
+    return value
+
+
+class Attribute_stats:
+    """Statistics of the additional attributes of the selected elements.
+
+    For every attribute name it counts the elements which have it and how
+    many of them have each distinct value. Elements are added, removed and
+    refreshed one at a time, so neither a change of the selection nor an
+    edit of some elements rescans the whole selection.
+    """
+
+    def __init__(self) -> None:
+        # element key -> attribute name -> value key
+        self._element_values: dict[Any, dict[str, Any]] = {}
+        self._element_counts: Counter[str] = Counter()
+        # attribute name -> value key -> [number of elements, value]
+        self._values: defaultdict[str, dict[Any, list]] = defaultdict(dict)
+
+    def __len__(self) -> int:
+        return len(self._element_values)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._element_values
+
+    def keys(self) -> set:
+        return set(self._element_values)
+
+    def _count(self, name: str, value_key: Any, value: Any, increment: int) -> None:
+        values = self._values[name]
+        entry = values.get(value_key)
+        if entry is None:
+            values[value_key] = [increment, value]
+            return
+        entry[0] += increment
+        if entry[0] == 0:
+            del values[value_key]
+            if len(values) == 0:
+                del self._values[name]
+
+    def add(self, key: Any, attributes: dict) -> None:
+        value_keys = {}
+        for name, value in attributes.items():
+            value_key = attribute_value_key(value)
+            value_keys[name] = value_key
+            self._element_counts[name] += 1
+            self._count(name, value_key, value, 1)
+        self._element_values[key] = value_keys
+
+    def discard(self, key: Any) -> None:
+        value_keys = self._element_values.pop(key, None)
+        if value_keys is None:
+            return
+        for name, value_key in value_keys.items():
+            self._element_counts[name] -= 1
+            if self._element_counts[name] == 0:
+                del self._element_counts[name]
+            self._count(name, value_key, None, -1)
+
+    def update(self, key: Any, attributes: dict) -> set[str]:
+        """Takes in the current attributes of a selected element, returns the changed names."""
+        old_value_keys = self._element_values.get(key)
+        if old_value_keys is None:
+            return set()
+        new_value_keys = {name: attribute_value_key(value) for name, value in attributes.items()}
+        changed = {
+            name for name in old_value_keys.keys() | new_value_keys.keys()
+            if name not in old_value_keys or name not in new_value_keys
+            or old_value_keys[name] != new_value_keys[name]
+        }
+        if len(changed) > 0:
+            self.discard(key)
+            self.add(key, attributes)
+        return changed
+
+    def common_attrs(self) -> list[str]:
+        return [
+            name for name, count in self._element_counts.items()
+            if count == len(self._element_values)
+        ]
+
+    def value_count(self, name: str) -> int:
+        return len(self._values.get(name, ()))
+
+    def first_value(self, name: str) -> Any:
+        return next(iter(self._values[name].values()))[1]
+
+
+def numeric_id(node_id: Any) -> Optional[int]:
+    try:
+        return int(node_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class Id_generator:
+    """Hands out ids of new nodes of one document.
+
+    Counts on from the largest numeric id of the graph, so string ids of
+    imported graphs never meet generated ones. Ids brought back in the
+    meantime, e.g. by undoing a new graph, are skipped.
+    """
+
+    def __init__(self, element_index: Element_index) -> None:
+        self._element_index = element_index
+        numeric_ids = (numeric_id(node_id) for node_id in element_index.node_ids())
+        self._id = max((value for value in numeric_ids if value is not None), default=0) + 1
+
+    def generate_id(self) -> str:
+        node_id = str(self._id)
+        while self._element_index.node_idx(node_id) is not None:
+            self._id += 1
+            node_id = str(self._id)
+        self._id += 1
+        return node_id
+
+
+class Node_positions:
+    """Node coordinates of the element list kept in one (n, 2) NumPy array.
+
+    Row ``r`` holds the position of element ``element_idxs[r]``. Group
+    transformations of a selection are done on the array and only the
+    moved rows are written back into the Cytoscape element dicts.
+    """
+
+    def __init__(self, elements: GraphElements, element_index: Element_index) -> None:
+        self._elements = elements
+        self._element_index = element_index
+        self._version = -1
+        self._coords = np.empty((0, 2))
+        self._element_idxs = np.empty(0, dtype=np.int64)
+        self._rows = np.empty(0, dtype=np.int64)
+
+    def _ensure(self) -> None:
+        if self._version == self._element_index.version:
+            return
+        element_idxs = [idx for idx, element in enumerate(self._elements) if is_node(element)]
+        self._element_idxs = np.array(element_idxs, dtype=np.int64)
+        self._coords = np.array(
+            [
+                (self._elements[idx]["position"]["x"], self._elements[idx]["position"]["y"])
+                for idx in element_idxs
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        self._rows = np.full(len(self._elements), -1, dtype=np.int64)
+        self._rows[self._element_idxs] = np.arange(len(element_idxs))
+        self._version = self._element_index.version
+
+    def rows(self, element_idxs: list[int]) -> "np.ndarray":
+        self._ensure()
+        idxs = np.asarray(element_idxs, dtype=np.int64)
+        idxs = idxs[(idxs >= 0) & (idxs < len(self._rows))]
+        rows = self._rows[idxs]
+        return np.unique(rows[rows >= 0])
+
+    def set_position(self, element_idx: int, position: dict) -> None:
+        self._ensure()
+        self._elements[element_idx]["position"] = position
+        row = self._rows[element_idx]
+        if row >= 0:
+            self._coords[row] = (position["x"], position["y"])
+
+    def _write_back(self, rows: "np.ndarray") -> list[int]:
+        moved_idxs = self._element_idxs[rows].tolist()
+        for element_idx, (x, y) in zip(moved_idxs, self._coords[rows].tolist()):
+            self._elements[element_idx]["position"] = {"x": x, "y": y}
+        return moved_idxs
+
+    def translate(self, element_idxs: list[int], x_diff: float, y_diff: float) -> list[int]:
+        rows = self.rows(element_idxs)
+        self._coords[rows] += (x_diff, y_diff)
+        return self._write_back(rows)
+
+    def rotate(self, element_idxs: list[int], degrees: float) -> list[int]:
+        rows = self.rows(element_idxs)
+        if len(rows) == 0:
+            return []
+        angle = math.radians(degrees)
+        rotation = np.array([
+            [math.cos(angle), -math.sin(angle)],
+            [math.sin(angle), math.cos(angle)],
+        ])
+        center = self._coords[rows].mean(axis=0)
+        self._coords[rows] = (self._coords[rows] - center) @ rotation.T + center
+        return self._write_back(rows)
+
+    def scale(self, element_idxs: list[int], factor: float) -> list[int]:
+        rows = self.rows(element_idxs)
+        if len(rows) == 0:
+            return []
+        center = self._coords[rows].mean(axis=0)
+        self._coords[rows] = (self._coords[rows] - center) * factor + center
+        return self._write_back(rows)
+
+    def align(self, element_idxs: list[int], axis: int) -> list[int]:
+        """Aligns the nodes on a line, axis 0 keeps x and shares y, axis 1 vice versa."""
+        rows = self.rows(element_idxs)
+        if len(rows) == 0:
+            return []
+        shared_axis = 1 - axis
+        self._coords[rows, shared_axis] = self._coords[rows, shared_axis].mean()
+        return self._write_back(rows)
+
+
+NUMBER_COLUMN = "number"
+BOOL_COLUMN = "bool"
+TEXT_COLUMN = "text"
+OBJECT_COLUMN = "object"
+# bigger integers would lose precision in a float64 column
+MAX_EXACT_INTEGER = 2 ** 53
+
+
+def column_kind(value: Any) -> str:
+    if isinstance(value, bool):
+        return BOOL_COLUMN
+    if isinstance(value, float) or isinstance(value, int) and abs(value) <= MAX_EXACT_INTEGER:
+        return NUMBER_COLUMN
+    if isinstance(value, str):
+        return TEXT_COLUMN
+    return OBJECT_COLUMN
+
+
+def object_array(values: list) -> "np.ndarray":
+    # assigned one by one, NumPy would turn nested lists into dimensions
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+class Attribute_column:
+    """One attribute of all elements, ``present`` marks the elements which have it.
+
+    Numbers are float64 with a mask of the ones which were integers, strings
+    are int32 codes into ``categories``.
+    """
+
+    def __init__(self, kind: str, size: int) -> None:
+        self.kind = kind
+        self.present = np.zeros(size, dtype=bool)
+        self.integer = np.zeros(size if kind == NUMBER_COLUMN else 0, dtype=bool)
+        self.categories: list[str] = []
+        self._codes: dict[str, int] = {}
+        if kind == NUMBER_COLUMN:
+            self.values = np.zeros(size, dtype=np.float64)
+        elif kind == BOOL_COLUMN:
+            self.values = np.zeros(size, dtype=bool)
+        elif kind == TEXT_COLUMN:
+            self.values = np.zeros(size, dtype=np.int32)
+        else:
+            self.values = np.empty(size, dtype=object)
+
+    def _code(self, text: str) -> int:
+        code = self._codes.get(text)
+        if code is None:
+            code = len(self.categories)
+            self._codes[text] = code
+            self.categories.append(text)
+        return code
+
+    def fill(self, rows: "np.ndarray", values: list) -> None:
+        self.present[rows] = True
+        if self.kind == NUMBER_COLUMN:
+            self.values[rows] = np.array(values, dtype=np.float64)
+            self.integer[rows] = [isinstance(value, int) for value in values]
+        elif self.kind == TEXT_COLUMN:
+            self.values[rows] = [self._code(value) for value in values]
+        elif self.kind == BOOL_COLUMN:
+            self.values[rows] = values
+        else:
+            self.values[rows] = object_array(values)
+
+    def assign(self, rows: "np.ndarray", value: Any) -> None:
+        self.present[rows] = True
+        if self.kind == NUMBER_COLUMN:
+            self.values[rows] = value
+            self.integer[rows] = isinstance(value, int)
+        elif self.kind == TEXT_COLUMN:
+            self.values[rows] = self._code(value)
+        elif self.kind == BOOL_COLUMN:
+            self.values[rows] = value
+        else:
+            self.values[rows] = object_array([value] * len(rows))
+
+    def values_at(self, rows: "np.ndarray") -> list:
+        if self.kind == NUMBER_COLUMN:
+            return [
+                int(value) if integer else value
+                for value, integer in zip(self.values[rows].tolist(), self.integer[rows].tolist())
+            ]
+        if self.kind == TEXT_COLUMN:
+            return [self.categories[code] for code in self.values[rows].tolist()]
+        return self.values[rows].tolist()
+
+    def take(self, other: "Attribute_column", rows: "np.ndarray") -> None:
+        """Copies the values of the other column at the given rows."""
+        if other.kind == self.kind == TEXT_COLUMN:
+            recode = np.array([self._code(text) for text in other.categories], dtype=np.int32)
+            self.present[rows] = True
+            self.values[rows] = recode[other.values[rows]] if len(recode) > 0 else 0
+        elif other.kind == self.kind:
+            self.present[rows] = True
+            self.values[rows] = other.values[rows]
+            if self.kind == NUMBER_COLUMN:
+                self.integer[rows] = other.integer[rows]
+        else:
+            self.fill(rows, other.values_at(rows))
+
+    def to_object(self) -> "Attribute_column":
+        column = Attribute_column(OBJECT_COLUMN, len(self.present))
+        rows = np.flatnonzero(self.present)
+        column.fill(rows, self.values_at(rows))
+        return column
+
+
+class Attribute_columns:
+    """Additional attributes of all elements stored per attribute in typed columns.
+
+    Row ``r`` of every column belongs to element ``r``. The element dicts
+    stay the source of truth for Cytoscape, bulk changes are done on the
+    columns and written into the dicts of the affected elements. The
+    columns are rebuilt lazily after anything else changed the element list.
+    """
+
+    def __init__(self, elements: GraphElements, element_index: Element_index) -> None:
+        self._elements = elements
+        self._element_index = element_index
+        self._version = -1
+        self._columns: dict[str, Attribute_column] = {}
+
+    def _ensure(self) -> None:
+        if self._version == self._element_index.version:
+            return
+        collected: dict[str, tuple[list, list]] = {}
+        for idx, element in enumerate(self._elements):
+            for name, value in element["data"][ADD_ATTRS].items():
+                rows, values = collected.setdefault(name, ([], []))
+                rows.append(idx)
+                values.append(value)
+        self._columns = {}
+        for name, (rows, values) in collected.items():
+            kinds = {column_kind(value) for value in values}
+            kind = kinds.pop() if len(kinds) == 1 else OBJECT_COLUMN
+            column = Attribute_column(kind, len(self._elements))
+            column.fill(np.array(rows, dtype=np.int64), values)
+            self._columns[name] = column
+        self._version = self._element_index.version
+
+    def _writable_column(self, name: str, kind: str) -> Attribute_column:
+        column = self._columns.get(name)
+        if column is None:
+            column = Attribute_column(kind, len(self._elements))
+        elif column.kind != kind and column.kind != OBJECT_COLUMN:
+            column = column.to_object()
+        self._columns[name] = column
+        return column
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def _rows(self, element_idxs: list[int]) -> "np.ndarray":
+        return np.asarray(element_idxs, dtype=np.int64)
+
+    def names(self) -> list[str]:
+        self._ensure()
+        return list(self._columns)
+
+    def column(self, name: str) -> Optional[Attribute_column]:
+        self._ensure()
+        return self._columns.get(name)
+
+    def set_value(self, name: str, element_idxs: list[int], value: Any) -> None:
+        self._ensure()
+        rows = self._rows(element_idxs)
+        self._writable_column(name, column_kind(value)).assign(rows, value)
+        for idx in rows.tolist():
+            self._elements[idx]["data"][ADD_ATTRS][name] = value
+
+    def set_values(self, name: str, element_idxs: list[int], values: list) -> None:
+        """Sets one value per element, e.g. results of a bulk edit expression."""
+        self._ensure()
+        if len(element_idxs) == 0:
+            return
+        kinds = {column_kind(value) for value in values}
+        kind = kinds.pop() if len(kinds) == 1 else OBJECT_COLUMN
+        rows = self._rows(element_idxs)
+        self._writable_column(name, kind).fill(rows, values)
+        for idx, value in zip(rows.tolist(), values):
+            self._elements[idx]["data"][ADD_ATTRS][name] = value
+
+    def delete(self, name: str, element_idxs: list[int]) -> None:
+        self._ensure()
+        column = self._columns.get(name)
+        if column is None:
+            return
+        rows = self._rows(element_idxs)
+        column.present[rows] = False
+        if not column.present.any():
+            del self._columns[name]
+        for idx in rows.tolist():
+            self._elements[idx]["data"][ADD_ATTRS].pop(name, None)
+
+    def rename(self, old_name: str, new_name: str, element_idxs: list[int]) -> None:
+        self._ensure()
+        old_column = self._columns.get(old_name)
+        if old_column is None or old_name == new_name:
+            return
+        rows = self._rows(element_idxs)
+        rows = rows[old_column.present[rows]]
+        new_column = self._writable_column(new_name, old_column.kind)
+        new_column.take(old_column, rows)
+        old_column.present[rows] = False
+        if not old_column.present.any():
+            del self._columns[old_name]
+        for idx in rows.tolist():
+            attributes = self._elements[idx]["data"][ADD_ATTRS]
+            attributes[new_name] = attributes.pop(old_name)
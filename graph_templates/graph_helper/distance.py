@@ -1,7 +1,20 @@
-from geopy.distance import distance as geopy_distance  # type: ignore
+from geopy.distance import distance as geopy_distance, Distance  # type: ignore
 
 import math
-from typing import Optional
+import numpy as np
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterator, Optional
+
+# upper bound of the number of point pairs held at once
+PAIRWISE_CHUNK_SIZE = 2 ** 22
+WGS84_MAJOR_AXIS_KM = 6378.137
+WGS84_FLATTENING = 1 / 298.257223563
+# number of whole coordinate lists and of single exact pairs remembered
+GPS_CACHE_SIZE = 16
+GPS_PAIR_CACHE_SIZE = 2 ** 16
+
+_gps_distance_cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
 
 
 def distance(
@@ -30,13 +43,134 @@ def distance(
 
     # GPS, units by ‹distance_unit›
 
+    # geopy is slow, the same pairs are computed only once
+    d = Distance(kilometers=exact_gps_km(tuple(from_vert), tuple(to_vert), taxicab))
+
+    # convert to units given by ‹distance_unit›
+    return getattr(d, distance_unit)
+
+
+def iter_point_pairs(points: np.ndarray, chunk_size: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Yields blocks of (source, target) points in the order of ‹itertools.combinations›."""
+    num_points = len(points)
+    block_rows = max(1, chunk_size // max(num_points, 1))
+    columns = np.arange(num_points)
+    for start in range(0, max(num_points - 1, 0), block_rows):
+        stop = min(start + block_rows, num_points - 1)
+        # only the columns right of the diagonal are needed
+        upper = columns[None, start + 1:] > np.arange(start, stop)[:, None]
+        rows, targets = np.nonzero(upper)
+        yield points[rows + start], points[targets + start + 1]
+
+
+def geodesic_km(from_points: np.ndarray, to_points: np.ndarray) -> np.ndarray:
+    """Lambert's formula on the WGS-84 ellipsoid, within meters of geopy for typical maps."""
+    from_lat, from_lon = np.radians(from_points).T
+    to_lat, to_lon = np.radians(to_points).T
+    # reduced latitudes
+    from_beta = np.arctan((1 - WGS84_FLATTENING) * np.tan(from_lat))
+    to_beta = np.arctan((1 - WGS84_FLATTENING) * np.tan(to_lat))
+    # central angle by the haversine formula
+    haversine = (
+        np.sin((to_beta - from_beta) / 2) ** 2
+        + np.cos(from_beta) * np.cos(to_beta) * np.sin((to_lon - from_lon) / 2) ** 2
+    )
+    sigma = 2 * np.arcsin(np.sqrt(np.clip(haversine, 0.0, 1.0)))
+    p = (from_beta + to_beta) / 2
+    q = (to_beta - from_beta) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (sigma - np.sin(sigma)) * np.sin(p) ** 2 * np.cos(q) ** 2 / np.cos(sigma / 2) ** 2
+        y = (sigma + np.sin(sigma)) * np.cos(p) ** 2 * np.sin(q) ** 2 / np.sin(sigma / 2) ** 2
+        km = WGS84_MAJOR_AXIS_KM * (sigma - WGS84_FLATTENING / 2 * (x + y))
+    return np.where(sigma > 0, km, 0.0)
+
+
+@lru_cache(maxsize=GPS_PAIR_CACHE_SIZE)
+def exact_gps_km(from_vert: tuple, to_vert: tuple, taxicab: bool) -> float:
     if taxicab:
-        d = geopy_distance(from_vert, (to_vert[0], from_vert[1])) + geopy_distance(
-            from_vert, (from_vert[0], to_vert[1])
+        return (
+            geopy_distance(from_vert, (to_vert[0], from_vert[1])).km
+            + geopy_distance(from_vert, (from_vert[0], to_vert[1])).km
+        )
+    return geopy_distance(from_vert, to_vert).km
+
+
+def gps_pair_km(
+    from_points: np.ndarray, to_points: np.ndarray, taxicab: bool, exact: bool
+) -> np.ndarray:
+    if exact:
+        return np.array([
+            exact_gps_km(tuple(from_vert), tuple(to_vert), taxicab)
+            for from_vert, to_vert in zip(from_points.tolist(), to_points.tolist())
+        ])
+    if taxicab:
+        # the same legs as ‹distance›: along the meridian and along the parallel
+        return (
+            geodesic_km(from_points, np.column_stack((to_points[:, 0], from_points[:, 1])))
+            + geodesic_km(from_points, np.column_stack((from_points[:, 0], to_points[:, 1])))
+        )
+    return geodesic_km(from_points, to_points)
+
+
+def iter_pairwise_distances(
+    coords: list,
+    taxicab: bool = True,
+    chunk_size: int = PAIRWISE_CHUNK_SIZE,
+    distance_unit: Optional[str] = None,
+    exact: bool = False,
+) -> Iterator[np.ndarray]:
+    """Computes distances of all pairs of points in blocks of rows.
+
+    The concatenated blocks follow the order of ‹itertools.combinations(coords, 2)›.
+
+    Attributes:
+        coords         sequence of coordinate pairs
+        taxicab        usage of taxicab or Euclidean metric
+        chunk_size     maximal number of point pairs compared in one block
+        distance_unit  if not None, coordinates are GPS and distances are in this unit
+        exact          GPS distances by geopy (cached per pair) instead of the NumPy approximation
+    """
+    points = np.asarray(coords)
+    unit_factor = None if distance_unit is None else getattr(Distance(kilometers=1), distance_unit)
+    for from_points, to_points in iter_point_pairs(points, chunk_size):
+        if unit_factor is not None:
+            yield gps_pair_km(from_points, to_points, taxicab, exact) * unit_factor
+        elif taxicab:
+            yield np.abs(from_points - to_points).sum(axis=1)
+        else:
+            yield np.sqrt(((from_points - to_points) ** 2).sum(axis=1))
+
+
+def pairwise_distances(
+    coords: list,
+    taxicab: bool = True,
+    chunk_size: int = PAIRWISE_CHUNK_SIZE,
+    distance_unit: Optional[str] = None,
+    exact: bool = False,
+) -> np.ndarray:
+    """Vectorized ‹distance› of all pairs in the order of ‹itertools.combinations(coords, 2)›.
+
+    GPS results are cached, generating a map from the same coordinates again is free.
+    """
+    if distance_unit is None:
+        return concatenate_blocks(iter_pairwise_distances(coords, taxicab, chunk_size))
+    key = (tuple(map(tuple, coords)), taxicab, distance_unit, exact)
+    distances = _gps_distance_cache.get(key)
+    if distances is None:
+        distances = concatenate_blocks(
+            iter_pairwise_distances(coords, taxicab, chunk_size, distance_unit, exact)
         )
+        distances.flags.writeable = False
+        _gps_distance_cache[key] = distances
+        if len(_gps_distance_cache) > GPS_CACHE_SIZE:
+            _gps_distance_cache.popitem(last=False)
     else:
-        # Euclidean distance
-        d = geopy_distance(from_vert, to_vert)
+        _gps_distance_cache.move_to_end(key)
+    return distances
 
-    # convert to units given by ‹distance_unit›
-    return getattr(d, distance_unit)
+
+def concatenate_blocks(blocks: Iterator[np.ndarray]) -> np.ndarray:
+    blocks_list = list(blocks)
+    if len(blocks_list) == 0:
+        return np.empty(0)
+    return np.concatenate(blocks_list)
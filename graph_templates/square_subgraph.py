@@ -1,5 +1,5 @@
 import networkx # type: ignore
-from graph_helper.distance import distance # type: ignore
+from graph_helper.distance import pairwise_distances # type: ignore
 
 from itertools import product, combinations
 from typing import Optional
@@ -61,9 +61,7 @@ def square_subgraph(
     chosen_nodes.sort()
 
     # compute distances/edges
-    edges_dist = [
-        distance(*edge, taxicab=taxicab) for edge in combinations(chosen_nodes, 2)
-    ]
+    edges_dist = pairwise_distances(chosen_nodes, taxicab=taxicab).tolist()
 
     # edge-length statistics
     max_edge = max(edges_dist)
@@ -1,5 +1,5 @@
 import networkx # type: ignore
-from graph_helper.distance import distance # type: ignore
+from graph_helper.distance import pairwise_distances # type: ignore
 
 from itertools import product, combinations
 from typing import Optional
@@ -64,9 +64,7 @@ def square_subgraph_periodic_maintenance(
 
     chosen_nodes.insert(0, depo)
     # compute distances/edges
-    edges_dist = [
-        distance(*edge, taxicab=True) for edge in combinations(chosen_nodes, 2)
-    ]
+    edges_dist = pairwise_distances(chosen_nodes, taxicab=True).tolist()
 
     # self-loop for depo
     edges = [(depo, depo, dict(len=10))]
@@ -1,106 +1,107 @@
-import networkx as nx  # type: ignore
+from itertools import chain
+from typing import Any, Iterator
 from type_aliases import (
     Graph,
     GraphElements,
     GraphElement
 )
+from graph_layouts import compute_layout, AUTO_LAYOUT
+from lazy_imports import lazy_import
 import json
 
+nx = lazy_import("networkx")
+np = lazy_import("numpy")
 
-class Id_generator:
-    def __init__(self) -> None:
-        self._id = 1
 
-    def reset(self) -> None:
-        self._id = 1
-
-    def increment_id(self) -> None:
-        self._id += 1
-
-    def generate_id(self) -> str:
-        self.increment_id()
-        return str(self._id - 1)
-
-
-id_generator = Id_generator()
 ADD_ATTRS = "additional_attributes"
+JSON_ITEM_SEPARATOR = "\n            "
+# larger maps are drawn with straight edges and without labels when zoomed out
+LEVEL_OF_DETAIL_ELEMENTS = 10000
+MIN_ZOOMED_FONT_SIZE = 8
 
 
 def is_node(element: GraphElement) -> bool:
     return "source" not in element["data"] and "target" not in element["data"]
 
 
-def is_removable_edge(edge: GraphElement, removable_edges: GraphElements) -> bool:
-    for removable_edge in removable_edges:
-        if removable_edge == edge:
-            return True
-    return False
-
-
-def convert_networkx_to_cytoscape(graph: Graph) -> tuple[GraphElements, bool]:
-    x_idx = 0
-    y_idx = 1
-    scaling_factor = 500
+def convert_networkx_to_cytoscape(
+    graph: Graph, layout_name: str = AUTO_LAYOUT
+) -> tuple[GraphElements, bool]:
     cyto_nodes = []
-    positions = nx.spring_layout(graph)
-    if isinstance(graph, nx.DiGraph):
-        directed = True
-    else:
-        directed = False
-    id_generator.reset()
+    positions = compute_layout(graph, layout_name)
+    directed = graph.is_directed()
     for node in graph.nodes():
         # Get the node attributes from the NetworkX graph
         node_attrs = graph.nodes[node]
-        if node_attrs.get("position", True):
-            position_x = positions[node][x_idx] * scaling_factor
-            position_y = positions[node][y_idx] * scaling_factor
-        else:
-            position_x = node_attrs["position"]["x"]
-            position_y = node_attrs["position"]["y"]
-            node_attrs.pop("position")
-        if node_attrs.get("label", True):
-            label = str(node)
-        else:
-            label = node_attrs["label"]
-            node_attrs.pop("label")
-        id_generator.increment_id()
-
-        # Create a dictionary representing the Cytoscape node with the modified attributes
-        cyto_node = {
-            "data": {"id": str(node), "label": label, ADD_ATTRS: node_attrs},
-            "position": {
-                "x": position_x,
-                "y": position_y,
-            },
-        }
 
         # Add the Cytoscape node to the list of nodes
-        cyto_nodes.append(cyto_node)
+        cyto_nodes.append(create_cytoscape_node(node, node_attrs, positions))
     cyto_edges = []
     for edge in graph.edges():
         # Get the edge attributes from the NetworkX graph
         edge_attrs = graph.edges[edge]
 
-        # Create a dictionary representing the Cytoscape edge with the modified attributes
-        cyto_edge = {
-            "data": {
-                "source": str(edge[0]),
-                "target": str(edge[1]),
-                ADD_ATTRS: edge_attrs,
-            }
-        }
-
         # Add the Cytoscape edge to the list of edges
-        cyto_edges.append(cyto_edge)
+        cyto_edges.append(create_cytoscape_edge(edge[0], edge[1], edge_attrs))
     return cyto_nodes + cyto_edges, directed
 
 
+def create_cytoscape_node(node: Any, node_attrs: dict, positions: dict) -> GraphElement:
+    x_idx = 0
+    y_idx = 1
+    if "position" not in node_attrs:
+        position_x = positions[node][x_idx]
+        position_y = positions[node][y_idx]
+    else:
+        position_x = node_attrs["position"]["x"]
+        position_y = node_attrs["position"]["y"]
+        node_attrs.pop("position")
+    if node_attrs.get("label", True):
+        label = str(node)
+    else:
+        label = node_attrs["label"]
+        node_attrs.pop("label")
+
+    # Create a dictionary representing the Cytoscape node with the modified attributes
+    return {
+        "data": {"id": str(node), "label": label, ADD_ATTRS: node_attrs},
+        "position": {
+            "x": position_x,
+            "y": position_y,
+        },
+    }
+
+
+def create_cytoscape_edge(source: Any, target: Any, edge_attrs: dict) -> GraphElement:
+    # Create a dictionary representing the Cytoscape edge with the modified attributes
+    return {
+        "data": {
+            "source": str(source),
+            "target": str(target),
+            ADD_ATTRS: edge_attrs,
+        }
+    }
+
+
 def edge_target_arrow_shape(directed: bool) -> str:
     if directed:
         return "triangle"
     return "none"
 
 
+def edge_curve_style(directed: bool, detailed: bool) -> str:
+    if detailed:
+        return "bezier"
+    # haystack edges are the cheapest to draw, but they can not show arrows
+    if directed:
+        return "straight"
+    return "haystack"
+
+
+def is_detailed(element_count: int) -> bool:
+    return element_count < LEVEL_OF_DETAIL_ELEMENTS
+
+
 # LEGACY TEST FUNCTION
 def convert_cytoscape_to_networkx(elements: GraphElements) -> Graph:
     # Create an empty NetworkX graph
@@ -125,44 +126,61 @@ def convert_cytoscape_to_networkx(elements: GraphElements) -> Graph:
 
 
 def convert_cytoscape_to_yaml_dict(elements: GraphElements, directed: bool) -> dict:
-    nodes = {}
-    edges = []
-    x_offset = 0.0
-    y_offset = 0.0
-    for element in elements:
-        if not is_node(element):
-            continue
-        x_pos = element["position"]["x"]
-        y_pos = element["position"]["y"]
-        if x_pos < x_offset:
-            x_offset = x_pos
-        if y_pos < y_offset:
-            y_offset = y_pos
-
-    x_offset = abs(x_offset)
-    y_offset = abs(y_offset)
-
-    for element in elements:
-        if is_node(element):
-            node_id, node_attrs = create_node_attributes(element, x_offset, y_offset)
-            nodes[str(node_id)] = node_attrs
-        else:
-            edges.append(convert_edge_to_yaml_dict(element))
-
+    nodes, edges, x_offset, y_offset = prepare_export(elements)
     yaml_dict = {
         "graph_params": {
             "loader": "hardcoded",
             "loader_params": {
                 "settings": {"directed": directed},
                 "targets": {},
-                "nodes": nodes,
-                "edges": edges,
+                "nodes": {
+                    str(node_id): node_attrs
+                    for node_id, node_attrs in iter_node_attributes(nodes, x_offset, y_offset)
+                },
+                "edges": [convert_edge_to_yaml_dict(edge) for edge in edges],
             },
         }
     }
     return yaml_dict
 
 
+def split_elements(elements: GraphElements) -> tuple[GraphElements, GraphElements]:
+    nodes = []
+    edges = []
+    for element in elements:
+        if is_node(element):
+            nodes.append(element)
+        else:
+            edges.append(element)
+    return nodes, edges
+
+
+def export_offsets(nodes: GraphElements) -> tuple[float, float]:
+    """Shifts which move all exported positions into non-negative coordinates."""
+    if len(nodes) == 0:
+        return 0.0, 0.0
+    coords = np.fromiter(
+        chain.from_iterable((node["position"]["x"], node["position"]["y"]) for node in nodes),
+        dtype=np.float64,
+        count=2 * len(nodes),
+    ).reshape(-1, 2)
+    x_offset, y_offset = np.abs(np.minimum(coords.min(axis=0), 0.0)).tolist()
+    return x_offset, y_offset
+
+
+def prepare_export(elements: GraphElements) -> tuple[GraphElements, GraphElements, float, float]:
+    nodes, edges = split_elements(elements)
+    x_offset, y_offset = export_offsets(nodes)
+    return nodes, edges, x_offset, y_offset
+
+
+def iter_node_attributes(
+    nodes: GraphElements, x_offset: float, y_offset: float
+) -> Iterator[tuple[str, dict]]:
+    for node in nodes:
+        yield create_node_attributes(node, x_offset, y_offset)
+
+
 def create_node_attributes(
     node: GraphElement, x_offset: float = 0.0, y_offset: float = 0.0
 ) -> tuple[str, dict]:
@@ -189,23 +207,6 @@ def convert_edge_to_yaml_dict(element: GraphElement) -> dict:
     return result
 
 
-def json_to_networkx_graph(json_string):
-    data = json.loads(json_string)
-    G = nx.Graph()
-    ROOT_LIST_DATA_INDEX = 0
-    graph_data = data[ROOT_LIST_DATA_INDEX]['graph']
-
-    for node in graph_data['nodes']:
-        label = node[0]
-        attributes = node[1]
-        G.add_node(label, **attributes)
-    for edge in graph_data['edges']:
-        node_pair = edge[0]
-        attributes = edge[1]
-        G.add_edge(node_pair[0], node_pair[1], **attributes)
-    return G
-
-
 def convert_edge_to_json(element: GraphElement) -> list:
     result = []
     source_id = element["data"]["source"]
@@ -222,38 +223,40 @@ def convert_edge_to_json(element: GraphElement) -> list:
 
 
 def convert_cytoscape_to_json(elements: GraphElements, directed: bool) -> dict:
-    nodes = []
-    edges = []
-    x_offset = 0.0
-    y_offset = 0.0
-    for element in elements:
-        if not is_node(element):
-            continue
-        x_pos = element["position"]["x"]
-        y_pos = element["position"]["y"]
-        if x_pos < x_offset:
-            x_offset = x_pos
-        if y_pos < y_offset:
-            y_offset = y_pos
-
-    x_offset = abs(x_offset)
-    y_offset = abs(y_offset)
-
-    for element in elements:
-        if is_node(element):
-            node = []
-            node_id, node_attrs = create_node_attributes(element, x_offset, y_offset)
-            node.append(str(node_id))
-            node.append(node_attrs)
-            # PLACEHOLDER: UNKNOWN THIRD ITEM
-            nodes.append(node)
-        else:
-            edges.append(convert_edge_to_json(element))
-
-    yaml_dict = {
+    nodes, edges, x_offset, y_offset = prepare_export(elements)
+    json_dict = {
         "graph": {
-            "nodes": nodes,
-            "edges": edges
+            "nodes": [
+                # PLACEHOLDER: UNKNOWN THIRD ITEM
+                [str(node_id), node_attrs]
+                for node_id, node_attrs in iter_node_attributes(nodes, x_offset, y_offset)
+            ],
+            "edges": [convert_edge_to_json(edge) for edge in edges],
         }
     }
-    return yaml_dict
+    return json_dict
+
+
+def iter_json_chunks(elements: GraphElements, directed: bool) -> Iterator[str]:
+    """Serializes the graph like convert_cytoscape_to_json, one node or edge per line.
+
+    Nothing but the currently written item is held in memory besides the
+    elements themselves.
+    """
+    nodes, edges, x_offset, y_offset = prepare_export(elements)
+    yield '{\n    "graph": {\n        "nodes": ['
+    separator = JSON_ITEM_SEPARATOR
+    for node_id, node_attrs in iter_node_attributes(nodes, x_offset, y_offset):
+        yield separator + json.dumps([str(node_id), node_attrs])
+        separator = "," + JSON_ITEM_SEPARATOR
+    yield '\n        ],\n        "edges": ['
+    separator = JSON_ITEM_SEPARATOR
+    for edge in edges:
+        yield separator + json.dumps(convert_edge_to_json(edge))
+        separator = "," + JSON_ITEM_SEPARATOR
+    yield "\n        ]\n    }\n}\n"
+
+
+def write_json(file: Any, elements: GraphElements, directed: bool) -> None:
+    """Writer for dcc.send_string, also usable with any opened text file."""
+    file.writelines(iter_json_chunks(elements, directed))
@@ -0,0 +1,13 @@
+import multiprocessing
+import os
+
+bind = os.environ.get("MAP_EDITOR_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("MAP_EDITOR_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("MAP_EDITOR_THREADS", 4))
+worker_class = "gthread"
+# every generation of a graph runs in a process of its own, callbacks themselves are short
+timeout = 120
+
+if workers > 1:
+    # sessions hop between the workers, their state has to live on disk
+    os.environ.setdefault("MAP_EDITOR_DATA_DIR", "map_editor_data")
@@ -1,3 +1,4 @@
+import copy
 import dash_daq as daq
 import dash_cytoscape as cyto
 import dash_bootstrap_components as dbc
@@ -9,6 +10,10 @@ from dash_extensions.enrich import (
     dcc
 )
 from graph_functions import dropdown_functions, FUNCTION_DICT
+from graph_document import document_store
+from graph_layouts import LAYOUT_OPTIONS, AUTO_LAYOUT
+from graph_binary import EXPORT_FORMAT_OPTIONS, JSON_FORMAT
+from generation_jobs import POLL_INTERVAL_MS
 
 
 GRAPH_TEMPLATES = html.Div(
@@ -18,7 +23,19 @@ GRAPH_TEMPLATES = html.Div(
             id="graph_layout_dropdown",
             value=None,
         ),
+        dcc.Dropdown(
+            options=LAYOUT_OPTIONS,
+            id="generate-layout-dropdown",
+            value=AUTO_LAYOUT,
+            clearable=False,
+            className="mt-2",
+        ),
         html.Div(id="input_fields", style=INPUT_STYLESHEET),
+        dbc.Progress(id="generation-progress", value=0, striped=True, animated=True,
+                     class_name="mt-2"),
+        html.Div(id="generation-status"),
+        dcc.Interval(id="generation-interval", interval=POLL_INTERVAL_MS, disabled=True),
+        dcc.Store(id="generation-job"),
     ],
     id="modal_html_body",
 )
@@ -40,19 +57,65 @@ APP_LAYOUT = html.Div(
                     id="upload-graph",
                     children=dbc.Button("Upload Graph", class_name="mb-2 w-100"),
                 ),
+                dcc.Dropdown(
+                    options=LAYOUT_OPTIONS,
+                    id="upload-layout-dropdown",
+                    value=AUTO_LAYOUT,
+                    clearable=False,
+                    className="mb-2",
+                ),
+                dbc.Progress(id="import-progress", value=0, striped=True, animated=True,
+                             class_name="mb-2"),
+                html.Div(id="import-status", className="mb-2"),
+                dcc.Interval(id="import-interval", interval=POLL_INTERVAL_MS, disabled=True),
+                dcc.Store(id="import-job"),
                 dcc.Download(id="save-graph"),
+                dcc.Dropdown(
+                    options=EXPORT_FORMAT_OPTIONS,
+                    id="save-format-dropdown",
+                    value=JSON_FORMAT,
+                    clearable=False,
+                    className="mb-2",
+                ),
                 dbc.Button("Download Graph", id="save-graph-image", class_name="mb-2"),
+                dbc.Button("Delete Selected", id="delete-selected-button", class_name="mb-2"),
+                dbc.ButtonGroup(
+                    [
+                        dbc.Button("\u2194", id="align-horizontally-button",
+                                   title="Align selected nodes horizontally"),
+                        dbc.Button("\u2195", id="align-vertically-button",
+                                   title="Align selected nodes vertically"),
+                        dbc.Button("\u21bb", id="rotate-selection-button",
+                                   title="Rotate selected nodes"),
+                        dbc.Button("+", id="scale-up-selection-button",
+                                   title="Spread selected nodes"),
+                        dbc.Button("\u2212", id="scale-down-selection-button",
+                                   title="Gather selected nodes"),
+                    ],
+                    size="sm",
+                    class_name="mb-2",
+                ),
+                dbc.Input(id="bulk-edit-query", type="text", size="sm", class_name="mb-1",
+                          placeholder="Where, e.g. target == True and value < 150"),
+                dbc.Input(id="bulk-edit-assignment", type="text", size="sm", class_name="mb-1",
+                          placeholder="Set, e.g. blindness = 0.1"),
+                dbc.Button("Edit Matching Elements", id="bulk-edit-button", class_name="mb-1"),
+                html.Div(id="bulk-edit-status", className="mb-2"),
                 dbc.Button("Generate Graph from Function", id="open", class_name="mb-2"),
                 dbc.Modal(
                     [
                         dbc.ModalHeader("Graph Functions"),
                         dbc.ModalBody(children=GRAPH_TEMPLATES),
                         dbc.ModalFooter(
-                            dbc.Button(
-                                "Generate Graph from Function",
-                                id="graph_generate_button",
-                                className="ml-auto",
-                            )
+                            [
+                                dbc.Button("Cancel", id="generation-cancel-button",
+                                           color="secondary"),
+                                dbc.Button(
+                                    "Generate Graph from Function",
+                                    id="graph_generate_button",
+                                    className="ml-auto",
+                                ),
+                            ]
                         ),
                     ],
                     id="modal_menu_graph_functions",
@@ -97,9 +160,20 @@ APP_LAYOUT = html.Div(
         # html.Div(id="position_click"),
         ATTRIBUTE_SIDEBAR_CONTAINER,
         dcc.Store(id="selected-items"),
-        dcc.Store(id="undo-redo-actions", data=[0]),
-        dcc.Store(id="previous-attr-elements", data={})
+        dcc.Store(id="undo-redo-actions", data=[0, 0]),
+        dcc.Store(id="previous-attr-elements", data={}),
+        # set when a callback found no document for the session, the browser sends its graph
+        dcc.Store(id="document-resync")
     ],
     tabIndex="0",
     style=ROOT_DIV_STYLE,
 )
+
+
+def serve_app_layout() -> html.Div:
+    # every page load gets its own server-side graph document
+    layout = copy.copy(APP_LAYOUT)
+    layout.children = APP_LAYOUT.children + [
+        dcc.Store(id="session-id", data=document_store.create())
+    ]
+    return layout
@@ -0,0 +1,113 @@
+import sys
+import time
+import tracemalloc
+from importlib.abc import MetaPathFinder
+from typing import Any, Optional
+
+REPORT_ROWS = 30
+
+
+class Profiling_loader:
+    """Wraps the loader of a module and measures the execution of the module."""
+
+    def __init__(self, loader: Any, profiler: "Import_profiler") -> None:
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec: Any) -> Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        self._profiler.enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.leave()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+
+class Import_profiler(MetaPathFinder):
+    """Records time and Python memory of every module imported while installed.
+
+    Inclusive numbers contain the imports done by the module, self numbers
+    do not. Memory is what tracemalloc sees, i.e. allocations by Python.
+    """
+
+    def __init__(self) -> None:
+        self.records: list[tuple[str, int, float, float, int, int]] = []
+        self._stack: list[list] = []
+        self._finding: set[str] = set()
+        self._start = 0.0
+
+    def install(self) -> None:
+        tracemalloc.start()
+        self._start = time.perf_counter()
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        sys.meta_path.remove(self)
+        self.total_time = time.perf_counter() - self._start
+        self.total_memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    def find_spec(self, fullname: str, path: Any, target: Any = None) -> Optional[Any]:
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                        spec.loader = Profiling_loader(spec.loader, self)
+                    return spec
+            return None
+        finally:
+            self._finding.discard(fullname)
+
+    def enter(self, name: str) -> None:
+        # name, depth, start time, start memory, time and memory of child imports
+        memory = tracemalloc.get_traced_memory()[0]
+        self._stack.append([name, len(self._stack), time.perf_counter(), memory, 0.0, 0])
+
+    def leave(self) -> None:
+        name, depth, start, start_memory, child_time, child_memory = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0] - start_memory
+        if self._stack:
+            self._stack[-1][4] += elapsed
+            self._stack[-1][5] += memory
+        self.records.append((name, depth, elapsed, elapsed - child_time, memory, memory - child_memory))
+
+    def report(self, rows: int = REPORT_ROWS) -> str:
+        lines = [
+            f"Startup imports: {len(self.records)} modules, "
+            f"{self.total_time * 1000:.0f} ms, {self.total_memory / 2 ** 20:.1f} MiB "
+            "(timings include tracemalloc overhead)",
+            "",
+            f"{'module':<48}{'incl ms':>10}{'self ms':>10}{'incl MiB':>10}{'self MiB':>10}",
+        ]
+        top = sorted(self.records, key=lambda record: record[2], reverse=True)[:rows]
+        for name, _, elapsed, self_time, memory, self_memory in top:
+            lines.append(
+                f"{name:<48}{elapsed * 1000:>10.1f}{self_time * 1000:>10.1f}"
+                f"{memory / 2 ** 20:>10.2f}{self_memory / 2 ** 20:>10.2f}"
+            )
+        lines.append("")
+        lines.append("Top-level packages by self time:")
+        packages: dict[str, list[float]] = {}
+        for name, _, _, self_time, _, self_memory in self.records:
+            package = packages.setdefault(name.split(".")[0], [0.0, 0.0])
+            package[0] += self_time
+            package[1] += self_memory
+        for package_name, (self_time, self_memory) in sorted(
+            packages.items(), key=lambda item: item[1][0], reverse=True
+        )[:rows]:
+            lines.append(
+                f"{package_name:<48}{self_time * 1000:>10.1f} ms{self_memory / 2 ** 20:>10.2f} MiB"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,27 @@
+import importlib
+import importlib.util
+import os
+import sys
+from types import ModuleType
+
+# MAP_EDITOR_EAGER_IMPORTS=1 imports everything at startup, e.g. for a preforking
+# server which should load the heavy libraries once before forking the workers
+EAGER_IMPORTS = os.environ.get("MAP_EDITOR_EAGER_IMPORTS", "0") == "1"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Returns the module which is executed on the first access to its attributes."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if EAGER_IMPORTS:
+        return importlib.import_module(name)
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.loader is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -1,7 +1,6 @@
-import base64
-import json
 # import yaml  # type: ignore
 import inspect
+import json
 import re
 import dash_bootstrap_components as dbc  # type: ignore
 from typing import Optional
@@ -18,44 +17,86 @@ from dash_extensions.enrich import (  # type: ignore
 )
 from app import app
 from graph_utils import (
-    convert_cytoscape_to_json,
+    write_json,
     edge_target_arrow_shape,
-    id_generator,
+    edge_curve_style,
+    is_detailed,
+    MIN_ZOOMED_FONT_SIZE,
     # convert_cytoscape_to_yaml_dict,
-    convert_networkx_to_cytoscape,
-    json_to_networkx_graph
 )
+from graph_binary import BINARY_FORMAT, export_binary
+from graph_document import document_store, session_locked
+from graph_layouts import AUTO_LAYOUT
 from graph_functions import (
     # handle_yaml_graph,
     FUNCTION_DICT,
     create_function_parameter_input_field,
     handle_input_dict,
-    call_graph_function_with_params,
 )
 
 
-@app.callback(
+# flipping the arrows is a pure view change, it does not need the server
+app.clientside_callback(
+    """
+    function(directed, stylesheet) {
+        const shape = directed ? %s : %s;
+        const edge = stylesheet.findIndex(selector => selector.selector === "edge");
+        if (edge !== -1) {
+            const style = {...stylesheet[edge].style, "target-arrow-shape": shape};
+            if (style["curve-style"] !== %s) {
+                style["curve-style"] = directed ? %s : %s;
+            }
+            stylesheet = [...stylesheet];
+            stylesheet[edge] = {...stylesheet[edge], style: style};
+        }
+        return [directed ? "Directed" : "Undirected", stylesheet];
+    }
+    """ % tuple(json.dumps(value) for value in (
+        edge_target_arrow_shape(True),
+        edge_target_arrow_shape(False),
+        edge_curve_style(False, True),
+        edge_curve_style(True, False),
+        edge_curve_style(False, False),
+    )),
     [
         Output("orientation-graph-switcher", "label"),
         Output("graph-cytoscape", "stylesheet"),
     ],
     [Input("orientation-graph-switcher", "on"), State("graph-cytoscape", "stylesheet")],
 )
+
+
 def graph_orientation_switcher(
     directed: bool, stylesheet: list[dict]
 ) -> tuple[str, list[dict]]:
     for selector in stylesheet:
         if selector["selector"] == "edge":
             selector["style"]["target-arrow-shape"] = edge_target_arrow_shape(directed)
+            detailed = selector["style"].get("curve-style") == edge_curve_style(directed, True)
+            selector["style"]["curve-style"] = edge_curve_style(directed, detailed)
             break
     if directed:
         return "Directed", stylesheet
     return "Undirected", stylesheet
 
 
+def level_of_detail_switcher(
+    element_count: int, directed: bool, stylesheet: list[dict]
+) -> list[dict]:
+    detailed = is_detailed(element_count)
+    for selector in stylesheet:
+        if selector["selector"] == "edge":
+            selector["style"]["curve-style"] = edge_curve_style(directed, detailed)
+        elif selector["selector"] == "node":
+            if detailed:
+                selector["style"].pop("min-zoomed-font-size", None)
+            else:
+                selector["style"]["min-zoomed-font-size"] = MIN_ZOOMED_FONT_SIZE
+    return stylesheet
+
+
 def new_graph(n: Optional[int], elements: GraphElements) -> GraphElements:
     if n is not None and n > 0:
-        id_generator.reset()
         return []
     return elements
 
@@ -64,48 +105,20 @@ def new_graph(n: Optional[int], elements: GraphElements) -> GraphElements:
     Output("save-graph", "data"),
     [
         Input("save-graph-image", "n_clicks"),
-        State("graph-cytoscape", "elements"),
+        State("session-id", "data"),
         State("orientation-graph-switcher", "on"),
+        State("save-format-dropdown", "value"),
     ],
     prevent_initial_call=True,
 )
-def save(_: Optional[int], elements: GraphElements, directed: bool) -> dict:
-    json_dict = convert_cytoscape_to_json(elements, directed)
-    return dcc.send_string(json.dumps(json_dict, indent=4), "graph.json")
-
-
-def update_output(
-    contents: Optional[str],
-    filename: Optional[str],
-    elements: GraphElements,
-    directed: bool,
-    label: str,
-    stylesheet: list[dict],
-) -> tuple[GraphElements, bool, str, list[dict]]:
-    if contents is None:
-        return [], directed, label, stylesheet
-        # read the uploaded file and convert it to a NetworkX graph
-    content_type, content_string = contents.split(",")
-    decoded = base64.b64decode(content_string)
-    # network_data = yaml.safe_load(decoded)
-    # graph = handle_yaml_graph(network_data)
-    graph = json_to_networkx_graph(decoded)
-    if graph is None:
-        print("Graph after handling yaml was None")
-        return [], directed, label, stylesheet
-    # cytoscape_graph = nx.cytoscape_data(graph)
-    # convert the NetworkX data to a Cytoscape-compatible JSON format
-
-    # return the Cytoscape-compatible JSON data
-
-    # LEGACY TEST CODE
-    # elements = (
-    #     cytoscape_graph["elements"]["nodes"] + cytoscape_graph["elements"]["edges"]
-    # )
-    elements, directed = convert_networkx_to_cytoscape(graph)
-    label, stylesheet = graph_orientation_switcher(directed, stylesheet)
-    # test_graph = convert_cytoscape_to_networkx(elements)
-    return elements, directed, label, stylesheet
+@session_locked
+def save(_: Optional[int], session_id: str, directed: bool, save_format: str) -> dict:
+    elements = document_store.get(session_id).elements
+    if save_format == BINARY_FORMAT:
+        return dcc.send_bytes(export_binary(elements, directed), "graph.npz")
+    # dcc.send_string collects the whole file in memory, the writer only saves building
+    # an intermediate graph dict before the text
+    return dcc.send_string(write_json, "graph.json", elements=elements, directed=directed)
 
 
 @app.callback(
@@ -141,31 +154,23 @@ def create_input_fields(selected_option: str) -> list[InputComponent]:
     return input_fields
 
 
-def button_click(
-    n_clicks: int,
-    value: str,
-    html_input_children: list[InputComponent],
-    stylesheet: list[dict],
-) -> tuple[GraphElements, bool, bool, str, list[dict]]:
-    print(html_input_children)
-    if n_clicks is None or html_input_children is None:
-        return [], False
+def collect_function_params(html_input_children: list[InputComponent]) -> dict:
     param_dict = {}
     for child in html_input_children:
         if child["type"] == "Label" or child["type"] == "Tooltip":
             continue
         param_name, param_value = handle_input_dict(child)
         param_dict[param_name] = param_value
-    graph = call_graph_function_with_params(FUNCTION_DICT[value], param_dict)
-    cytoscape_elements, directed = convert_networkx_to_cytoscape(graph)
-    label, stylesheet = graph_orientation_switcher(directed, stylesheet)
-    return cytoscape_elements, False, directed, label, stylesheet
+    return param_dict
 
 
-@app.callback(
+app.clientside_callback(
+    """
+    function(n1, is_open) {
+        return n1 !== undefined && n1 !== null;
+    }
+    """,
     Output("modal_menu_graph_functions", "is_open"),
     [Input("open", "n_clicks")],
     [State("modal_menu_graph_functions", "is_open")],
 )
-def toggle_modal(n1: Optional[int], is_open: bool) -> bool:
-    return n1 is not None
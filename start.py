@@ -1,3 +1,14 @@
+import sys
+
+PROFILE_STARTUP = "--profile-startup"
+# serves the app by waitress with MAP_EDITOR_THREADS threads instead of the Flask dev server
+PRODUCTION = "--production"
+
+if __name__ == "__main__" and PROFILE_STARTUP in sys.argv:
+    from import_profiler import Import_profiler
+    import_profiler = Import_profiler()
+    import_profiler.install()
+
 from app import app
 # Ignoring unused import errors since its needed for import of callbacks
 import attribute_editor  # noqa: F401
@@ -6,4 +17,19 @@ import sidebar  # noqa: F401
 import action_manager  # noqa: F401
 
 if __name__ == "__main__":
-    app.run_server(debug=False)
+    if PROFILE_STARTUP in sys.argv:
+        import_profiler.uninstall()
+        print(import_profiler.report())
+        sys.exit(0)
+    if PRODUCTION in sys.argv:
+        import os
+        from waitress import serve  # type: ignore
+        from wsgi import server
+        serve(
+            server,
+            host=os.environ.get("MAP_EDITOR_HOST", "0.0.0.0"),
+            port=int(os.environ.get("MAP_EDITOR_PORT", 8050)),
+            threads=int(os.environ.get("MAP_EDITOR_THREADS", 8)),
+        )
+    else:
+        app.run_server(debug=False)
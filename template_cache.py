@@ -0,0 +1,176 @@
+import gc
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from type_aliases import GraphElements, GraphFunction
+from graph_functions import DIRECTORY, create_function_kwargs
+
+TEMPLATE_CACHE_SIZE = 16
+# generated graphs are kept on disk as well when set, e.g. "template_cache"
+TEMPLATE_CACHE_DIR: Optional[str] = None
+# the least recently used files are removed above this total size
+TEMPLATE_CACHE_DISK_BYTES = 2 ** 30
+
+_source_hash: tuple[tuple, str] = ((), "")
+
+
+def templates_source_hash() -> str:
+    """Hash of all sources in graph_templates, templates import helpers and each other."""
+    global _source_hash
+    paths = sorted(
+        os.path.join(root, filename)
+        for root, _, filenames in os.walk(DIRECTORY)
+        for filename in filenames
+        if filename.endswith(".py")
+    )
+    stamps = tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+    if stamps != _source_hash[0]:
+        digest = hashlib.sha1()
+        for path in paths:
+            digest.update(os.path.relpath(path, DIRECTORY).encode())
+            with open(path, "rb") as file:
+                digest.update(file.read())
+        _source_hash = (stamps, digest.hexdigest())
+    return _source_hash[1]
+
+
+def canonical_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        return ["dict", sorted([repr(key), canonical_value(item)] for key, item in value.items())]
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [canonical_value(item) for item in value]]
+    if isinstance(value, (set, frozenset)):
+        return ["set", sorted(repr(item) for item in value)]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return [type(value).__name__, value]
+    return [type(value).__name__, repr(value)]
+
+
+def is_deterministic(kwargs: dict[str, Any]) -> bool:
+    # templates reseed the global random generator, an unset seed means a random graph
+    return not any(name.endswith("seed") and value is None for name, value in kwargs.items())
+
+
+def load_entry(entry: bytes) -> tuple[GraphElements, bool]:
+    # the collector would repeatedly scan the hundreds of thousands of new dicts
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.loads(entry)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+class Template_cache:
+    """LRU cache of Cytoscape elements generated from graph templates.
+
+    Entries are stored pickled, so every hit hands out a fresh copy which
+    the document may modify in place.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = TEMPLATE_CACHE_SIZE,
+        cache_dir: Optional[str] = TEMPLATE_CACHE_DIR,
+        max_disk_bytes: int = TEMPLATE_CACHE_DISK_BYTES,
+    ) -> None:
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._max_entries = max_entries
+        self._max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self.set_cache_dir(cache_dir)
+
+    def set_cache_dir(self, cache_dir: Optional[str]) -> None:
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._cache_dir = cache_dir
+
+    def key(self, name: str, kwargs: dict[str, Any], layout_name: str) -> str:
+        digest = hashlib.sha1()
+        digest.update(name.encode())
+        digest.update(json.dumps(canonical_value(kwargs)).encode())
+        digest.update(layout_name.encode())
+        digest.update(templates_source_hash().encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key + ".pickle")  # type: ignore
+
+    def get(self, key: str) -> Optional[tuple[GraphElements, bool]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            if self._cache_dir is None:
+                return None
+            try:
+                with open(self._path(key), "rb") as file:
+                    entry = file.read()
+                # the modification time orders the files for the cleanup
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                return None
+            self._remember(key, entry)
+        return load_entry(entry)
+
+    def _remember(self, key: str, entry: bytes) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, elements: GraphElements, directed: bool) -> None:
+        self.set_entry(key, pickle.dumps((elements, directed), protocol=pickle.HIGHEST_PROTOCOL))
+
+    def set_entry(self, key: str, entry: bytes) -> None:
+        """Stores an already pickled (elements, directed) pair."""
+        self._remember(key, entry)
+        if self._cache_dir is None:
+            return
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=self._cache_dir)
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(entry)
+        os.replace(tmp_path, self._path(key))
+        self._remove_least_recent()
+
+    def _remove_least_recent(self) -> None:
+        files = []
+        with os.scandir(self._cache_dir) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self._max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+template_cache = Template_cache()
+
+
+def find_template_elements(
+    name: str, function: GraphFunction, param_dict: dict[str, Any], layout_name: str
+) -> tuple[Optional[str], Optional[tuple[GraphElements, bool]]]:
+    """Returns the cache key (None for random graphs) and the cached result if there is one."""
+    kwargs = create_function_kwargs(function, param_dict)
+    if not is_deterministic(kwargs):
+        return None, None
+    key = template_cache.key(name, kwargs, layout_name)
+    return key, template_cache.get(key)
+
@@ -0,0 +1,26 @@
+import os
+import sys
+from typing import Optional
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the modules of the app are top-level, the templates import graph_helper directly
+sys.path[:0] = [ROOT, os.path.join(ROOT, "graph_templates")]
+
+from graph_utils import create_cytoscape_node, create_cytoscape_edge  # noqa: E402
+
+
+def path_elements(n_nodes: int, node_attrs: Optional[dict] = None) -> list:
+    elements = [
+        create_cytoscape_node(i, dict(node_attrs or {}), {i: (10.0 * i, 0.0)})
+        for i in range(n_nodes)
+    ]
+    elements += [create_cytoscape_edge(i, i + 1, {}) for i in range(n_nodes - 1)]
+    return elements
+
+
+@pytest.fixture
+def elements() -> list:
+    # nodes 0-3 followed by the edges 0-1, 1-2 and 2-3
+    return path_elements(4)
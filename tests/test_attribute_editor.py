@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from attribute_editor import (
+    decode_element_idxs,
+    encode_element_idxs,
+    refresh_attribute_stats,
+    select_attribute_stats,
+    Selected_items,
+)
+from conftest import path_elements
+from graph_document import Graph_document
+from graph_model import Attribute_stats
+from graph_utils import ADD_ATTRS
+from undo_redo import OPERATION, SET_DATA, MOVE, ITEMS
+
+
+def test_refresh_attribute_stats(elements: list) -> None:
+    document = Graph_document()
+    document.set_elements(elements)
+    for element in elements[:2]:
+        document.selection_stats.add(element["data"]["id"], element["data"][ADD_ATTRS])
+    elements[0]["data"][ADD_ATTRS]["weight"] = 5
+    elements[1]["data"][ADD_ATTRS]["weight"] = 6
+    # the unselected node is not counted
+    elements[2]["data"][ADD_ATTRS]["weight"] = 5
+    delta = [
+        {OPERATION: SET_DATA, ITEMS: [[0, {}, {}], [1, {}, {}], [2, {}, {}]]},
+        {OPERATION: MOVE, ITEMS: [[1, {"x": 0, "y": 0}, {"x": 1, "y": 1}]]},
+    ]
+    assert refresh_attribute_stats(document, delta) == {"weight"}
+    assert document.selection_stats.common_attrs() == ["weight"]
+    assert document.selection_stats.value_count("weight") == 2
+    assert refresh_attribute_stats(document, delta) == set()
+
+
+@pytest.mark.parametrize(
+    "element_idxs",
+    [[], [0], [5, 6, 7, 8], [3, 2 ** 31 - 1], [9, 2, 4], list(range(0, 30000, 3))],
+)
+def test_encoded_element_idxs(element_idxs: list) -> None:
+    assert decode_element_idxs(encode_element_idxs(element_idxs)) == element_idxs
+
+
+def test_encoded_runs_are_small() -> None:
+    # a box selection of many neighbouring elements
+    assert len(encode_element_idxs(list(range(1000, 101000)))) < 1000
+
+
+def test_selected_items_data_round_trip() -> None:
+    selected_items = Selected_items()
+    selected_items.set_attrs(["weight"])
+    selected_items.generate_selected_elements_idxs([{"id": "1"}], [], path_elements(3))
+    data = json.loads(json.dumps(selected_items.get_data()))
+
+    loaded = Selected_items()
+    loaded.set_data(data)
+    assert loaded.get_attrs() == ["weight"]
+    assert loaded.get_elements_idxs() == [1]
+    assert (loaded.get_node_count(), loaded.get_edge_count()) == (1, 0)
+
+
+def test_selected_indices_and_counts(elements: list) -> None:
+    selected_items = Selected_items()
+    selected_nodes = [{"id": "2"}, {"id": "0"}, {"id": "2"}, {"id": "removed"}]
+    selected_edges = [{"source": "1", "target": "2"}, {"source": "3", "target": "9"}]
+    selected_items.generate_selected_elements_idxs(selected_nodes, selected_edges, elements)
+    assert selected_items.get_elements_idxs() == [0, 2, 5]
+    assert (selected_items.get_node_count(), selected_items.get_edge_count()) == (2, 1)
+    # the store keeps neither the node nor the edge data
+    common_attrs, encoded, node_count, edge_count = selected_items.get_data()
+    assert decode_element_idxs(encoded) == [0, 2, 5] and (node_count, edge_count) == (2, 1)
+
+
+def test_select_attribute_stats(elements: list) -> None:
+    for idx, element in enumerate(elements):
+        element["data"][ADD_ATTRS]["weight"] = idx
+    stats = Attribute_stats()
+    select_attribute_stats(stats, elements, [0, 1, 4])
+    assert stats.keys() == {"0", "1", ("0", "1")} and stats.value_count("weight") == 3
+    select_attribute_stats(stats, elements, [1, 2])
+    assert stats.keys() == {"1", "2"} and stats.value_count("weight") == 2
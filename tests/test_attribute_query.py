@@ -0,0 +1,146 @@
+import pytest
+
+from conftest import path_elements
+
+from graph_model import Element_index, Attribute_columns
+from graph_utils import create_cytoscape_node
+from attribute_query import (
+    QueryError,
+    parse_query,
+    parse_assignments,
+    matching_elements,
+    apply_assignments,
+)
+
+
+@pytest.fixture
+def nodes() -> list:
+    # "kind" is text or a number, "weight" is missing on node 3
+    attributes = [
+        {"kind": "road", "weight": 1, "blind": True},
+        {"kind": "field", "weight": 2.5, "blind": False},
+        {"kind": 7, "weight": 3},
+        {"kind": "road"},
+    ]
+    return [create_cytoscape_node(i, attrs, {i: (0.0, 0.0)}) for i, attrs in enumerate(attributes)]
+
+
+def columns(nodes: list) -> Attribute_columns:
+    return Attribute_columns(nodes, Element_index(nodes))
+
+
+def query(nodes: list, text: str) -> list[int]:
+    return matching_elements(columns(nodes), parse_query(text))
+
+
+def attribute(nodes: list, name: str) -> list:
+    return [node["data"]["additional_attributes"].get(name) for node in nodes]
+
+
+@pytest.mark.parametrize("text", [None, "", "  "])
+def test_empty_query_matches_all(nodes: list, text: object) -> None:
+    assert query(nodes, text) == [0, 1, 2, 3]  # type: ignore
+
+
+def test_queries_of_an_empty_graph() -> None:
+    assert query([], "weight > 1") == []
+    assert query([], "") == []
+
+
+def test_queries_of_edges() -> None:
+    elements = path_elements(3)
+    elements[3]["data"]["additional_attributes"]["len"] = 4
+    # nodes and edges are rows of the same columns
+    assert query(elements, "len > 2") == [3]
+    assert query(elements, "not len") == [0, 1, 2, 4]
+
+
+def test_queries_of_object_values(nodes: list) -> None:
+    nodes[0]["data"]["additional_attributes"]["meta"] = {"a": 1}
+    nodes[1]["data"]["additional_attributes"]["meta"] = [1, 2]
+    nodes[2]["data"]["additional_attributes"]["meta"] = 2
+    assert query(nodes, "meta == 2") == [2]
+    assert query(nodes, "meta") == [0, 1, 2]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("weight > 1", [1, 2]),
+        ("weight * 2 == 6", [2]),
+        ("not weight", [3]),
+        ("missing == 0", []),
+        ("not missing", [0, 1, 2, 3]),
+        ("blind", [0]),
+        ("blind and weight < 2", [0]),
+        ("weight >= 1 or kind == 'road'", [0, 1, 2, 3]),
+        ("1 < weight <= 2.5", [1]),
+        ("-weight < -2", [1, 2]),
+    ],
+)
+def test_numbers_and_missing_attributes(nodes: list, text: str, expected: list) -> None:
+    assert query(nodes, text) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("kind == 'road'", [0, 3]),
+        ("kind == 7", [2]),
+        ("kind > 5", [2]),
+        ("kind in ['field', 7]", [1, 2]),
+        ("kind in [1, 2]", []),
+        ("kind not in ['road']", [1, 2]),
+    ],
+)
+def test_mixed_types(nodes: list, text: str, expected: list) -> None:
+    assert query(nodes, text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["weight >", "weight + 'a' > 1", "kind in weight", "f(weight)", "weight ** 2 > 1"],
+)
+def test_invalid_queries(nodes: list, text: str) -> None:
+    with pytest.raises(QueryError):
+        query(nodes, text)
+
+
+def test_assignments_skip_missing_attributes(nodes: list) -> None:
+    attributes = columns(nodes)
+    apply_assignments(attributes, [0, 1, 2, 3], parse_assignments("double = weight * 2; tag = 'x'"))
+    assert attribute(nodes, "double") == [2, 5.0, 6, None]
+    assert attribute(nodes, "tag") == ["x"] * 4
+
+
+def test_assignments_keep_integers(nodes: list) -> None:
+    attributes = columns(nodes)
+    assignments = parse_assignments("half = weight / 2\nfloor = weight // 2")
+    apply_assignments(attributes, [0, 2], assignments)
+    assert attribute(nodes, "half") == [0.5, None, 1.5, None]
+    assert attribute(nodes, "floor") == [0, None, 1, None]
+    assert type(attribute(nodes, "floor")[2]) is int
+
+
+def test_assignments_of_literals(nodes: list) -> None:
+    attributes = columns(nodes)
+    apply_assignments(attributes, [1], parse_assignments("meta = {'a': [1, 2]}"))
+    assert attribute(nodes, "meta") == [None, {"a": [1, 2]}, None, None]
+
+
+@pytest.mark.parametrize(
+    "text", ["x = weight / 0", "x = weight // 0", "x = weight % 0", "x = 1e999"]
+)
+def test_non_finite_results_change_nothing(nodes: list, text: str) -> None:
+    attributes = columns(nodes)
+    with pytest.raises(QueryError):
+        apply_assignments(attributes, [0, 1, 2, 3], parse_assignments("y = 1; " + text))
+    assert attribute(nodes, "y") == [None] * 4
+
+
+@pytest.mark.parametrize(
+    "text", ["", "weight", "a, b = 1, 2", "x = " + "-" * 100000 + "1", "x = {[1]: 2}"]
+)
+def test_invalid_assignments(nodes: list, text: str) -> None:
+    with pytest.raises(QueryError):
+        apply_assignments(columns(nodes), [0], parse_assignments(text))
@@ -0,0 +1,105 @@
+import copy
+
+import pytest
+from dash import no_update  # type: ignore
+
+from action_manager import action_update_positions
+from attribute_editor import encode_element_idxs
+from canvas import (
+    add_node,
+    delete_edge,
+    delete_node,
+    delete_selected,
+    rebind_new_edge,
+    update_positions,
+    transform_selection,
+    ROTATE,
+)
+from graph_diff import diff_elements
+from graph_document import document_store
+from graph_model import Element_index, Id_generator, Node_positions
+from undo_redo import apply_delta, revert_delta
+
+
+def test_update_positions_without_a_move(elements: list) -> None:
+    element_index = Element_index(elements)
+    positions = Node_positions(elements, element_index)
+    assert update_positions(None, None, elements, [], element_index, positions) is elements
+
+
+def test_position_callback_without_a_move() -> None:
+    # Dash calls it with the empty move data of a page which was just loaded
+    session_id = document_store.create()
+    assert action_update_positions(None, None, session_id, []) == (no_update, no_update)
+
+
+def test_moving_a_selected_node_moves_the_selection(elements: list) -> None:
+    element_index = Element_index(elements)
+    positions = Node_positions(elements, element_index)
+    data = [[], encode_element_idxs([0, 1]), 2, 0]
+    update_positions({"x": 0.0, "y": 5.0}, {"id": "0"}, elements, data, element_index, positions)
+    assert [elements[idx]["position"] for idx in range(3)] == [
+        {"x": 0.0, "y": 5.0}, {"x": 10.0, "y": 5.0}, {"x": 20.0, "y": 0.0}
+    ]
+
+
+def test_transform_without_a_selection(elements: list) -> None:
+    positions = Node_positions(elements, Element_index(elements))
+    before = [dict(element.get("position", {})) for element in elements]
+    transform_selection(ROTATE, elements, [], positions)
+    assert [element.get("position", {}) for element in elements] == before
+
+
+def assert_delta_of_action(before: list, elements: list, delta: list) -> None:
+    # the delta built by the action is the one a full comparison would find
+    assert delta == diff_elements(before, elements)
+    assert apply_delta(copy.deepcopy(before), delta) == elements
+    assert revert_delta(copy.deepcopy(elements), delta) == before
+
+
+def test_add_node_delta(elements: list) -> None:
+    before = copy.deepcopy(elements)
+    element_index = Element_index(elements)
+    delta = add_node({"x": 1.0, "y": 2.0}, elements, element_index, Id_generator(element_index))
+    assert elements[-1]["data"]["id"] == "4" and element_index.node_idx("4") == 7
+    assert_delta_of_action(before, elements, delta)
+    assert add_node(None, elements, element_index, Id_generator(element_index)) == []
+
+
+def test_new_edge_delta(elements: list) -> None:
+    before = copy.deepcopy(elements)
+    element_index = Element_index(elements)
+    delta = rebind_new_edge({"id": "3"}, {"id": "0"}, elements, True, element_index)
+    assert_delta_of_action(before, elements, delta)
+    # an existing edge, in either direction of an undirected graph
+    assert rebind_new_edge({"id": "1"}, {"id": "0"}, elements, False, element_index) == []
+    assert rebind_new_edge(None, {"id": "0"}, elements, False, element_index) == []
+
+
+@pytest.mark.parametrize(
+    "delete",
+    [
+        lambda element_index: delete_node({"data": {"id": "1"}}, element_index),
+        lambda element_index: delete_edge(
+            {"sourceData": {"id": "2"}, "targetData": {"id": "3"}}, element_index
+        ),
+        lambda element_index: delete_selected(
+            [{"id": "0"}, {"id": "3"}], [{"source": "1", "target": "2"}], element_index
+        ),
+    ],
+)
+def test_delete_delta(elements: list, delete) -> None:
+    before = copy.deepcopy(elements)
+    delta = delete(Element_index(elements))
+    assert len(elements) < len(before)
+    assert_delta_of_action(before, elements, delta)
+
+
+def test_deleting_nothing_gives_no_delta(elements: list) -> None:
+    element_index = Element_index(elements)
+    version = element_index.version
+    assert delete_node(None, element_index) == []
+    assert delete_edge(None, element_index) == []
+    assert delete_selected(None, None, element_index) == []
+    assert delete_node({"data": {"id": "missing"}}, element_index) == []
+    assert len(elements) == 7 and element_index.version == version
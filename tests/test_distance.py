@@ -0,0 +1,89 @@
+import itertools
+import random
+from typing import Optional
+
+import numpy as np
+import pytest
+
+from graph_helper import distance as distance_module
+from graph_helper.distance import distance, exact_gps_km, pairwise_distances, GPS_CACHE_SIZE
+from square_subgraph import square_subgraph
+
+
+@pytest.fixture
+def points() -> list:
+    random.seed(13)
+    return [(random.randint(0, 50), random.randint(0, 50)) for _ in range(40)]
+
+
+@pytest.fixture
+def gps_points() -> list:
+    random.seed(13)
+    return [(50 + random.random(), 14 + random.random()) for _ in range(12)]
+
+
+def scalar_distances(points: list, taxicab: bool, distance_unit: Optional[str] = None) -> list:
+    return [
+        distance(from_vert, to_vert, taxicab, distance_unit)
+        for from_vert, to_vert in itertools.combinations(points, 2)
+    ]
+
+
+@pytest.mark.parametrize("taxicab", [True, False])
+@pytest.mark.parametrize("chunk_size", [1, 7, 2 ** 22])
+def test_plane_distances(points: list, taxicab: bool, chunk_size: int) -> None:
+    vectorized = pairwise_distances(points, taxicab, chunk_size)
+    assert np.allclose(vectorized, scalar_distances(points, taxicab), rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize("points", [[], [(1, 2)]])
+def test_fewer_than_two_points(points: list) -> None:
+    assert len(pairwise_distances(points)) == 0
+
+
+@pytest.mark.parametrize("taxicab", [True, False])
+def test_square_subgraph_edge_lengths(taxicab: bool) -> None:
+    graph = square_subgraph(6, 10, node_seed=1, taxicab=taxicab)
+    for from_vert, to_vert, length in graph.edges(data="len"):
+        assert length == distance(from_vert, to_vert, taxicab)
+        assert type(length) is type(distance(from_vert, to_vert, taxicab))
+
+
+@pytest.mark.parametrize("taxicab", [True, False])
+def test_exact_gps_distances(gps_points: list, taxicab: bool) -> None:
+    vectorized = pairwise_distances(gps_points, taxicab, 5, "km", exact=True)
+    assert np.allclose(vectorized, scalar_distances(gps_points, taxicab, "km"), rtol=1e-12)
+
+
+@pytest.mark.parametrize("taxicab", [True, False])
+@pytest.mark.parametrize("distance_unit", ["km", "m", "miles"])
+def test_approximate_gps_distances(gps_points: list, taxicab: bool, distance_unit: str) -> None:
+    # Lambert's formula is within meters of geopy at the size of a map
+    vectorized = pairwise_distances(gps_points, taxicab, 2 ** 22, distance_unit)
+    assert np.allclose(
+        vectorized, scalar_distances(gps_points, taxicab, distance_unit), rtol=1e-4
+    )
+
+
+def test_gps_distances_are_cached(gps_points: list) -> None:
+    first = pairwise_distances(gps_points, True, 2 ** 22, "km")
+    assert pairwise_distances(gps_points, True, 2 ** 22, "km") is first
+    assert not first.flags.writeable
+    assert pairwise_distances(gps_points, False, 2 ** 22, "km") is not first
+    assert pairwise_distances(gps_points, True, 2 ** 22, "m") is not first
+
+
+def test_gps_cache_evicts_least_recently_used(gps_points: list) -> None:
+    distance_module._gps_distance_cache.clear()
+    first = pairwise_distances(gps_points, True, 2 ** 22, "km")
+    for shift in range(1, GPS_CACHE_SIZE + 1):
+        pairwise_distances([(lat + shift, lon) for lat, lon in gps_points], True, 2 ** 22, "km")
+    assert len(distance_module._gps_distance_cache) == GPS_CACHE_SIZE
+    assert pairwise_distances(gps_points, True, 2 ** 22, "km") is not first
+
+
+def test_gps_pairs_are_computed_once(gps_points: list) -> None:
+    exact_gps_km.cache_clear()
+    distance(gps_points[0], gps_points[1], True, "km")
+    pairwise_distances(gps_points[:2], True, 2 ** 22, "km", exact=True)
+    assert exact_gps_km.cache_info().hits == 1
@@ -0,0 +1,102 @@
+import base64
+import io
+import time
+from typing import Optional
+
+import pytest
+
+import generation_jobs
+import template_cache
+from conftest import path_elements
+from generation_jobs import (
+    cancel_generation_job,
+    poll_generation_job,
+    start_generation_job,
+    start_import_job,
+    Generation_job,
+    CANCELLED,
+    DONE,
+    FAILED,
+)
+from graph_utils import write_json
+from template_cache import Template_cache
+
+TIMEOUT_SECONDS = 60
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch: pytest.MonkeyPatch) -> Template_cache:
+    cache = Template_cache()
+    monkeypatch.setattr(template_cache, "template_cache", cache)
+    monkeypatch.setattr(generation_jobs, "template_cache", cache)
+    return cache
+
+
+def wait_for(job_id: str) -> Optional[Generation_job]:
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        job = poll_generation_job(job_id)
+        if job is None or job.state in (DONE, FAILED):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+
+def test_generation(fresh_cache: Template_cache) -> None:
+    job_id = start_generation_job("complete_graph", {"num_nodes": 4}, "grid")
+    job = wait_for(job_id)
+    assert job is not None and job.state == DONE and job.progress == 1.0
+    elements, directed = job.result
+    assert len(elements) == 4 + 6 and not directed
+    # finished jobs are handed out only once
+    assert poll_generation_job(job_id) is None
+
+    # the second generation is a cache hit, done without a process
+    job_id = start_generation_job("complete_graph", {"num_nodes": 4}, "grid")
+    job = poll_generation_job(job_id)
+    assert job.state == DONE and job.process is None and job.result == (elements, directed)
+    assert job.result[0] is not elements
+
+
+def test_failed_generation() -> None:
+    job = wait_for(start_generation_job("complete_graph", {"num_nodes": "four"}, "grid"))
+    assert job is not None and job.state == FAILED and job.error.startswith("TypeError")
+
+
+def test_cancel() -> None:
+    job_id = start_generation_job("complete_graph", {"num_nodes": 3000}, "grid")
+    job = generation_jobs._jobs[job_id]
+    cancel_generation_job(job_id)
+    assert job.state == CANCELLED
+    assert poll_generation_job(job_id) is None
+    deadline = time.monotonic() + TIMEOUT_SECONDS
+    while job_id in generation_jobs._jobs:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    assert job.process is None or not job.process.is_alive()
+
+
+def test_unknown_jobs() -> None:
+    assert poll_generation_job(None) is None
+    assert poll_generation_job("0" * 32) is None
+    cancel_generation_job("0" * 32)
+
+
+def test_import_job() -> None:
+    file = io.StringIO()
+    write_json(file, path_elements(3), False)
+    contents = "data:application/json;base64," + base64.b64encode(file.getvalue().encode()).decode()
+    job = wait_for(start_import_job(contents, "graph.json", "grid"))
+    assert job is not None and job.state == DONE
+    elements, directed = job.result
+    assert len(elements) == 3 + 2 and not directed
+    assert elements[1]["position"] == {"x": 10, "y": 0}
+
+
+def test_published_jobs(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # with several server processes, any of them may poll the job
+    monkeypatch.setattr(generation_jobs, "_job_dir", None)
+    generation_jobs.set_job_dir(str(tmp_path))
+    job = wait_for(start_generation_job("complete_graph", {"num_nodes": 4}, "grid"))
+    assert job is not None and job.state == DONE and len(job.result[0]) == 10
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,99 @@
+import base64
+import io
+import json
+
+import numpy as np
+import pytest
+
+from conftest import path_elements
+from graph_binary import (
+    BINARY_FORMAT_VERSION,
+    export_binary,
+    import_binary_elements,
+    import_uploaded_elements,
+    is_binary_file,
+)
+from graph_import import import_json_elements, GraphFileError
+from graph_utils import write_json
+
+NODE_ATTRS = {"weight": 3, "blindness": 0.25, "target": True, "kind": "road", "meta": {"a": [1]}}
+
+
+def load_binary(elements: list) -> list:
+    content_string = base64.b64encode(export_binary(elements, False)).decode()
+    loaded, directed = import_binary_elements(content_string)
+    assert not directed
+    return loaded
+
+
+def load_json(elements: list) -> list:
+    file = io.StringIO()
+    write_json(file, elements, False)
+    return import_json_elements(base64.b64encode(file.getvalue().encode()).decode())[0]
+
+
+@pytest.fixture
+def uploaded() -> list:
+    return load_json(path_elements(5, NODE_ATTRS))
+
+
+def test_round_trip(uploaded: list) -> None:
+    assert load_binary(uploaded) == uploaded
+
+
+def test_empty_graph() -> None:
+    assert load_binary([]) == []
+
+
+def test_same_elements_as_json(uploaded: list) -> None:
+    # attributes which are not shared by all items, or not numbers, go to the JSON part
+    uploaded[1]["data"]["additional_attributes"]["only_here"] = [1, 2]
+    uploaded[2]["data"]["additional_attributes"]["weight"] = 2 ** 70
+    uploaded[3]["data"]["additional_attributes"]["blindness"] = "high"
+    uploaded[-1]["data"]["additional_attributes"]["length"] = 1.5
+    assert load_binary(uploaded) == load_json(uploaded) == uploaded
+
+
+def test_types_and_key_order_survive(uploaded: list) -> None:
+    loaded = load_binary(uploaded)
+    attributes = loaded[0]["data"]["additional_attributes"]
+    assert list(attributes) == list(uploaded[0]["data"]["additional_attributes"])
+    assert [type(attributes[name]) for name in ("weight", "blindness", "target")] == [
+        int, float, bool
+    ]
+
+
+def test_positions_survive(uploaded: list) -> None:
+    assert [element.get("position") for element in load_binary(uploaded)[:5]] == [
+        {"x": 10.0 * i, "y": 0.0} for i in range(5)
+    ]
+
+
+def test_uploaded_files_by_extension(uploaded: list) -> None:
+    assert is_binary_file("GRAPH.NPZ")
+    assert not is_binary_file("graph.json")
+    url = "data:application/octet-stream;base64," + base64.b64encode(
+        export_binary(uploaded, False)
+    ).decode()
+    assert import_uploaded_elements(url, "graph.npz")[0] == uploaded
+
+
+def archive_with(**arrays: object) -> str:
+    file = io.BytesIO()
+    np.savez(file, **arrays)
+    return base64.b64encode(file.getvalue()).decode()
+
+
+@pytest.mark.parametrize(
+    "content_string",
+    [
+        base64.b64encode(b"not a zip").decode(),
+        archive_with(node_ids=np.array(["a"])),
+        archive_with(manifest=np.array(json.dumps({"version": BINARY_FORMAT_VERSION + 1}))),
+        # pickled object arrays are never loaded
+        archive_with(manifest=np.array([{"version": BINARY_FORMAT_VERSION}], dtype=object)),
+    ],
+)
+def test_invalid_files(content_string: str) -> None:
+    with pytest.raises(GraphFileError):
+        import_binary_elements(content_string)
@@ -0,0 +1,55 @@
+import copy
+
+from graph_diff import diff_elements
+from undo_redo import OPERATION, ADD, REMOVE, MOVE, SET_DATA, apply_delta, revert_delta
+
+
+def operations(delta: list) -> list:
+    return [operation[OPERATION] for operation in delta]
+
+
+def assert_round_trip(before: list, after: list, delta: list) -> None:
+    elements = copy.deepcopy(before)
+    assert apply_delta(elements, delta) == after
+    assert revert_delta(elements, delta) == before
+
+
+def test_same_elements_give_no_delta(elements: list) -> None:
+    assert diff_elements(elements, list(elements)) == []
+
+
+def test_added_removed_moved_and_changed(elements: list) -> None:
+    after = copy.deepcopy(elements)
+    del after[4]
+    after[0]["position"] = {"x": 5.0, "y": 5.0}
+    after[1]["data"]["additional_attributes"]["weight"] = 2
+    after.insert(3, {"data": {"id": "9", "label": "9", "additional_attributes": {}},
+                     "position": {"x": 0.0, "y": 0.0}})
+    delta = diff_elements(elements, after)
+    assert operations(delta) == [REMOVE, ADD, MOVE, SET_DATA]
+    assert_round_trip(elements, after, delta)
+
+
+def test_reorder_replaces_all_elements(elements: list) -> None:
+    # the kept elements in a new order can not be expressed by removals and insertions
+    after = [elements[1], elements[0]] + elements[2:]
+    delta = diff_elements(elements, after)
+    assert operations(delta) == [REMOVE, ADD]
+    assert len(delta[0]["items"]) == len(elements)
+    assert len(delta[1]["items"]) == len(after)
+    assert_round_trip(elements, after, delta)
+
+
+def test_duplicate_keys_are_added(elements: list) -> None:
+    after = elements + [copy.deepcopy(elements[0])]
+    delta = diff_elements(elements, after)
+    assert operations(delta) == [ADD]
+    assert delta[0]["items"][0][0] == len(elements)
+    assert_round_trip(elements, after, delta)
+
+
+def test_replace_with_empty_graph(elements: list) -> None:
+    delta = diff_elements(elements, [])
+    assert operations(delta) == [REMOVE]
+    assert_round_trip(elements, [], delta)
+    assert diff_elements([], []) == []
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+
+import pytest
+
+import graph_document
+from conftest import path_elements
+from graph_document import (
+    Document_store,
+    DocumentNotFoundError,
+    File_system_backend,
+    Graph_document,
+    Memory_backend,
+    Session_locks,
+    session_locked,
+)
+
+SESSION_ID = "5f1d1c7e-8a0b-4b5e-9d5c-3f2a1b0c9d8e"
+
+
+@pytest.fixture(params=["memory", "file"])
+def store(request: pytest.FixtureRequest, tmp_path: object) -> Document_store:
+    if request.param == "memory":
+        return Document_store(Memory_backend())
+    return Document_store(File_system_backend(str(tmp_path)))
+
+
+def test_created_documents_are_empty(store: Document_store) -> None:
+    session_id = store.create()
+    assert store.get(session_id).elements == []
+
+
+@pytest.mark.parametrize("session_id", [None, SESSION_ID])
+def test_unknown_sessions_are_an_error(store: Document_store, session_id: object) -> None:
+    with pytest.raises(DocumentNotFoundError):
+        store.get(session_id)  # type: ignore
+
+
+def test_get_or_create_only_for_known_session_ids(store: Document_store) -> None:
+    unknown = SESSION_ID
+    assert store.get_or_create(unknown).elements == []
+    with pytest.raises(DocumentNotFoundError):
+        store.get_or_create(None)
+
+
+def test_saved_changes_are_loaded(store: Document_store) -> None:
+    session_id = store.create()
+    document = store.get(session_id)
+    document.set_elements(path_elements(3))
+    document.history.insert([{"op": "move", "items": [[0, {"x": 0, "y": 0}, {"x": 1, "y": 1}]]}])
+    document.selection_stats.add("0", {"weight": 1})
+    store.save(session_id, document)
+    loaded = store.get(session_id)
+    assert loaded.elements == path_elements(3)
+    assert loaded.index.node_idx("2") == 2
+    assert loaded.history.counts() == [1, 0]
+    assert loaded.selection_stats.common_attrs() == ["weight"]
+
+
+def test_memory_backend_evicts_idle_documents(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(graph_document.time, "monotonic", lambda: now[0])
+    store = Document_store(Memory_backend(idle_seconds=60))
+    idle = store.create()
+    now[0] += 30
+    used = store.create()
+    now[0] += 40
+    # any number of documents is kept while they are in use
+    assert store.get(used) is not None
+    with pytest.raises(DocumentNotFoundError):
+        store.get(idle)
+
+
+def test_selection_is_saved_without_the_document(tmp_path: object) -> None:
+    store = Document_store(File_system_backend(str(tmp_path)))
+    session_id = store.create()
+    document = store.get(session_id)
+    document.set_elements(path_elements(3))
+    store.save(session_id, document)
+    document_path = os.path.join(str(tmp_path), session_id.replace("-", "") + ".pickle")
+    saved = os.stat(document_path).st_mtime_ns
+    os.utime(document_path, ns=(saved - 10 ** 9, saved - 10 ** 9))
+    document.elements.pop()
+    document.selection_stats.add("0", {"weight": 1})
+    store.save_selection(session_id, document)
+    assert os.stat(document_path).st_mtime_ns == saved - 10 ** 9
+    loaded = store.get(session_id)
+    assert len(loaded.elements) == 5
+    assert loaded.selection_stats.common_attrs() == ["weight"]
+
+
+def test_pickled_documents_leave_out_the_selection() -> None:
+    document = Graph_document()
+    document.selection_stats.add("0", {"weight": 1})
+    assert "selection_stats" not in document.__getstate__()
+
+
+def test_session_locks_serialize_one_session() -> None:
+    session_locks = Session_locks()
+    events = []
+
+    def hold() -> None:
+        with session_locks.hold("a"):
+            events.append("second")
+
+    with session_locks.hold("a"):
+        thread = threading.Thread(target=hold)
+        thread.start()
+        # other sessions do not wait
+        with session_locks.hold("b"):
+            pass
+        time.sleep(0.05)
+        events.append("first")
+    thread.join()
+    assert events == ["first", "second"]
+    # locks are not kept for every session ever seen
+    assert session_locks._locks == {}
+
+
+@pytest.mark.skipif(graph_document.fcntl is None, reason="no file locks")
+def test_file_lock_holds_off_other_processes(tmp_path: object) -> None:
+    backend = File_system_backend(str(tmp_path))
+    lock_path = os.path.join(str(tmp_path), SESSION_ID.replace("-", "") + ".lock")
+    fcntl = graph_document.fcntl
+    with backend.lock(SESSION_ID), open(lock_path, "ab") as other:
+        # a file opened again locks like another process would
+        with pytest.raises(BlockingIOError):
+            fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    with open(lock_path, "ab") as other:
+        fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def test_file_backend_removes_idle_files(tmp_path: object) -> None:
+    store = Document_store(File_system_backend(str(tmp_path), idle_seconds=60))
+    idle = store.create()
+    with store.lock(idle):
+        pass
+    for filename in os.listdir(str(tmp_path)):
+        os.utime(os.path.join(str(tmp_path), filename), (time.time() - 120,) * 2)
+    # the cleanup runs at most every CLEANUP_INTERVAL_SECONDS
+    store._backend._last_cleanup = 0.0
+    used = store.create()
+    assert sorted(os.listdir(str(tmp_path))) == [
+        used.replace("-", "") + extension for extension in (".pickle", ".selection")
+    ]
+    with pytest.raises(DocumentNotFoundError):
+        store.get(idle)
+
+
+def test_session_locked(monkeypatch: pytest.MonkeyPatch) -> None:
+    backend = Memory_backend()
+    monkeypatch.setattr(graph_document, "document_store", Document_store(backend))
+
+    @session_locked
+    def callback(value: int, session_id: str) -> dict:
+        return dict(backend._session_locks._locks)
+
+    held = callback(1, SESSION_ID)
+    assert list(held) == [SESSION_ID] and backend._session_locks._locks == {}
+    # without a session there is nothing to lock
+    assert callback(1, None) == {}
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import pytest
+
+from graph_functions import dropdown_functions, Lazy_function_dict, DocError
+
+TYPED = '''
+def lazy_typed(num_nodes: int) -> list:
+    """Typed Template
+    Args:
+        Number of nodes - num_nodes: amount of nodes
+    """
+    return list(range(num_nodes))
+'''
+
+UNTYPED = '''
+def lazy_untyped(num_nodes):
+    """Untyped Template
+    """
+    return num_nodes
+'''
+
+
+def write(path, source: str, mtime_ns: int) -> None:
+    path.write_text(source)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def directory(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    write(tmp_path / "lazy_typed.py", TYPED, 10 ** 9)
+    write(tmp_path / "lazy_untyped.py", UNTYPED, 10 ** 9)
+    (tmp_path / "notes.txt").write_text("not a template")
+    (tmp_path / "package.py").mkdir()
+    yield tmp_path
+    for name in ("lazy_typed", "lazy_untyped", "lazy_new"):
+        sys.modules.pop(name, None)
+
+
+def test_names_without_imports(directory) -> None:
+    function_dict = Lazy_function_dict(str(directory))
+    assert list(function_dict) == ["lazy_typed", "lazy_untyped"]
+    assert len(function_dict) == 2
+    assert function_dict.info("lazy_typed").typed
+    assert "lazy_typed" not in sys.modules
+
+
+def test_import_on_access(directory) -> None:
+    function_dict = Lazy_function_dict(str(directory))
+    function = function_dict["lazy_typed"]
+    assert function(3) == [0, 1, 2]
+    assert function_dict["lazy_typed"] is function
+    assert "lazy_untyped" not in sys.modules
+    with pytest.raises(KeyError):
+        function_dict["notes"]
+
+
+def test_directory_changes(directory) -> None:
+    function_dict = Lazy_function_dict(str(directory))
+    assert "lazy_new" not in function_dict
+    write(directory / "lazy_new.py", TYPED.replace("lazy_typed", "lazy_new"), 10 ** 9)
+    os.utime(directory, ns=(2 * 10 ** 9, 2 * 10 ** 9))
+    assert "lazy_new" in function_dict and function_dict["lazy_new"](1) == [0]
+
+
+def test_info(directory) -> None:
+    function_dict = Lazy_function_dict(str(directory))
+    info = function_dict.info("lazy_typed")
+    assert info.typed and info.doc.startswith("Typed Template\n")
+    assert not function_dict.info("lazy_untyped").typed
+
+    write(directory / "lazy_untyped.py", UNTYPED.replace("lazy_untyped", "other"), 2 * 10 ** 9)
+    assert function_dict.info("lazy_untyped") is None
+
+
+def test_dropdown_functions(directory) -> None:
+    function_dict = Lazy_function_dict(str(directory))
+    options = dropdown_functions(function_dict)
+    assert options == [{"label": "Typed Template", "value": "lazy_typed"}]
+
+    # the label is the first line of the docstring, a single line has no end
+    one_line = TYPED.split('"""')[0] + '"""Typed Template"""\n    return []\n'
+    write(directory / "lazy_typed.py", one_line, 2 * 10 ** 9)
+    with pytest.raises(DocError):
+        dropdown_functions(function_dict)
@@ -0,0 +1,84 @@
+import base64
+import io
+import json
+
+import pytest
+
+import graph_import
+from conftest import path_elements
+from graph_binary import import_uploaded_elements
+from graph_import import import_json_elements, GraphFileError
+from graph_utils import write_json
+
+NODE_ATTRS = {"weight": 3, "blindness": 0.25, "target": True, "kind": "road", "meta": {"a": [1]}}
+
+
+def to_json(elements: list) -> str:
+    file = io.StringIO()
+    write_json(file, elements, False)
+    return base64.b64encode(file.getvalue().encode()).decode()
+
+
+def load_json(content_string: str) -> list:
+    loaded, directed = import_json_elements(content_string)
+    assert not directed
+    return loaded
+
+
+def encode(value: object) -> str:
+    return base64.b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.fixture
+def uploaded() -> list:
+    # elements as an upload creates them, the state every download starts from
+    return load_json(to_json(path_elements(5, NODE_ATTRS)))
+
+
+def test_round_trip(uploaded: list) -> None:
+    assert load_json(to_json(uploaded)) == uploaded
+
+
+def test_empty_graph() -> None:
+    assert load_json(to_json([])) == []
+
+
+def test_chunks_split_anywhere(uploaded: list, monkeypatch: pytest.MonkeyPatch) -> None:
+    uploaded[0]["data"]["additional_attributes"]["name"] = "Žluťoučký kůň"
+    content_string = to_json(uploaded)
+    # base64 chunks of 4 characters end in the middle of multi-byte characters and values
+    monkeypatch.setattr(graph_import, "BASE64_CHUNK_SIZE", 4)
+    assert load_json(content_string) == uploaded
+
+
+def test_graph_in_a_list() -> None:
+    text = encode([{"graph": {"nodes": [["a", {"position": {"x": 1, "y": 2}}]], "edges": []}}])
+    assert load_json(text)[0]["position"] == {"x": 1, "y": 2}
+
+
+def test_missing_positions_are_laid_out() -> None:
+    text = encode({"graph": {"nodes": [["a", {}], ["b", {}]], "edges": [[["a", "b"], {}]]}})
+    elements = load_json(text)
+    assert all("position" in element for element in elements[:2])
+    assert elements[2]["data"]["source"] == "a"
+
+
+def test_uploaded_json_file(uploaded: list) -> None:
+    url = "data:application/json;base64," + to_json(uploaded)
+    assert import_uploaded_elements(url, "graph.json")[0] == uploaded
+
+
+def test_progress(uploaded: list, monkeypatch: pytest.MonkeyPatch) -> None:
+    fractions: list[float] = []
+    content_string = to_json(uploaded)
+    monkeypatch.setattr(graph_import, "BASE64_CHUNK_SIZE", 400)
+    import_json_elements(content_string, progress=fractions.append)
+    assert len(fractions) > 1
+    assert fractions[-1] == 1.0
+    assert fractions == sorted(fractions)
+
+
+@pytest.mark.parametrize("text", ["[]", '{"graph": {"nodes": 1}}', "not json", '{"graph": '])
+def test_invalid_json(text: str) -> None:
+    with pytest.raises(GraphFileError):
+        import_json_elements(base64.b64encode(text.encode()).decode())
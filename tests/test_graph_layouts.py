@@ -0,0 +1,77 @@
+import logging
+
+import networkx as nx  # type: ignore
+import pytest
+
+import graph_layouts
+from graph_layouts import compute_layout, graph_hash, GRID_SPACING, LAYER_SPACING
+
+
+@pytest.fixture(autouse=True)
+def empty_cache() -> None:
+    graph_layouts._layout_cache.clear()
+
+
+def weighted_cycle(weight: float) -> nx.Graph:
+    graph = nx.cycle_graph(6)
+    graph.edges[0, 1]["weight"] = weight
+    return graph
+
+
+def test_layouts_are_cached() -> None:
+    graph = nx.cycle_graph(6)
+    positions = compute_layout(graph, "force")
+    assert compute_layout(nx.cycle_graph(6), "force") is positions
+    assert compute_layout(graph, "circular") is not positions
+
+
+def test_edge_weights_are_part_of_the_key() -> None:
+    assert graph_hash(weighted_cycle(1.0)) != graph_hash(weighted_cycle(20.0))
+    light = compute_layout(weighted_cycle(1.0), "force")
+    heavy = compute_layout(weighted_cycle(20.0), "force")
+    assert light != heavy
+
+
+def test_saved_positions_are_kept() -> None:
+    graph = nx.path_graph(3)
+    for node in graph.nodes:
+        graph.nodes[node]["position"] = {"x": 0, "y": 0}
+    assert compute_layout(graph) == {}
+
+
+def test_trees_get_layers() -> None:
+    star = nx.star_graph(3)
+    positions = compute_layout(star)
+    assert positions[0][1] == 0.0
+    assert {positions[leaf][1] for leaf in range(1, 4)} == {float(LAYER_SPACING)}
+
+
+def test_huge_graphs_get_a_grid(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(graph_layouts, "HUGE_GRAPH_NODES", 4)
+    positions = compute_layout(nx.cycle_graph(9))
+    assert positions[4] == (float(GRID_SPACING), float(GRID_SPACING))
+
+
+def test_unknown_layouts_are_automatic() -> None:
+    assert compute_layout(nx.star_graph(3), "spiral") == compute_layout(nx.star_graph(3))
+
+
+def test_least_recent_layouts_are_dropped(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(graph_layouts, "LAYOUT_CACHE_SIZE", 2)
+    first = compute_layout(nx.path_graph(2), "grid")
+    compute_layout(nx.path_graph(3), "grid")
+    compute_layout(nx.path_graph(2), "grid")
+    compute_layout(nx.path_graph(4), "grid")
+    assert compute_layout(nx.path_graph(2), "grid") is first
+    assert len(graph_layouts._layout_cache) == 2
+
+
+def test_missing_scipy_falls_back_to_the_grid(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    monkeypatch.setattr(graph_layouts, "SPARSE_SOLVER_NODES", 4)
+    monkeypatch.setattr(graph_layouts, "SPARSE_SOLVER_AVAILABLE", False)
+    with caplog.at_level(logging.WARNING, logger="graph_layouts"):
+        positions = compute_layout(nx.cycle_graph(9), "force")
+    assert positions[4] == (float(GRID_SPACING), float(GRID_SPACING))
+    assert "scipy" in caplog.text
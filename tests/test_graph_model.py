@@ -0,0 +1,310 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from conftest import path_elements
+from graph_document import Graph_document
+from graph_model import (
+    Attribute_columns,
+    Attribute_stats,
+    Element_index,
+    Id_generator,
+    Node_positions,
+    BOOL_COLUMN,
+    NUMBER_COLUMN,
+    OBJECT_COLUMN,
+    TEXT_COLUMN,
+)
+from graph_utils import create_cytoscape_node, create_cytoscape_edge, ADD_ATTRS
+
+
+def assert_index_matches(element_index: Element_index, elements: list) -> None:
+    # the upkept index answers like one built from scratch
+    fresh = Element_index(list(elements))
+    assert sorted(element_index.node_ids()) == sorted(fresh.node_ids())
+    for node_id in fresh.node_ids():
+        assert element_index.node_idx(node_id) == fresh.node_idx(node_id)
+        assert sorted(element_index.incident_edge_idxs(node_id)) == sorted(
+            fresh.incident_edge_idxs(node_id)
+        )
+    for idx, element in enumerate(elements):
+        if "source" in element["data"]:
+            source, target = element["data"]["source"], element["data"]["target"]
+            assert element_index.edge_idx(source, target) == idx
+
+
+def test_append_keeps_the_index(elements: list) -> None:
+    element_index = Element_index(elements)
+    element_index.node_idx("0")
+    version = element_index.version
+    element_index.append(create_cytoscape_node(4, {}, {4: (0.0, 0.0)}))
+    element_index.append(create_cytoscape_edge(3, 4, {}))
+    assert element_index.version == version + 2
+    assert element_index.node_idx("4") == 7
+    assert element_index.edge_idx("3", "4") == 8
+    assert sorted(element_index.incident_edge_idxs("3")) == [6, 8]
+    assert_index_matches(element_index, elements)
+
+
+def test_lookups(elements: list) -> None:
+    element_index = Element_index(elements)
+    assert element_index.node_idx("2") == 2
+    assert element_index.node_idx("9") is None
+    assert element_index.edge_idx("1", "2") == 5
+    assert element_index.edge_idx("2", "1") is None
+    assert element_index.has_edge("2", "1", False)
+    assert not element_index.has_edge("2", "1", True)
+    assert sorted(element_index.incident_edge_idxs("1")) == [4, 5]
+    assert element_index.incident_edge_idxs("9") == []
+
+
+def test_changes_outside_the_index_are_seen_after_invalidate(elements: list) -> None:
+    element_index = Element_index(elements)
+    element_index.node_idx("0")
+    elements.insert(0, create_cytoscape_node(7, {}, {7: (0.0, 0.0)}))
+    version = element_index.version
+    element_index.invalidate()
+    assert element_index.version == version + 1
+    assert element_index.node_idx("7") == 0
+    assert_index_matches(element_index, elements)
+
+
+def test_remove_node_removes_its_edges(elements: list) -> None:
+    element_index = Element_index(elements)
+    removed_elements = [elements[1], elements[4], elements[5]]
+    removed = element_index.remove_elements({"1"}, set())
+    assert removed == [[1, removed_elements[0]], [4, removed_elements[1]], [5, removed_elements[2]]]
+    assert [element["data"].get("id") for element in elements] == ["0", "2", "3", None]
+    assert element_index.node_idx("1") is None
+    assert element_index.edge_idx("0", "1") is None
+    assert element_index.edge_idx("2", "3") == 3
+    assert element_index.incident_edge_idxs("0") == []
+    assert_index_matches(element_index, elements)
+
+
+def test_remove_nodes_and_edges_in_one_pass() -> None:
+    elements = path_elements(6)
+    element_index = Element_index(elements)
+    version = element_index.version
+    element_index.remove_elements({"0", "5"}, {("2", "3")})
+    assert element_index.version > version
+    assert len(elements) == 4 + 2
+    assert not element_index.has_edge("2", "3", False)
+    assert element_index.has_edge("2", "1", False)
+    assert_index_matches(element_index, elements)
+
+
+def test_remove_keeps_the_order_of_the_rest() -> None:
+    elements = path_elements(5)
+    kept = [element for element in elements if element["data"].get("id") != "2"]
+    kept = [element for element in kept if "2" not in (
+        element["data"].get("source"), element["data"].get("target")
+    )]
+    Element_index(elements).remove_elements({"2"}, set())
+    assert elements == kept
+
+
+def test_remove_nothing_keeps_the_version(elements: list) -> None:
+    element_index = Element_index(elements)
+    version = element_index.version
+    element_index.remove_elements(set(), set())
+    assert element_index.version == version
+    assert len(elements) == 7
+
+
+def node_positions(elements: list) -> Node_positions:
+    return Node_positions(elements, Element_index(elements))
+
+
+def positions_of(elements: list, idxs: list) -> list:
+    return [(elements[idx]["position"]["x"], elements[idx]["position"]["y"]) for idx in idxs]
+
+
+def test_translate_moves_only_nodes(elements: list) -> None:
+    moved = node_positions(elements).translate([0, 2, 4], 5.0, -1.0)
+    assert moved == [0, 2]
+    assert positions_of(elements, [0, 1, 2]) == [(5.0, -1.0), (10.0, 0.0), (25.0, -1.0)]
+    assert "position" not in elements[4]
+
+
+def test_rotate_around_the_center(elements: list) -> None:
+    node_positions(elements).rotate([0, 2], 90)
+    assert positions_of(elements, [0, 2]) == pytest.approx([(10.0, -10.0), (10.0, 10.0)])
+
+
+def test_scale_from_the_center(elements: list) -> None:
+    node_positions(elements).scale([0, 1, 2], 2)
+    assert positions_of(elements, [0, 1, 2]) == [(-10.0, 0.0), (10.0, 0.0), (30.0, 0.0)]
+
+
+def test_align_shares_one_coordinate(elements: list) -> None:
+    elements[1]["position"] = {"x": 10.0, "y": 30.0}
+    positions = node_positions(elements)
+    positions.align([0, 1, 2], 0)
+    assert positions_of(elements, [0, 1, 2]) == [(0.0, 10.0), (10.0, 10.0), (20.0, 10.0)]
+    positions.align([0, 1], 1)
+    assert positions_of(elements, [0, 1]) == [(5.0, 10.0), (5.0, 10.0)]
+
+
+def test_empty_selection_moves_nothing(elements: list) -> None:
+    positions = node_positions(elements)
+    assert positions.rotate([], 90) == []
+    assert positions.scale([5], 2) == []
+    assert positions.align([99], 0) == []
+
+
+def test_set_position_is_seen_by_later_transformations(elements: list) -> None:
+    positions = node_positions(elements)
+    positions.set_position(0, {"x": 100.0, "y": 0.0})
+    positions.translate([0], 1.0, 1.0)
+    assert positions_of(elements, [0]) == [(101.0, 1.0)]
+
+
+def test_positions_follow_changes_of_the_list(elements: list) -> None:
+    element_index = Element_index(elements)
+    positions = Node_positions(elements, element_index)
+    positions.translate([0], 1.0, 0.0)
+    element_index.remove_elements({"0"}, set())
+    positions.translate([0], 1.0, 0.0)
+    assert positions_of(elements, [0]) == [(11.0, 0.0)]
+
+
+def test_id_generator_skips_existing_ids(elements: list) -> None:
+    element_index = Element_index(elements)
+    id_generator = Id_generator(element_index)
+    assert id_generator.generate_id() == "4"
+    element_index.append(create_cytoscape_node(6, {}, {6: (0.0, 0.0)}))
+    assert id_generator.generate_id() == "5"
+    assert id_generator.generate_id() == "7"
+
+
+def test_id_generator_starts_after_the_largest_numeric_id() -> None:
+    elements = [
+        create_cytoscape_node(node, {}, {node: (0.0, 0.0)}) for node in ["a", "7", "b", "3"]
+    ]
+    assert Id_generator(Element_index(elements)).generate_id() == "8"
+    assert Id_generator(Element_index([])).generate_id() == "1"
+
+
+def test_id_generator_is_pickled_with_its_document() -> None:
+    document = Graph_document()
+    document.set_elements(path_elements(3))
+    loaded = pickle.loads(pickle.dumps(document))
+    loaded.index.append(create_cytoscape_node(3, {}, {3: (0.0, 0.0)}))
+    assert loaded.id_generator.generate_id() == "4"
+
+
+def test_attribute_stats_add_and_discard() -> None:
+    stats = Attribute_stats()
+    stats.add("0", {"weight": 1, "kind": "road", "meta": {"b": 1, "a": [2]}})
+    stats.add("1", {"weight": 2, "kind": "road", "meta": {"a": [2], "b": 1}})
+    stats.add(("0", "1"), {"kind": "road"})
+    assert len(stats) == 3 and "1" in stats and stats.keys() == {"0", "1", ("0", "1")}
+    assert stats.common_attrs() == ["kind"]
+    assert stats.value_count("weight") == 2 and stats.value_count("kind") == 1
+    # equal dicts are one value whatever the order of their keys
+    assert stats.value_count("meta") == 1
+    assert stats.first_value("kind") == "road"
+
+    stats.discard(("0", "1"))
+    stats.discard("missing")
+    assert sorted(stats.common_attrs()) == ["kind", "meta", "weight"]
+    stats.discard("1")
+    assert stats.value_count("weight") == 1 and stats.first_value("weight") == 1
+    stats.discard("0")
+    assert len(stats) == 0 and stats.common_attrs() == [] and stats.value_count("kind") == 0
+
+
+def test_attribute_stats_update() -> None:
+    stats = Attribute_stats()
+    stats.add("0", {"weight": 1, "kind": "road"})
+    stats.add("1", {"weight": 1, "kind": "road"})
+    assert stats.update("0", {"weight": 1, "kind": "road"}) == set()
+    assert stats.update("0", {"weight": 2, "label": "a"}) == {"weight", "kind", "label"}
+    assert stats.common_attrs() == ["weight"] and stats.value_count("weight") == 2
+    # elements outside of the selection are not counted
+    assert stats.update("2", {"weight": 3}) == set() and "2" not in stats
+
+
+def added_attributes(elements: list) -> list:
+    return [element["data"][ADD_ATTRS] for element in elements]
+
+
+def column_values(attributes: Attribute_columns, name: str) -> list:
+    # the present rows of a column, as the element dicts have them
+    column = attributes.column(name)
+    return column.values_at(np.flatnonzero(column.present))
+
+
+def test_attribute_columns_are_typed() -> None:
+    elements = path_elements(3)
+    for element, value in zip(elements, [1, 2.5, 3]):
+        element["data"][ADD_ATTRS].update(weight=value, kind="road", target=value == 1)
+    attributes = Attribute_columns(elements, Element_index(elements))
+    assert sorted(attributes.names()) == ["kind", "target", "weight"]
+    assert attributes.column("weight").kind == NUMBER_COLUMN
+    assert attributes.column("kind").kind == TEXT_COLUMN
+    assert attributes.column("target").kind == BOOL_COLUMN
+    # integers stay integers
+    assert column_values(attributes, "weight") == [1, 2.5, 3]
+    assert [type(value) for value in column_values(attributes, "weight")] == [int, float, int]
+
+
+def test_attribute_columns_set_value(elements: list) -> None:
+    attributes = Attribute_columns(elements, Element_index(elements))
+    attributes.set_value("kind", [0, 2], "road")
+    attributes.set_value("kind", [2, 4], "rail")
+    assert added_attributes(elements)[:5] == [
+        {"kind": "road"}, {}, {"kind": "rail"}, {}, {"kind": "rail"}
+    ]
+    assert column_values(attributes, "kind") == ["road", "rail", "rail"]
+
+
+def test_attribute_columns_set_values(elements: list) -> None:
+    attributes = Attribute_columns(elements, Element_index(elements))
+    attributes.set_values("weight", [1, 3], [4, 5.5])
+    attributes.set_values("weight", [], [])
+    assert added_attributes(elements)[:4] == [{}, {"weight": 4}, {}, {"weight": 5.5}]
+    assert column_values(attributes, "weight") == [4, 5.5]
+
+
+def test_attribute_columns_fall_back_to_objects(elements: list) -> None:
+    attributes = Attribute_columns(elements, Element_index(elements))
+    attributes.set_value("value", [0, 1], 3)
+    attributes.set_value("value", [1], "three")
+    attributes.set_values("value", [2, 3], [[1, 2], 2 ** 60])
+    assert attributes.column("value").kind == OBJECT_COLUMN
+    assert column_values(attributes, "value") == [3, "three", [1, 2], 2 ** 60]
+    assert added_attributes(elements)[2] == {"value": [1, 2]}
+
+
+def test_attribute_columns_rename(elements: list) -> None:
+    attributes = Attribute_columns(elements, Element_index(elements))
+    attributes.set_value("kind", [0, 1], "road")
+    attributes.set_value("type", [2], 7)
+    attributes.rename("kind", "type", [1, 3])
+    assert added_attributes(elements)[:4] == [{"kind": "road"}, {"type": "road"}, {"type": 7}, {}]
+    assert column_values(attributes, "kind") == ["road"]
+    assert column_values(attributes, "type") == ["road", 7]
+    attributes.rename("kind", "type", [0])
+    assert attributes.column("kind") is None
+
+
+def test_attribute_columns_delete(elements: list) -> None:
+    attributes = Attribute_columns(elements, Element_index(elements))
+    attributes.set_value("kind", [0, 1], "road")
+    attributes.delete("kind", [0, 2])
+    assert added_attributes(elements)[:2] == [{}, {"kind": "road"}]
+    attributes.delete("kind", [1])
+    attributes.delete("missing", [1])
+    assert attributes.column("kind") is None and attributes.names() == []
+
+
+def test_attribute_columns_follow_list_changes(elements: list) -> None:
+    element_index = Element_index(elements)
+    attributes = Attribute_columns(elements, element_index)
+    attributes.set_value("kind", [0], "road")
+    elements[1]["data"][ADD_ATTRS]["kind"] = "rail"
+    element_index.invalidate()
+    assert column_values(attributes, "kind") == ["road", "rail"]
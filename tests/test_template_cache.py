@@ -0,0 +1,88 @@
+import os
+
+import pytest
+
+import template_cache
+from square_subgraph import square_subgraph
+from template_cache import Template_cache, find_template_elements, is_deterministic
+
+ELEMENTS = [{"data": {"id": "0"}, "position": {"x": 0, "y": 0}}]
+
+
+@pytest.fixture
+def cache() -> Template_cache:
+    return Template_cache()
+
+
+def test_key_ignores_parameter_order(cache: Template_cache) -> None:
+    key = cache.key("square_subgraph", {"side_length": 6, "num_nodes": 10}, "grid")
+    assert key == cache.key("square_subgraph", {"num_nodes": 10, "side_length": 6}, "grid")
+
+
+@pytest.mark.parametrize(
+    "name, kwargs, layout_name",
+    [
+        ("diamond", {"side_length": 6, "num_nodes": 10}, "grid"),
+        ("square_subgraph", {"side_length": 6, "num_nodes": 10}, "spring"),
+        ("square_subgraph", {"side_length": 6, "num_nodes": 11}, "grid"),
+        ("square_subgraph", {"side_length": 6.0, "num_nodes": 10}, "grid"),
+        ("square_subgraph", {"side_length": (6,), "num_nodes": 10}, "grid"),
+    ],
+)
+def test_key_differs(cache: Template_cache, name: str, kwargs: dict, layout_name: str) -> None:
+    key = cache.key("square_subgraph", {"side_length": 6, "num_nodes": 10}, "grid")
+    assert cache.key(name, kwargs, layout_name) != key
+
+
+def test_key_follows_template_sources(cache: Template_cache, monkeypatch) -> None:
+    key = cache.key("square_subgraph", {}, "grid")
+    monkeypatch.setattr(template_cache, "templates_source_hash", lambda: "edited")
+    assert cache.key("square_subgraph", {}, "grid") != key
+
+
+def test_unset_seed_is_not_cached() -> None:
+    assert is_deterministic({"node_seed": 1, "param_seed": 13})
+    assert not is_deterministic({"node_seed": None, "param_seed": 13})
+    param_dict = {"side_length": 6, "num_nodes": 10, "node_seed": None}
+    key, cached = find_template_elements("square_subgraph", square_subgraph, param_dict, "grid")
+    assert key is None and cached is None
+
+
+def test_hit_is_a_fresh_copy(cache: Template_cache) -> None:
+    cache.set("key", ELEMENTS, True)
+    elements, directed = cache.get("key")
+    assert elements == ELEMENTS and directed
+    elements[0]["position"]["x"] = 10
+    assert cache.get("key")[0] == ELEMENTS
+    assert cache.get("other") is None
+
+
+def test_memory_tier_is_lru() -> None:
+    cache = Template_cache(max_entries=2)
+    cache.set("first", ELEMENTS, True)
+    cache.set("second", ELEMENTS, True)
+    cache.get("first")
+    cache.set("third", ELEMENTS, True)
+    assert cache.get("first") is not None and cache.get("third") is not None
+    assert cache.get("second") is None
+
+
+def test_disk_tier_outlives_memory(tmp_path) -> None:
+    Template_cache(cache_dir=str(tmp_path)).set("key", ELEMENTS, False)
+    assert Template_cache(cache_dir=str(tmp_path)).get("key") == (ELEMENTS, False)
+
+
+def test_disk_tier_removes_least_recently_used(tmp_path) -> None:
+    cache = Template_cache(max_entries=0, cache_dir=str(tmp_path))
+    cache.set("first", ELEMENTS, True)
+    cache.set("second", ELEMENTS, True)
+    size = os.path.getsize(tmp_path / "first.pickle")
+    os.utime(tmp_path / "first.pickle", (0, 0))
+    os.utime(tmp_path / "second.pickle", (1, 1))
+    # a hit makes the file the most recently used
+    cache.get("first")
+
+    cache = Template_cache(max_entries=0, cache_dir=str(tmp_path), max_disk_bytes=2 * size)
+    cache.set("third", ELEMENTS, True)
+    assert sorted(os.listdir(tmp_path)) == ["first.pickle", "third.pickle"]
+    assert cache.get("second") is None
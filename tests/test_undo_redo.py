@@ -0,0 +1,115 @@
+import copy
+
+from conftest import path_elements
+from undo_redo import (
+    OPERATION,
+    ADD,
+    REMOVE,
+    ITEMS,
+    Undo_redo_history,
+    apply_delta,
+    snapshot_positions,
+    create_move_delta,
+    snapshot_data,
+    create_set_data_delta,
+)
+
+
+def test_move_round_trip(elements: list) -> None:
+    before = copy.deepcopy(elements)
+    snapshot = snapshot_positions(elements, [0, 2])
+    elements[0]["position"] = {"x": 1.0, "y": 2.0}
+    after = copy.deepcopy(elements)
+    history = Undo_redo_history()
+    history.insert(create_move_delta(elements, snapshot))
+    history.undo(elements)
+    assert elements == before
+    history.redo(elements)
+    assert elements == after
+
+
+def test_in_place_data_changes_round_trip(elements: list) -> None:
+    # later actions change the same data dict, the history must keep its own copy
+    history = Undo_redo_history()
+    states = [copy.deepcopy(elements)]
+    for value in (1, 2):
+        snapshot = snapshot_data(elements, [0])
+        elements[0]["data"]["additional_attributes"]["weight"] = value
+        history.insert(create_set_data_delta(elements, snapshot))
+        states.append(copy.deepcopy(elements))
+    assert history.counts() == [2, 0]
+    history.undo(elements)
+    assert elements == states[1]
+    history.undo(elements)
+    assert elements == states[0]
+    assert history.counts() == [0, 2]
+    history.redo(elements)
+    history.redo(elements)
+    assert elements == states[2]
+
+
+def test_add_and_remove_round_trip(elements: list) -> None:
+    before = copy.deepcopy(elements)
+    new_node = path_elements(5)[4]
+    delta = [
+        {OPERATION: REMOVE, ITEMS: [[4, elements[4]]]},
+        {OPERATION: ADD, ITEMS: [[4, new_node]]},
+    ]
+    history = Undo_redo_history()
+    history.insert(delta)
+    apply_delta(elements, delta)
+    expected = copy.deepcopy(elements)
+    assert elements[4] == new_node
+    assert len(elements) == len(before)
+    history.undo(elements)
+    assert elements == before
+    history.redo(elements)
+    assert elements == expected
+
+
+def test_insert_drops_redo_actions(elements: list) -> None:
+    history = Undo_redo_history()
+    for x in (1.0, 2.0):
+        snapshot = snapshot_positions(elements, [0])
+        elements[0]["position"] = {"x": x, "y": 0.0}
+        history.insert(create_move_delta(elements, snapshot))
+    history.undo(elements)
+    snapshot = snapshot_positions(elements, [1])
+    elements[1]["position"] = {"x": 3.0, "y": 0.0}
+    history.insert(create_move_delta(elements, snapshot))
+    assert history.counts() == [2, 0]
+    assert history.redo(elements) == []
+
+
+def test_limits_drop_the_oldest_actions(elements: list) -> None:
+    history = Undo_redo_history(max_depth=2)
+    for x in (1.0, 2.0, 3.0):
+        snapshot = snapshot_positions(elements, [0])
+        elements[0]["position"] = {"x": x, "y": 0.0}
+        history.insert(create_move_delta(elements, snapshot))
+    assert history.counts() == [2, 0]
+    history.undo(elements)
+    history.undo(elements)
+    assert elements[0]["position"] == {"x": 1.0, "y": 0.0}
+    assert history.undo(elements) == []
+
+
+def test_item_limit_drops_the_oldest_actions(elements: list) -> None:
+    history = Undo_redo_history(max_items=2)
+    for idxs in ([0], [1], [2]):
+        snapshot = snapshot_positions(elements, idxs)
+        elements[idxs[0]]["position"] = {"x": -1.0, "y": -1.0}
+        history.insert(create_move_delta(elements, snapshot))
+    assert history.counts() == [2, 0]
+    # an action larger than the limit is still kept, it is the only one then
+    snapshot = snapshot_positions(elements, [0, 1, 2, 3])
+    for idx in range(4):
+        elements[idx]["position"] = {"x": 9.0, "y": 9.0}
+    history.insert(create_move_delta(elements, snapshot))
+    assert history.counts() == [1, 0]
+
+
+def test_empty_delta_is_not_an_action() -> None:
+    history = Undo_redo_history()
+    history.insert([])
+    assert history.counts() == [0, 0]
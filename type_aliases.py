@@ -28,13 +28,16 @@ OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """
 
-import networkx as nx  # type: ignore
 from dash_extensions.enrich import html  # type: ignore
 import dash_bootstrap_components as dbc  # type: ignore
 import dash_daq as daq  # type: ignore
-from typing import Callable, Any, Union, Optional
+from typing import TYPE_CHECKING, Callable, Any, Union, Optional
 
-Graph = Union[nx.Graph, nx.DiGraph]
+if TYPE_CHECKING:
+    import networkx as nx  # type: ignore
+
+# networkx is imported only once a graph is really converted or generated
+Graph = Union["nx.Graph", "nx.DiGraph"]
 GraphFunction = Callable[..., Graph]
 GraphOrNone = Optional[Graph]
 GraphElements = list[dict[str, Any]]
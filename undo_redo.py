@@ -0,0 +1,195 @@
+import copy
+from typing import Any
+from type_aliases import (
+    GraphElements,
+    U_R_Actions_Init
+)
+
+# Each action is a list of operations (deltas), so its size is proportional
+# to the change and not to the size of the graph. The history of a document
+# is kept on the server, the undo-redo store of the browser only holds the
+# numbers of actions which can be undone and redone.
+UNDO_REDO_DEPTH = 100
+# items of all operations in the history, e.g. five uploads of 200k elements
+UNDO_REDO_MAX_ITEMS = 1000000
+
+OPERATION = "op"
+ADD = "add"
+REMOVE = "remove"
+MOVE = "move"
+SET_DATA = "set_data"
+ITEMS = "items"
+
+# Indices into operation items
+ITEM_IDX = 0
+ITEM_OLD = 1
+ITEM_NEW = 2
+
+
+def snapshot_positions(elements: GraphElements, element_idxs: list) -> dict:
+    snapshot = {}
+    for idx in element_idxs:
+        if idx is None or idx >= len(elements) or "position" not in elements[idx]:
+            continue
+        snapshot[idx] = (elements[idx]["position"]["x"], elements[idx]["position"]["y"])
+    return snapshot
+
+
+def create_move_delta(elements: GraphElements, snapshot: dict) -> list:
+    moved = []
+    for idx, old_position in snapshot.items():
+        new_position = elements[idx]["position"]
+        if old_position != (new_position["x"], new_position["y"]):
+            moved.append([
+                idx,
+                {"x": old_position[0], "y": old_position[1]},
+                {"x": new_position["x"], "y": new_position["y"]},
+            ])
+    if len(moved) == 0:
+        return []
+    return [{OPERATION: MOVE, ITEMS: moved}]
+
+
+IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
+
+def copy_data(value: Any) -> Any:
+    # same result as copy.deepcopy for element data, without its memo bookkeeping
+    if isinstance(value, IMMUTABLE_TYPES):
+        return value
+    if type(value) is dict:
+        return {key: copy_data(item) for key, item in value.items()}
+    if type(value) is list:
+        return [copy_data(item) for item in value]
+    return copy.deepcopy(value)
+
+
+def snapshot_data(elements: GraphElements, element_idxs: list) -> dict:
+    return {
+        idx: copy_data(elements[idx]["data"])
+        for idx in element_idxs
+        if idx < len(elements)
+    }
+
+
+def create_set_data_delta(elements: GraphElements, snapshot: dict) -> list:
+    changed = []
+    for idx, old_data in snapshot.items():
+        new_data = elements[idx]["data"]
+        if old_data != new_data:
+            changed.append([idx, old_data, new_data])
+    if len(changed) == 0:
+        return []
+    return [{OPERATION: SET_DATA, ITEMS: changed}]
+
+
+def create_add_delta(items: list) -> list:
+    """Items are [index, element] of the added elements in the list after the action."""
+    if len(items) == 0:
+        return []
+    return [{OPERATION: ADD, ITEMS: items}]
+
+
+def create_remove_delta(items: list) -> list:
+    """Items are [index, element] of the removed elements in the list before the action."""
+    if len(items) == 0:
+        return []
+    return [{OPERATION: REMOVE, ITEMS: items}]
+
+
+def apply_operation(elements: GraphElements, operation: dict, inverse: bool = False) -> None:
+    op = operation[OPERATION]
+    items = operation[ITEMS]
+    if op == ADD and not inverse or op == REMOVE and inverse:
+        for item in items:
+            elements.insert(item[ITEM_IDX], copy.deepcopy(item[ITEM_OLD]))
+    elif op == REMOVE or op == ADD:
+        for item in reversed(items):
+            elements.pop(item[ITEM_IDX])
+    elif op == MOVE:
+        position = ITEM_OLD if inverse else ITEM_NEW
+        for item in items:
+            elements[item[ITEM_IDX]]["position"] = dict(item[position])
+    elif op == SET_DATA:
+        data = ITEM_OLD if inverse else ITEM_NEW
+        for item in items:
+            elements[item[ITEM_IDX]]["data"] = copy.deepcopy(item[data])
+
+
+def apply_delta(elements: GraphElements, delta: list) -> GraphElements:
+    for operation in delta:
+        apply_operation(elements, operation)
+    return elements
+
+
+def revert_delta(elements: GraphElements, delta: list) -> GraphElements:
+    for operation in reversed(delta):
+        apply_operation(elements, operation, inverse=True)
+    return elements
+
+
+def delta_items(delta: list) -> int:
+    return sum(len(operation[ITEMS]) for operation in delta)
+
+
+class Undo_redo_history:
+    """Deltas of the actions done in a document, kept on the server.
+
+    Deltas are copied when inserted, as they may refer to elements which
+    are changed in place by later actions. Besides the depth, the history
+    is limited by the number of items, so a few whole-graph replacements
+    do not keep hundreds of large graphs alive.
+    """
+
+    def __init__(
+        self, max_depth: int = UNDO_REDO_DEPTH, max_items: int = UNDO_REDO_MAX_ITEMS
+    ) -> None:
+        self._actions: list[list] = []
+        # number of actions which are applied, the rest can be redone
+        self._current = 0
+        self._items = 0
+        self._max_depth = max_depth
+        self._max_items = max_items
+
+    def insert(self, delta: list) -> None:
+        if len(delta) == 0:
+            return
+        # drop actions which were undone, they can not be redone anymore
+        for action in self._actions[self._current:]:
+            self._items -= delta_items(action)
+        del self._actions[self._current:]
+        self._actions.append(copy_data(delta))
+        self._items += delta_items(delta)
+        self._current += 1
+        while len(self._actions) > 1 and (
+            len(self._actions) > self._max_depth or self._items > self._max_items
+        ):
+            self._items -= delta_items(self._actions.pop(0))
+            self._current -= 1
+
+    def can_undo(self) -> bool:
+        return self._current > 0
+
+    def can_redo(self) -> bool:
+        return self._current < len(self._actions)
+
+    def undo(self, elements: GraphElements) -> list:
+        """Reverts the last applied action and returns its delta, [] if there is none."""
+        if not self.can_undo():
+            return []
+        self._current -= 1
+        delta = self._actions[self._current]
+        revert_delta(elements, delta)
+        return delta
+
+    def redo(self, elements: GraphElements) -> list:
+        if not self.can_redo():
+            return []
+        delta = self._actions[self._current]
+        self._current += 1
+        apply_delta(elements, delta)
+        return delta
+
+    def counts(self) -> U_R_Actions_Init:
+        """Numbers of actions which can be undone and redone, all the browser gets."""
+        return [self._current, len(self._actions) - self._current]
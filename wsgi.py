@@ -0,0 +1,33 @@
+"""Production entry point, e.g.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+    waitress-serve --threads 8 wsgi:server
+"""
+import os
+from typing import Optional
+from graph_document import document_store, File_system_backend
+from generation_jobs import set_job_dir
+from template_cache import template_cache
+from app import app
+# Ignoring unused import errors since its needed for import of callbacks
+import attribute_editor  # noqa: F401
+import canvas  # noqa: F401
+import sidebar  # noqa: F401
+import action_manager  # noqa: F401
+
+# directory shared by all server processes, needed as soon as there is more than one
+DATA_DIR_VARIABLE = "MAP_EDITOR_DATA_DIR"
+
+
+def configure_shared_state(data_dir: Optional[str]) -> None:
+    """Moves documents, generation jobs and generated templates from memory to ‹data_dir›."""
+    if data_dir is None:
+        return
+    document_store.set_backend(File_system_backend(os.path.join(data_dir, "graph_documents")))
+    set_job_dir(os.path.join(data_dir, "generation_jobs"))
+    template_cache.set_cache_dir(os.path.join(data_dir, "template_cache"))
+
+
+configure_shared_state(os.environ.get(DATA_DIR_VARIABLE))
+
+server = app.server